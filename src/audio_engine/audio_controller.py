@@ -1,16 +1,21 @@
 import os
 import threading
-from typing import Any, Callable, Dict, List, Optional, Union
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
 
 import numpy as np
 import pygame
 
 from audio_engine.audio_loader import AudioLoader
 from audio_engine.mixer import AudioMixer
+from audio_engine.output_reference import OutputReference
 
 TTS_VOLUME = 1.2
 BACKGROUND_VOLUME_MAX = 0.2
 NORMAL_VOLUME_MAX = 0.5
+MIXER_BUFFER_SIZE = 512
+LATENCY_SMOOTHING = 0.3
 
 
 class AudioController:
@@ -23,7 +28,11 @@ class AudioController:
             pygame.mixer.quit()
 
         pygame.mixer.pre_init(
-            frequency=24000, size=-16, channels=2, buffer=512, allowedchanges=0
+            frequency=24000,
+            size=-16,
+            channels=2,
+            buffer=MIXER_BUFFER_SIZE,
+            allowedchanges=0,
         )
         pygame.mixer.init()
 
@@ -31,44 +40,263 @@ class AudioController:
         self.mixer = AudioMixer()
         self.clips: Dict[int, Any] = {}
         self._next_clip_id: int = 1
+        self._clip_lock = threading.Lock()
         self.channel_map: Dict[str, int] = {"tts": 0}
         self._ducked: bool = False
         self._panning_threads: Dict[int, threading.Thread] = {}
         self._fade_threads: Dict[int, threading.Thread] = {}
-        self._tts_duck_restore_callback: Optional[Callable[[], None]] = None
+        self._tts_ducked: bool = False
+        self._tts_lock = threading.Lock()
+        self._tts_end_time: float = 0.0
+        self._tts_last_start: float = 0.0
+        self._tts_pending: Deque[Tuple[pygame.mixer.Sound, float]] = deque()
+        self._tts_feed_armed: bool = False
+        output_rate, _ = self.get_output_format()
+        self._min_output_latency: float = MIXER_BUFFER_SIZE / output_rate
+        self._output_latency: float = 2 * self._min_output_latency
+        self.output_reference = OutputReference(output_latency=self._min_output_latency)
+
+    def get_output_format(self) -> Tuple[int, int]:
+        """
+        Get the sample rate and channel count of the shared output device.
+
+        Returns:
+            Tuple[int, int]: The output sample rate and number of channels.
+        """
+        init_info = pygame.mixer.get_init()
+        if not init_info:
+            return 24000, 2
+        frequency, _, channels = init_info
+        return frequency, channels
+
+    def _prepare_tts_sound(
+        self, samples: np.ndarray, sample_rate: int
+    ) -> pygame.mixer.Sound:
+        """
+        Resample mono TTS samples once into the output device format.
+
+        Args:
+            samples: The int16 mono TTS samples.
+            sample_rate: The native sample rate of the TTS samples.
+
+        Returns:
+            pygame.mixer.Sound: A sound matching the mixer configuration.
+        """
+        output_rate, output_channels = self.get_output_format()
+        audio = samples.astype(np.float32).reshape(-1)
+
+        if sample_rate != output_rate and len(audio) > 1:
+            target_length = int(len(audio) * output_rate / sample_rate)
+            audio = np.interp(
+                np.linspace(0, len(audio) - 1, target_length),
+                np.arange(len(audio)),
+                audio,
+            )
+
+        audio = np.clip(audio, -32768, 32767).astype(np.int16)
+        if output_channels > 1:
+            audio = np.column_stack([audio] * output_channels)
+
+        return pygame.sndarray.make_sound(np.ascontiguousarray(audio))
 
     def play_tts_audio(
-        self, audio_wav_bytes: bytes, on_complete: Optional[Callable[[], None]] = None
+        self,
+        samples: np.ndarray,
+        sample_rate: int,
+        on_complete: Optional[Callable[[], None]] = None,
     ) -> None:
         """
-        Play WAV audio from TTS on the dedicated TTS channel.
+        Play TTS audio on the dedicated TTS channel with background ducking.
 
         Args:
-            audio_wav_bytes: The WAV audio data to play.
+            samples: The int16 mono TTS samples.
+            sample_rate: The native sample rate of the TTS samples.
             on_complete: Optional callback to call when TTS audio finishes playing.
         """
-        if not audio_wav_bytes:
+        if samples is None or len(samples) == 0:
             if on_complete:
                 on_complete()
             return
 
-        sound_chunk = pygame.mixer.Sound(buffer=audio_wav_bytes)
+        sound_chunk = self._prepare_tts_sound(samples, sample_rate)
+        tts_channel = self.channel_map["tts"]
+
+        self.mixer.set_volume(tts_channel, TTS_VOLUME)
+
+        if not self._tts_ducked:
+            self._tts_ducked = True
+            threading.Thread(
+                target=self._auto_duck_background, args=(True,), daemon=True
+            ).start()
+
+        with self._tts_lock:
+            start_time = max(time.monotonic(), self._tts_end_time)
+            expected_end = start_time + sound_chunk.get_length()
+            self._tts_pending.append((sound_chunk, self._tts_last_start))
+            self._tts_last_start = start_time
+            self._tts_end_time = expected_end
+        self._feed_tts_channel()
+
+        self._register_reference(
+            tts_channel,
+            sound_chunk,
+            samples.astype(np.float32).reshape(-1) / 32768,
+            sample_rate,
+            start_time=start_time,
+        )
+
+        if on_complete:
+            self._schedule_tts_completion(expected_end, on_complete)
+
+    def _feed_tts_channel(self) -> None:
+        """
+        Move pending TTS sounds onto the channel as its single queue slot frees up.
+
+        A pygame channel holds one playing and one queued sound, so sentences
+        that arrive faster than they play wait here until their predecessor
+        has started.
+        """
+        tts_channel = self.channel_map["tts"]
+        channel = self.mixer.channels[tts_channel]
+        with self._tts_lock:
+            self._tts_feed_armed = False
+            while self._tts_pending and (
+                not channel.get_busy() or channel.get_queue() is None
+            ):
+                sound, _ = self._tts_pending.popleft()
+                self.mixer.queue_sound(tts_channel, sound)
+            if not self._tts_pending or self._tts_feed_armed:
+                return
+            self._tts_feed_armed = True
+            delay = (
+                max(0.0, self._tts_pending[0][1] - time.monotonic())
+                + self._min_output_latency
+            )
+        timer = threading.Timer(delay, self._feed_tts_channel)
+        timer.daemon = True
+        timer.start()
+
+    def notify_when_tts_done(self, on_complete: Callable[[], None]) -> None:
+        """
+        Call back once everything already queued for TTS has finished playing.
+
+        Args:
+            on_complete: Callback to call when the TTS channel drains.
+        """
+        with self._tts_lock:
+            expected_end = self._tts_end_time
+        self._schedule_tts_completion(expected_end, on_complete)
+
+    def _schedule_tts_completion(
+        self,
+        expected_end: float,
+        on_complete: Callable[[], None],
+        delay: Optional[float] = None,
+    ) -> None:
+        """
+        Arm a one-shot timer for the moment a queued TTS sound should finish.
+
+        Args:
+            expected_end: Monotonic time at which the sound is due to end.
+            on_complete: Callback to call once the sound has finished.
+            delay: Optional explicit delay, used when re-arming a late check.
+        """
+        if delay is None:
+            delay = max(0.0, expected_end - time.monotonic()) + self._output_latency
+        timer = threading.Timer(
+            delay,
+            self._on_tts_timer,
+            args=(expected_end, on_complete, delay is not None),
+        )
+        timer.daemon = True
+        timer.start()
+
+    def _on_tts_timer(
+        self, expected_end: float, on_complete: Callable[[], None], rearmed: bool
+    ) -> None:
+        """
+        Fire a TTS completion callback, tracking how late the device finished.
+
+        Args:
+            expected_end: Monotonic time at which the sound was due to end.
+            on_complete: Callback to call once the sound has finished.
+            rearmed: Whether this check was re-armed after finding the device busy.
+        """
+        with self._tts_lock:
+            is_last_sound = expected_end >= self._tts_end_time
+
+        if is_last_sound and self.mixer.is_playing(self.channel_map["tts"]):
+            self._schedule_tts_completion(
+                expected_end, on_complete, delay=self._min_output_latency
+            )
+            return
+
+        if is_last_sound:
+            measured = (
+                max(time.monotonic() - expected_end, self._min_output_latency)
+                if rearmed
+                else self._min_output_latency
+            )
+            self._output_latency += LATENCY_SMOOTHING * (
+                measured - self._output_latency
+            )
+        on_complete()
+
+    def stop_tts_audio(self) -> None:
+        """
+        Cut off TTS playback immediately, including any queued sentences.
+        """
+        with self._tts_lock:
+            self._tts_pending.clear()
+            self._tts_end_time = time.monotonic()
+        self.mixer.stop(self.channel_map["tts"])
 
-        self.mixer.set_volume(self.channel_map["tts"], TTS_VOLUME)
-        self.mixer.queue_sound(self.channel_map["tts"], sound_chunk)
+    def _register_reference(
+        self,
+        channel_idx: int,
+        sound: pygame.mixer.Sound,
+        audio: np.ndarray,
+        sample_rate: int,
+        loops: int = 0,
+        start_time: Optional[float] = None,
+    ) -> None:
+        """
+        Record a sound handed to the mixer as echo-cancellation reference.
+
+        Args:
+            channel_idx: The channel the sound plays on.
+            sound: The pygame sound.
+            audio: The float samples of the sound in [-1, 1].
+            sample_rate: The sample rate of the samples.
+            loops: Extra repeats, or -1 to loop forever.
+            start_time: Monotonic start time, now when omitted.
+        """
+        self.output_reference.register(
+            self.mixer.channels[channel_idx],
+            sound,
+            audio,
+            sample_rate,
+            time.monotonic() if start_time is None else start_time,
+            loops=loops,
+        )
 
-        self._auto_duck_background(True)
-        self._tts_duck_restore_callback = on_complete
+    def get_output_latency(self) -> float:
+        """
+        Get the measured delay between a sound's nominal end and the device going idle.
+
+        Returns:
+            float: The smoothed output latency in seconds.
+        """
+        return self._output_latency
 
     def restore_background_after_tts(self) -> None:
         """
-        Restore background audio ducking and call completion callback.
+        Restore background audio after TTS playback has finished.
         """
+        if not self._tts_ducked:
+            return
+        self._tts_ducked = False
         self._auto_duck_background(False)
-        if self._tts_duck_restore_callback:
-            callback = self._tts_duck_restore_callback
-            self._tts_duck_restore_callback = None
-            callback()
 
     def _get_audio_description(self, filepath: str) -> str:
         """
@@ -176,7 +404,7 @@ class AudioController:
         """
         if enable:
 
-            for clip_id, clip in self.clips.items():
+            for clip_id, clip in list(self.clips.items()):
                 if clip["channel"] != self.channel_map["tts"]:
 
                     if "_pre_duck_volume" not in clip:
@@ -186,7 +414,7 @@ class AudioController:
                     self._fade_volume(clip_id, clip["volume"], target_volume, 1.2)
         else:
 
-            for clip_id, clip in self.clips.items():
+            for clip_id, clip in list(self.clips.items()):
                 if (
                     clip["channel"] != self.channel_map["tts"]
                     and "_pre_duck_volume" in clip
@@ -211,22 +439,24 @@ class AudioController:
             audio_array = np.ascontiguousarray((audio * 32767).astype(np.int16))
             sound = pygame.sndarray.make_sound(audio_array)
 
-            channel = self._get_free_non_reserved_channel()
-            if channel is None:
-                return "No free audio channels available"
-
-            self.mixer.play(sound, channel, loops=-1, volume=0.0)
-
-            description = self._get_audio_description(filepath)
-            clip_id = self._next_clip_id
-            self._next_clip_id += 1
-            self.clips[clip_id] = {
-                "type": "environmental",
-                "channel": channel,
-                "volume": 0.0,
-                "pan": 0.0,
-                "description": description,
-            }
+            with self._clip_lock:
+                channel = self._get_free_non_reserved_channel()
+                if channel is None:
+                    return "No free audio channels available"
+
+                self.mixer.play(sound, channel, loops=-1, volume=0.0)
+                self._register_reference(channel, sound, audio, 24000, loops=-1)
+
+                description = self._get_audio_description(filepath)
+                clip_id = self._next_clip_id
+                self._next_clip_id += 1
+                self.clips[clip_id] = {
+                    "type": "environmental",
+                    "channel": channel,
+                    "volume": 0.0,
+                    "pan": 0.0,
+                    "description": description,
+                }
 
             self._start_fade_in(clip_id, target_volume)
 
@@ -249,22 +479,24 @@ class AudioController:
             audio_array = np.ascontiguousarray((audio * 32767).astype(np.int16))
             sound = pygame.sndarray.make_sound(audio_array)
 
-            channel = self._get_free_non_reserved_channel()
-            if channel is None:
-                return "No free audio channels available"
-
-            self.mixer.play(sound, channel, loops=-1, volume=0.0)
-
-            description = self._get_audio_description(filepath)
-            clip_id = self._next_clip_id
-            self._next_clip_id += 1
-            self.clips[clip_id] = {
-                "type": "speakers",
-                "channel": channel,
-                "volume": 0.0,
-                "pan": 0.0,
-                "description": description,
-            }
+            with self._clip_lock:
+                channel = self._get_free_non_reserved_channel()
+                if channel is None:
+                    return "No free audio channels available"
+
+                self.mixer.play(sound, channel, loops=-1, volume=0.0)
+                self._register_reference(channel, sound, audio, 24000, loops=-1)
+
+                description = self._get_audio_description(filepath)
+                clip_id = self._next_clip_id
+                self._next_clip_id += 1
+                self.clips[clip_id] = {
+                    "type": "speakers",
+                    "channel": channel,
+                    "volume": 0.0,
+                    "pan": 0.0,
+                    "description": description,
+                }
 
             self._start_fade_in(clip_id, target_volume)
 
@@ -283,22 +515,24 @@ class AudioController:
             audio_array = np.ascontiguousarray((audio * 32767).astype(np.int16))
             sound = pygame.sndarray.make_sound(audio_array)
 
-            channel = self._get_free_non_reserved_channel()
-            if channel is None:
-                return "No free audio channels available"
-
-            self.mixer.play(sound, channel, loops=-1, volume=0.0)
-
-            description = self._get_audio_description(filepath)
-            clip_id = self._next_clip_id
-            self._next_clip_id += 1
-            self.clips[clip_id] = {
-                "type": "noise",
-                "channel": channel,
-                "volume": 0.0,
-                "pan": 0.0,
-                "description": description,
-            }
+            with self._clip_lock:
+                channel = self._get_free_non_reserved_channel()
+                if channel is None:
+                    return "No free audio channels available"
+
+                self.mixer.play(sound, channel, loops=-1, volume=0.0)
+                self._register_reference(channel, sound, audio, 24000, loops=-1)
+
+                description = self._get_audio_description(filepath)
+                clip_id = self._next_clip_id
+                self._next_clip_id += 1
+                self.clips[clip_id] = {
+                    "type": "noise",
+                    "channel": channel,
+                    "volume": 0.0,
+                    "pan": 0.0,
+                    "description": description,
+                }
 
             self._start_fade_in(clip_id, target_volume)
 
@@ -317,22 +551,24 @@ class AudioController:
             audio_array = np.ascontiguousarray((audio * 32767).astype(np.int16))
             sound = pygame.sndarray.make_sound(audio_array)
 
-            channel = self._get_free_non_reserved_channel()
-            if channel is None:
-                return "No free audio channels available"
-
-            self.mixer.play(sound, channel, loops=0, volume=0.0)
-
-            description = self._get_audio_description(filepath)
-            clip_id = self._next_clip_id
-            self._next_clip_id += 1
-            self.clips[clip_id] = {
-                "type": "alerts",
-                "channel": channel,
-                "volume": 0.0,
-                "pan": 0.0,
-                "description": description,
-            }
+            with self._clip_lock:
+                channel = self._get_free_non_reserved_channel()
+                if channel is None:
+                    return "No free audio channels available"
+
+                self.mixer.play(sound, channel, loops=0, volume=0.0)
+                self._register_reference(channel, sound, audio, 24000, loops=0)
+
+                description = self._get_audio_description(filepath)
+                clip_id = self._next_clip_id
+                self._next_clip_id += 1
+                self.clips[clip_id] = {
+                    "type": "alerts",
+                    "channel": channel,
+                    "volume": 0.0,
+                    "pan": 0.0,
+                    "description": description,
+                }
 
             self._start_fade_in(clip_id, target_volume)
 
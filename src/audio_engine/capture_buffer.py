@@ -0,0 +1,186 @@
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+
+
+class SegmentRef(NamedTuple):
+    """
+    Marks a finished segment without copying it out of the ring.
+    """
+
+    start: int
+    end: int
+    overflow: List[np.ndarray]
+
+
+class CaptureBuffer:
+    """
+    A preallocated float32 ring buffer for microphone capture.
+    """
+
+    def __init__(
+        self, capacity_seconds: float = 60.0, sample_rate: int = 16000
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.capacity = int(capacity_seconds * sample_rate)
+        self._data = np.zeros(self.capacity, dtype=np.float32)
+        self._write_pos: int = 0
+        self._segment_start: int = 0
+        self._in_segment: bool = False
+        self._overflow: List[np.ndarray] = []
+
+    def write(self, block: np.ndarray) -> None:
+        """Copies a block of samples into the ring without allocating.
+
+        Args:
+            block: The float32 samples to append, shaped (frames,) or (frames, 1).
+        """
+        samples = block.reshape(-1)
+        n = samples.shape[0]
+        if n == 0:
+            return
+
+        if self._in_segment and (
+            self._overflow or self._write_pos + n - self._segment_start > self.capacity
+        ):
+            self._spill(samples)
+
+        if n > self.capacity:
+            samples = samples[-self.capacity :]
+            self._write_pos += n - self.capacity
+            n = self.capacity
+
+        start = self._write_pos % self.capacity
+        first = min(n, self.capacity - start)
+        self._data[start : start + first] = samples[:first]
+        if first < n:
+            self._data[: n - first] = samples[first:]
+        self._write_pos += n
+
+    def _spill(self, samples: np.ndarray) -> None:
+        """Falls back to a growable chunk list once a segment outgrows the ring.
+
+        Args:
+            samples: The samples that would overwrite the current segment.
+        """
+        if not self._overflow:
+            self._overflow.append(
+                self._read(self._segment_start, self._write_pos).copy()
+            )
+        self._overflow.append(samples.copy())
+
+    def _read(self, start: int, end: int) -> np.ndarray:
+        """Reads an absolute sample range from the ring.
+
+        Args:
+            start: The absolute position of the first sample.
+            end: The absolute position one past the last sample.
+
+        Returns:
+            A view when the range is contiguous in the ring, otherwise a copy.
+        """
+        start = max(start, end - self.capacity)
+        if end <= start:
+            return self._data[:0]
+
+        start_idx = start % self.capacity
+        end_idx = start_idx + (end - start)
+        if end_idx <= self.capacity:
+            return self._data[start_idx:end_idx]
+        return np.concatenate(
+            (self._data[start_idx:], self._data[: end_idx - self.capacity])
+        )
+
+    def begin_segment(self, preroll_samples: int = 0) -> None:
+        """Starts a new segment, optionally including recently written samples.
+
+        Args:
+            preroll_samples: The number of already written samples to include.
+        """
+        self._overflow = []
+        self._segment_start = max(
+            0, self._write_pos - preroll_samples, self._write_pos - self.capacity
+        )
+        self._in_segment = True
+
+    def end_segment(self) -> SegmentRef:
+        """Stops the current segment without copying its samples.
+
+        This is cheap enough for the audio callback; the consumer copies the
+        samples out with `copy_segment`.
+
+        Returns:
+            A reference to the segment samples.
+        """
+        ref = SegmentRef(
+            self._segment_start if self._in_segment else self._write_pos,
+            self._write_pos,
+            self._overflow,
+        )
+        self._in_segment = False
+        self._overflow = []
+        return ref
+
+    def copy_segment(self, ref: SegmentRef) -> Optional[np.ndarray]:
+        """Copies a finished segment out of the ring.
+
+        The ring keeps being written while the copy is made, so the segment is
+        checked again afterwards in case the writer wrapped over it.
+
+        Args:
+            ref: The segment returned by `end_segment`.
+
+        Returns:
+            A copy of the segment samples, or None if they were overwritten.
+        """
+        if ref.overflow:
+            return np.concatenate(ref.overflow)
+        if self._write_pos - ref.start > self.capacity:
+            return None
+        samples = np.array(self._read(ref.start, ref.end))
+        if self._write_pos - ref.start > self.capacity:
+            return None
+        return samples
+
+    def segment(self) -> np.ndarray:
+        """Returns the samples written since the segment started.
+
+        The result is a zero-copy view into the ring whenever the segment has not
+        wrapped or overflowed. Views stay valid until the ring wraps over them.
+
+        Returns:
+            The segment samples as a float32 array.
+        """
+        if not self._in_segment:
+            return self._data[:0]
+        overflow = list(self._overflow)
+        if overflow:
+            return np.concatenate(overflow)
+        return self._read(self._segment_start, self._write_pos)
+
+    def latest(self, num_samples: int) -> np.ndarray:
+        """Returns the most recently written samples.
+
+        Args:
+            num_samples: The number of samples to return.
+
+        Returns:
+            Up to `num_samples` of the newest samples.
+        """
+        return self._read(self._write_pos - num_samples, self._write_pos)
+
+    @property
+    def segment_length(self) -> int:
+        """The number of samples in the current segment."""
+        if not self._in_segment:
+            return 0
+        return self._write_pos - self._segment_start
+
+    def reset(self) -> None:
+        """
+        Discards all buffered samples and any active segment.
+        """
+        self._write_pos = 0
+        self._segment_start = 0
+        self._in_segment = False
+        self._overflow = []
@@ -0,0 +1,412 @@
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Optional
+
+import numpy as np
+
+from audio_engine.capture_buffer import CaptureBuffer, SegmentRef
+from audio_engine.capture_events import CaptureEvents
+from audio_engine.echo_canceller import EchoCanceller
+from audio_engine.output_reference import OutputReference
+from audio_engine.vad import (
+    SPEECH_ABORT,
+    SPEECH_END,
+    SPEECH_START,
+    VoiceActivityDetector,
+)
+
+if TYPE_CHECKING:
+    import sounddevice as sd
+
+    from services.latency_tracer import LatencyTracer
+
+AUDIO_STATUS = 1
+SPEECH_ONSET = 2
+SPEECH_IGNORED = 3
+SPEECH_ENDED = 4
+SPEECH_DISCARDED = 5
+BARGE_IN = 6
+SPEECH_CUT_SHORT = 7
+
+
+class CaptureEngine:
+    """
+    Keeps the microphone open for the whole session and segments utterances.
+
+    Each captured block, echo-cancelled when possible, is also handed to
+    `on_audio` for consumers that stream the microphone elsewhere; those can
+    turn local utterance detection off with `segment_utterances=False`.
+
+    The audio callback neither prints, traces nor copies utterances: it posts
+    events to a preallocated queue that a reporting thread drains, and queues
+    references into the ring that consumers copy out.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        block_size: int = 1024,
+        threshold: float = 0.01,
+        silence_duration: float = 1.5,
+        preroll_duration: float = 0.3,
+        output_reference: Optional[OutputReference] = None,
+        barge_in_duration: float = 0.4,
+        tracer: Optional["LatencyTracer"] = None,
+        segment_utterances: bool = True,
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.preroll_samples = int(preroll_duration * sample_rate)
+        self.output_reference = output_reference
+        self.echo_canceller: Optional[EchoCanceller] = None
+        if output_reference is not None:
+            self.echo_canceller = EchoCanceller(block_size=block_size)
+        self.barge_in_blocks = max(1, int(barge_in_duration * sample_rate / block_size))
+        self.on_barge_in: Optional[Callable[[], None]] = None
+        self.on_audio: Optional[Callable[[np.ndarray], None]] = None
+        self.segment_utterances = segment_utterances
+        self.tracer = tracer
+        self.last_speech_end: Optional[float] = None
+        self.vad = VoiceActivityDetector(
+            sample_rate=sample_rate,
+            min_threshold=threshold,
+            max_hangover=silence_duration,
+        )
+
+        self.capture_buffer = CaptureBuffer(sample_rate=sample_rate)
+        self.utterances: "queue.Queue[Optional[SegmentRef]]" = queue.Queue()
+        self.events = CaptureEvents()
+        self.is_recording: bool = False
+        self.muted: bool = False
+        self.paused: bool = False
+        self._segment_blocks: int = 0
+        self._segment_muted: bool = False
+        self._barge_in_sent: bool = False
+        self._barge_in_blocked: bool = False
+        self._finish_requested: bool = False
+        self.segments_cut_short: int = 0
+        self._stream: Optional["sd.InputStream"] = None
+        self._last_status = None
+        self._reporter: Optional[threading.Thread] = None
+        self._reporter_stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """
+        Opens the input stream if it is not already running.
+
+        sounddevice is imported here so the capture pipeline can be used
+        without PortAudio, e.g. in tests.
+        """
+        import sounddevice as sd
+
+        with self._lock:
+            if self._stream is not None:
+                return
+            self._stream = sd.InputStream(
+                samplerate=self.sample_rate,
+                channels=1,
+                callback=self._audio_callback,
+                dtype=np.float32,
+                blocksize=self.block_size,
+            )
+            self._stream.start()
+            self._reporter_stop.clear()
+            self._reporter = threading.Thread(
+                target=self._report_loop, name="capture-events", daemon=True
+            )
+            self._reporter.start()
+
+    def stop(self) -> None:
+        """
+        Closes the input stream and releases any waiting consumer.
+        """
+        with self._lock:
+            if self._stream is not None:
+                self._stream.stop()
+                self._stream.close()
+                self._stream = None
+            reporter, self._reporter = self._reporter, None
+        if reporter is not None:
+            self._reporter_stop.set()
+            reporter.join()
+        self._report_events()
+        self._abort_segment()
+        self.utterances.put(None)
+
+    def barge_in_enabled(self) -> bool:
+        """Checks whether speech is still detected while the assistant talks.
+
+        Returns:
+            True if echo cancellation and a barge-in handler are both set up.
+        """
+        return self.echo_canceller is not None and self.on_barge_in is not None
+
+    def set_muted(self, muted: bool) -> None:
+        """Mutes or unmutes utterance detection while keeping the stream open.
+
+        Without barge-in, muting discards any utterance in progress or not yet
+        consumed. With barge-in, detection keeps running on the echo-cancelled
+        signal and sustained speech raises `on_barge_in` instead.
+
+        Args:
+            muted: Whether the assistant is about to speak.
+        """
+        self.muted = muted
+        if self.barge_in_enabled():
+            return
+        self._abort_segment()
+        self._drain()
+        if muted:
+            self.utterances.put(None)
+
+    def set_paused(self, paused: bool) -> None:
+        """Stops or resumes utterance detection entirely, e.g. while the user
+        has paused the session. Unlike muting this also disables barge-in.
+
+        Args:
+            paused: Whether the session is paused.
+        """
+        self.paused = paused
+        self._abort_segment()
+        self._drain()
+        if paused:
+            self.utterances.put(None)
+
+    def get_utterance(self, timeout: Optional[float] = None) -> Optional[np.ndarray]:
+        """Blocks until the next complete utterance is available.
+
+        Args:
+            timeout: Optional maximum time to wait in seconds.
+
+        Returns:
+            The utterance samples, or None if detection was interrupted.
+        """
+        try:
+            ref = self.utterances.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        return self.read_utterance(ref)
+
+    def read_utterance(self, ref: Optional[SegmentRef]) -> Optional[np.ndarray]:
+        """Copies a queued utterance out of the capture ring.
+
+        Args:
+            ref: An item taken from `utterances`.
+
+        Returns:
+            The utterance samples, or None if detection was interrupted or the
+            ring was overwritten before the utterance was read.
+        """
+        if ref is None:
+            return None
+        copy_start = time.perf_counter()
+        utterance = self.capture_buffer.copy_segment(ref)
+        if utterance is None:
+            print("Utterance was overwritten before it could be read, dropping it")
+            return None
+        if self.tracer is not None:
+            self.tracer.record(
+                "capture_finalisation",
+                copy_start,
+                time.perf_counter(),
+                samples=len(utterance),
+            )
+        return utterance
+
+    def current_segment(self) -> Optional[np.ndarray]:
+        """Returns the utterance recorded so far without copying it.
+
+        Returns:
+            A view of the in-progress utterance, or None if not recording.
+        """
+        if not self.is_recording:
+            return None
+        return self.capture_buffer.segment()
+
+    def trailing_silence(self) -> float:
+        """Returns how long the utterance being recorded has been silent.
+
+        Returns:
+            The silence in seconds, 0 if not recording.
+        """
+        if not self.is_recording:
+            return 0.0
+        return self.vad.trailing_silence()
+
+    def finish_segment(self) -> None:
+        """
+        Asks the audio callback to end the utterance being recorded on its
+        next block, without waiting for the full end-of-speech silence. Used
+        once the utterance is known to be a complete command. The request is
+        dropped if speech resumed meanwhile; `segments_cut_short` counts the
+        ones that took effect.
+        """
+        self._finish_requested = self.is_recording
+
+    def _drain(self) -> None:
+        """
+        Drops utterances that have not been consumed yet.
+        """
+        while True:
+            try:
+                self.utterances.get_nowait()
+            except queue.Empty:
+                return
+
+    def _abort_segment(self) -> None:
+        """
+        Abandons the utterance currently being recorded.
+        """
+        if self.is_recording:
+            self.is_recording = False
+            self.capture_buffer.end_segment()
+        self.vad.reset()
+
+    def _cancel_echo(self, samples: np.ndarray, frames: int, time_info) -> np.ndarray:
+        """Subtracts the predicted loudspeaker echo from a captured block.
+
+        Args:
+            samples: The captured block.
+            frames: The number of frames in the block.
+            time_info: PortAudio timing information for the block.
+
+        Returns:
+            The echo-cancelled block.
+        """
+        input_latency = frames / self.sample_rate
+        if time_info is not None:
+            reported = time_info.currentTime - time_info.inputBufferAdcTime
+            if 0 < reported < 1:
+                input_latency = reported
+        capture_time = time.monotonic() - input_latency
+        reference = self.output_reference.render(capture_time, frames)
+        return self.echo_canceller.process(samples, reference)
+
+    def _report_loop(self) -> None:
+        """
+        Reports capture events while the stream is open.
+        """
+        while not self._reporter_stop.wait(0.05):
+            self._report_events()
+
+    def _report_events(self) -> None:
+        """
+        Prints and traces the events posted by the audio callback.
+        """
+        for kind, at, value in self.events.drain():
+            if kind == AUDIO_STATUS:
+                print(f"Audio status: {self._last_status}")
+            elif kind == SPEECH_ONSET:
+                print("Voice detected, starting recording...")
+                if self.tracer is not None:
+                    self.tracer.mark("speech_onset", at=at, muted=bool(value))
+            elif kind == SPEECH_IGNORED:
+                print("Ignoring speech heard while the assistant was talking...")
+            elif kind == SPEECH_ENDED:
+                print(
+                    f"End of speech detected after {(value - at) * 1000:.0f} ms "
+                    f"(confidence {self.vad.last_end_confidence:.2f}, "
+                    f"mean {(self.vad.mean_end_latency or 0.0) * 1000:.0f} ms)"
+                )
+                print("Silence detected, stopping recording...")
+                if self.tracer is not None:
+                    self.tracer.mark("speech_end", at=at)
+                    self.tracer.record("end_of_speech_detection", at, value)
+            elif kind == SPEECH_CUT_SHORT:
+                print("Command recognised, stopping recording early...")
+                if self.tracer is not None:
+                    self.tracer.mark("speech_end", at=at)
+                    self.tracer.record("end_of_speech_detection", at, value)
+            elif kind == SPEECH_DISCARDED:
+                print("Steady noise detected, discarding recording...")
+            elif kind == BARGE_IN:
+                print("Barge-in detected, interrupting the assistant...")
+
+    def _audio_callback(self, indata, frames, time_info, status) -> None:
+        """Writes each block into the ring and tracks voice activity.
+
+        Args:
+            indata: The captured float32 block, shaped (frames, 1).
+            frames: The number of frames in the block.
+            time_info: PortAudio timing information for the block.
+            status: PortAudio status flags for the block.
+        """
+        if status:
+            self._last_status = status
+            self.events.post(AUDIO_STATUS)
+
+        samples = indata[:, 0]
+        if self.echo_canceller is not None and frames == self.block_size:
+            samples = self._cancel_echo(samples, frames, time_info)
+        self.capture_buffer.write(samples)
+        if self.on_audio is not None:
+            self.on_audio(samples)
+
+        if (
+            not self.segment_utterances
+            or self.paused
+            or (self.muted and not self.barge_in_enabled())
+        ):
+            return
+
+        event = self.vad.process(samples)
+        if event == SPEECH_START:
+            onset = time.perf_counter() - self.vad.onset_blocks * frames / (
+                self.sample_rate
+            )
+            self.events.post(SPEECH_ONSET, onset, self.muted)
+            self.is_recording = True
+            self._segment_blocks = 0
+            self._segment_muted = self.muted
+            self._barge_in_sent = False
+            self._finish_requested = False
+            self._barge_in_blocked = (
+                self.echo_canceller is not None
+                and not self.echo_canceller.is_warmed_up()
+            )
+            self.capture_buffer.begin_segment(
+                self.preroll_samples + self.vad.onset_blocks * frames
+            )
+        elif event == SPEECH_END and self.is_recording:
+            self.is_recording = False
+            if (self.muted or self._segment_muted) and not self._barge_in_sent:
+                self.events.post(SPEECH_IGNORED)
+                self.capture_buffer.end_segment()
+            else:
+                now = time.perf_counter()
+                self.last_speech_end = now - (self.vad.last_end_latency or 0.0)
+                self.events.post(SPEECH_ENDED, self.last_speech_end, now)
+                self.utterances.put(self.capture_buffer.end_segment())
+        elif event == SPEECH_ABORT and self.is_recording:
+            self.events.post(SPEECH_DISCARDED)
+            self.is_recording = False
+            self.capture_buffer.end_segment()
+
+        if self._finish_requested:
+            self._finish_requested = False
+            if (
+                self.is_recording
+                and self.vad.trailing_silence() > 0
+                and (self._barge_in_sent or not (self.muted or self._segment_muted))
+            ):
+                now = time.perf_counter()
+                self.last_speech_end = now - self.vad.trailing_silence()
+                self.events.post(SPEECH_CUT_SHORT, self.last_speech_end, now)
+                self.is_recording = False
+                self.vad.reset()
+                self.segments_cut_short += 1
+                self.utterances.put(self.capture_buffer.end_segment())
+
+        if self.is_recording:
+            self._segment_blocks += 1
+            if (
+                self.muted
+                and not self._barge_in_sent
+                and not self._barge_in_blocked
+                and self._segment_blocks >= self.barge_in_blocks
+            ):
+                self._barge_in_sent = True
+                self.events.post(BARGE_IN)
+                self.on_barge_in()
@@ -0,0 +1,50 @@
+from typing import Iterator, Tuple
+
+import numpy as np
+
+
+class CaptureEvents:
+    """
+    A preallocated single-producer queue of capture events.
+
+    The audio callback posts events into fixed slots instead of printing or
+    tracing itself; another thread drains them. If the reader falls a full
+    ring behind, the oldest events are dropped.
+    """
+
+    def __init__(self, capacity: int = 64) -> None:
+        self.capacity = capacity
+        self._kinds = np.zeros(capacity, dtype=np.int8)
+        self._times = np.zeros(capacity, dtype=np.float64)
+        self._values = np.zeros(capacity, dtype=np.float64)
+        self._head: int = 0
+        self._tail: int = 0
+
+    def post(self, kind: int, at: float = 0.0, value: float = 0.0) -> None:
+        """Stores an event in the next slot without allocating.
+
+        Args:
+            kind: The event kind, defined by the producer.
+            at: When it happened, from `time.perf_counter()`.
+            value: An extra number stored with the event.
+        """
+        slot = self._head % self.capacity
+        self._kinds[slot] = kind
+        self._times[slot] = at
+        self._values[slot] = value
+        self._head += 1
+
+    def drain(self) -> Iterator[Tuple[int, float, float]]:
+        """Yields the events posted since the last drain.
+
+        Yields:
+            (kind, at, value) tuples in posting order.
+        """
+        head = self._head
+        tail = max(self._tail, head - self.capacity)
+        for position in range(tail, head):
+            slot = position % self.capacity
+            yield int(self._kinds[slot]), float(self._times[slot]), float(
+                self._values[slot]
+            )
+        self._tail = head
@@ -0,0 +1,139 @@
+import numpy as np
+
+
+class EchoCanceller:
+    """
+    Partitioned-block frequency-domain NLMS acoustic echo canceller.
+    """
+
+    def __init__(
+        self,
+        block_size: int = 1024,
+        num_partitions: int = 4,
+        step_size: float = 0.5,
+        power_smoothing: float = 0.9,
+        regularization: float = 1e-6,
+        double_talk_margin_db: float = 10.0,
+        converged_erle_db: float = 10.0,
+        warmup_blocks: int = 24,
+    ) -> None:
+        self.block_size = block_size
+        self.num_partitions = num_partitions
+        self.step_size = step_size
+        self.power_smoothing = power_smoothing
+        self.regularization = regularization
+        self.double_talk_margin_db = double_talk_margin_db
+        self.converged_erle_db = converged_erle_db
+        self.warmup_blocks = warmup_blocks
+
+        bins = block_size + 1
+        self._weights = np.zeros((num_partitions, bins), dtype=np.complex128)
+        self._ref_spectra = np.zeros((num_partitions, bins), dtype=np.complex128)
+        self._ref_frame = np.zeros(2 * block_size, dtype=np.float64)
+        self._err_frame = np.zeros(2 * block_size, dtype=np.float64)
+        self._power = np.full(bins, regularization, dtype=np.float64)
+        self._residual = np.zeros(block_size, dtype=np.float32)
+
+        # Work buffers so processing a block does not allocate, since it runs
+        # in the audio callback.
+        self._echo_spectrum = np.zeros(bins, dtype=np.complex128)
+        self._echo_frame = np.zeros(2 * block_size, dtype=np.float64)
+        self._error_spectrum = np.zeros(bins, dtype=np.complex128)
+        self._bin_scratch = np.zeros(bins, dtype=np.float64)
+        self._gradient_spectra = np.zeros((num_partitions, bins), dtype=np.complex128)
+        self._gradient = np.zeros((num_partitions, 2 * block_size), dtype=np.float64)
+
+        self.erle_db: float = 0.0
+        self.double_talk: bool = False
+        self.adapted_blocks: int = 0
+
+    def reset(self) -> None:
+        """
+        Forgets the learned echo path and reference history.
+        """
+        self._weights[:] = 0
+        self._ref_spectra[:] = 0
+        self._ref_frame[:] = 0
+        self._power[:] = self.regularization
+        self.erle_db = 0.0
+        self.double_talk = False
+        self.adapted_blocks = 0
+
+    def is_warmed_up(self) -> bool:
+        """Checks whether the filter has adapted on enough far-end audio.
+
+        Before that, residual echo can look like near-end speech.
+
+        Returns:
+            True once `warmup_blocks` blocks with an active reference were seen.
+        """
+        return self.adapted_blocks >= self.warmup_blocks
+
+    def process(self, mic: np.ndarray, reference: np.ndarray) -> np.ndarray:
+        """Removes the echo of the reference signal from one microphone block.
+
+        Args:
+            mic: The captured block, `block_size` float32 samples.
+            reference: The loudspeaker signal aligned to the same block.
+
+        Returns:
+            The echo-cancelled block. The array is reused on the next call.
+        """
+        size = self.block_size
+        self._ref_frame[:size] = self._ref_frame[size:]
+        self._ref_frame[size:] = reference
+
+        for partition in range(self.num_partitions - 1, 0, -1):
+            self._ref_spectra[partition] = self._ref_spectra[partition - 1]
+        np.fft.rfft(self._ref_frame, out=self._ref_spectra[0])
+
+        np.einsum("pk,pk->k", self._weights, self._ref_spectra, out=self._echo_spectrum)
+        np.fft.irfft(self._echo_spectrum, out=self._echo_frame)
+        residual = self._err_frame[size:]
+        np.subtract(mic, self._echo_frame[size:], out=residual)
+
+        mic_energy = float(np.dot(mic, mic)) + 1e-12
+        residual_energy = float(np.dot(residual, residual)) + 1e-12
+        ref_energy = float(np.dot(reference, reference))
+        block_erle = 10 * np.log10(mic_energy / residual_energy)
+
+        converged = self.erle_db > self.converged_erle_db
+        self.double_talk = (
+            converged and block_erle < self.erle_db - self.double_talk_margin_db
+        )
+
+        if ref_energy > self.regularization and not self.double_talk:
+            self.erle_db += 0.1 * (block_erle - self.erle_db)
+            self.adapted_blocks += 1
+            self._adapt()
+
+        self._residual[:] = residual
+        return self._residual
+
+    def _adapt(self) -> None:
+        """
+        Applies one constrained NLMS update to every filter partition, using
+        the residual of the current block held in the error frame.
+        """
+        size = self.block_size
+        current = self._ref_spectra[0]
+        scratch = self._bin_scratch
+        np.abs(current, out=scratch)
+        np.square(scratch, out=scratch)
+        scratch *= 1 - self.power_smoothing
+        self._power *= self.power_smoothing
+        self._power += scratch
+
+        error_spectrum = self._error_spectrum
+        np.fft.rfft(self._err_frame, out=error_spectrum)
+        np.multiply(self._power, self.num_partitions, out=scratch)
+        scratch += self.regularization
+        error_spectrum /= scratch
+        error_spectrum *= self.step_size
+
+        np.conjugate(self._ref_spectra, out=self._gradient_spectra)
+        self._gradient_spectra *= error_spectrum
+        np.fft.irfft(self._gradient_spectra, axis=1, out=self._gradient)
+        self._gradient[:, size:] = 0
+        np.fft.rfft(self._gradient, axis=1, out=self._gradient_spectra)
+        self._weights += self._gradient_spectra
@@ -0,0 +1,138 @@
+import threading
+from typing import Any, Dict, List
+
+import numpy as np
+import pygame
+
+
+class OutputReference:
+    """
+    Reconstructs the mixer output at the capture rate for echo cancellation.
+    """
+
+    def __init__(
+        self,
+        capture_rate: int = 16000,
+        output_latency: float = 0.0,
+        max_block: int = 4096,
+    ) -> None:
+        self.capture_rate = capture_rate
+        self.output_latency = output_latency
+        self._entries: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._block = np.zeros(max_block, dtype=np.float32)
+        self._scratch = np.zeros(max_block, dtype=np.float32)
+
+    def register(
+        self,
+        channel: pygame.mixer.Channel,
+        sound: pygame.mixer.Sound,
+        audio: np.ndarray,
+        source_rate: int,
+        start_time: float,
+        loops: int = 0,
+    ) -> None:
+        """Records a sound handed to the mixer so its echo can be predicted.
+
+        Args:
+            channel: The channel the sound plays on.
+            sound: The pygame sound, used to tell when it is no longer playing.
+            audio: The float samples of the sound in [-1, 1], mono or stereo.
+            source_rate: The sample rate of the samples.
+            start_time: Monotonic time at which the mixer starts the sound.
+            loops: Extra repeats, or -1 to loop forever.
+        """
+        mono = audio.mean(axis=1) if audio.ndim > 1 else audio
+        if source_rate != self.capture_rate and len(mono) > 1:
+            target_length = int(len(mono) * self.capture_rate / source_rate)
+            mono = np.interp(
+                np.linspace(0, len(mono) - 1, target_length),
+                np.arange(len(mono)),
+                mono,
+            )
+        entry = {
+            "channel": channel,
+            "sound": sound,
+            "samples": np.ascontiguousarray(mono, dtype=np.float32),
+            "start": start_time,
+            "loops": loops,
+        }
+        with self._lock:
+            self._entries = [
+                e
+                for e in self._entries
+                if e["channel"] is not channel or e["sound"] is not sound
+            ]
+            self._entries.append(entry)
+
+    def render(self, capture_time: float, num_samples: int) -> np.ndarray:
+        """Mixes the reference signal heard by the microphone at a capture time.
+
+        Args:
+            capture_time: Monotonic time of the first captured sample.
+            num_samples: The number of samples in the capture block.
+
+        Returns:
+            The reference block. The array is reused on the next call.
+        """
+        block = self._block[:num_samples]
+        block[:] = 0
+        play_time = capture_time - self.output_latency
+
+        with self._lock:
+            entries = list(self._entries)
+
+        expired = set()
+        for entry in entries:
+            channel = entry["channel"]
+            sound = entry["sound"]
+            if sound is not channel.get_sound() and sound is not channel.get_queue():
+                if play_time > entry["start"]:
+                    expired.add(id(entry))
+                continue
+            self._mix_entry(entry, play_time, block)
+
+        if expired:
+            with self._lock:
+                self._entries = [e for e in self._entries if id(e) not in expired]
+        return block
+
+    def _mix_entry(
+        self, entry: Dict[str, Any], play_time: float, block: np.ndarray
+    ) -> None:
+        """Adds the part of one sound that overlaps a block.
+
+        Args:
+            entry: The registered sound.
+            play_time: Monotonic time of the block start at the mixer.
+            block: The block to mix into.
+        """
+        samples = entry["samples"]
+        length = len(samples)
+        if length == 0:
+            return
+        volume = entry["channel"].get_volume()
+        position = int(round((play_time - entry["start"]) * self.capture_rate))
+        end_position = None if entry["loops"] < 0 else length * (entry["loops"] + 1)
+
+        written = 0
+        while written < len(block):
+            current = position + written
+            if current < 0:
+                written = min(len(block), -position)
+                continue
+            if end_position is not None and current >= end_position:
+                break
+            offset = current % length
+            take = min(len(block) - written, length - offset)
+            scratch = self._scratch[:take]
+            np.multiply(samples[offset : offset + take], volume, out=scratch)
+            block[written : written + take] += scratch
+            written += take
+
+    def clear(self) -> None:
+        """
+        Forgets every registered sound.
+        """
+        with self._lock:
+            self._entries = []
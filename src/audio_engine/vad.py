@@ -0,0 +1,234 @@
+from typing import Optional
+
+import numpy as np
+
+SPEECH_START = "speech_start"
+SPEECH_END = "speech_end"
+SPEECH_ABORT = "speech_abort"
+
+
+class VoiceActivityDetector:
+    """
+    Block-level voice activity detection with an adaptive noise floor.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        min_threshold: float = 0.01,
+        onset_snr_db: float = 9.0,
+        confident_snr_db: float = 24.0,
+        max_zero_crossing_rate: float = 0.35,
+        onset_blocks: int = 2,
+        min_hangover: float = 0.5,
+        max_hangover: float = 1.5,
+        floor_rise: float = 0.02,
+        floor_fall: float = 0.3,
+        stationary_blocks: int = 16,
+        stationary_std_db: float = 3.0,
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.min_level_db = 20 * np.log10(min_threshold)
+        self.onset_snr_db = onset_snr_db
+        self.confident_snr_db = confident_snr_db
+        self.max_zero_crossing_rate = max_zero_crossing_rate
+        self.onset_blocks = onset_blocks
+        self.min_hangover = min_hangover
+        self.max_hangover = max_hangover
+        self.floor_rise = floor_rise
+        self.floor_fall = floor_fall
+        self.stationary_blocks = stationary_blocks
+        self.stationary_std_db = stationary_std_db
+
+        self.noise_floor_db: float = self.min_level_db - onset_snr_db
+        self.in_speech: bool = False
+        self.confidence: float = 0.0
+        self.last_end_latency: Optional[float] = None
+        self.last_end_confidence: float = 0.0
+        self.mean_end_latency: Optional[float] = None
+        self._end_count: int = 0
+        self._speech_run: int = 0
+        self._silent_samples: int = 0
+        self._snr_sum: float = 0.0
+        self._level_sum: float = 0.0
+        self._level_sq_sum: float = 0.0
+        self._utterance_blocks: int = 0
+        self._speech_blocks: int = 0
+        self._signs = np.zeros(0, dtype=bool)
+        self._crossings = np.zeros(0, dtype=bool)
+
+    def _zero_crossing_rate(self, samples: np.ndarray) -> float:
+        """Computes the zero-crossing rate of a block using scratch buffers.
+
+        Args:
+            samples: The float32 samples of one block.
+
+        Returns:
+            The fraction of adjacent sample pairs that change sign.
+        """
+        n = samples.shape[0]
+        if self._signs.shape[0] != n:
+            self._signs = np.zeros(n, dtype=bool)
+            self._crossings = np.zeros(max(n - 1, 0), dtype=bool)
+        if n < 2:
+            return 0.0
+        np.signbit(samples, out=self._signs)
+        np.not_equal(self._signs[1:], self._signs[:-1], out=self._crossings)
+        return np.count_nonzero(self._crossings) / (n - 1)
+
+    def trailing_silence(self) -> float:
+        """Returns how long the current utterance has been silent.
+
+        Returns:
+            The silence since the last speech block in seconds, 0 outside speech.
+        """
+        if not self.in_speech:
+            return 0.0
+        return self._silent_samples / self.sample_rate
+
+    def hangover(self) -> float:
+        """Returns the end-of-speech timeout for the current utterance.
+
+        Confident, clearly voiced utterances end sooner than marginal ones.
+
+        Returns:
+            The silence duration in seconds that ends the utterance.
+        """
+        return self.max_hangover - self.confidence * (
+            self.max_hangover - self.min_hangover
+        )
+
+    def process(self, samples: np.ndarray) -> Optional[str]:
+        """Classifies one block and advances the detector state.
+
+        Args:
+            samples: The float32 mono samples of one block.
+
+        Returns:
+            SPEECH_START, SPEECH_END or SPEECH_ABORT when a transition happens,
+            otherwise None.
+        """
+        n = samples.shape[0]
+        if n == 0:
+            return None
+
+        level_db = 10 * np.log10(np.dot(samples, samples) / n + 1e-12)
+        snr_db = level_db - self.noise_floor_db
+        zcr = self._zero_crossing_rate(samples)
+        is_speech = (
+            level_db > self.min_level_db
+            and snr_db > self.onset_snr_db
+            and zcr < self.max_zero_crossing_rate
+        )
+
+        if is_speech:
+            rate = self.floor_rise * 0.25
+        elif level_db < self.noise_floor_db:
+            rate = self.floor_fall
+        else:
+            rate = self.floor_rise
+        self.noise_floor_db += rate * (level_db - self.noise_floor_db)
+
+        if not self.in_speech:
+            self._speech_run = self._speech_run + 1 if is_speech else 0
+            if self._speech_run >= self.onset_blocks:
+                self.in_speech = True
+                self._silent_samples = 0
+                self._snr_sum = 0.0
+                self._level_sum = 0.0
+                self._level_sq_sum = 0.0
+                self._utterance_blocks = 0
+                self._speech_blocks = 0
+                self._record_level(level_db)
+                self._record_speech(snr_db)
+                return SPEECH_START
+            return None
+
+        self._record_level(level_db)
+        if self._is_stationary():
+            self.noise_floor_db = self._level_sum / self._utterance_blocks
+            self.reset()
+            return SPEECH_ABORT
+
+        if is_speech:
+            self._silent_samples = 0
+            self._record_speech(snr_db)
+            return None
+
+        self._silent_samples += n
+        if self._silent_samples >= self.hangover() * self.sample_rate:
+            self._finish_utterance()
+            return SPEECH_END
+        return None
+
+    def _record_level(self, level_db: float) -> None:
+        """Accumulates level statistics for every block of an utterance.
+
+        Args:
+            level_db: The block level in dBFS.
+        """
+        self._level_sum += level_db
+        self._level_sq_sum += level_db * level_db
+        self._utterance_blocks += 1
+
+    def _record_speech(self, snr_db: float) -> None:
+        """Accumulates confidence evidence from a speech block.
+
+        Args:
+            snr_db: The block level above the noise floor in dB.
+        """
+        self._snr_sum += snr_db
+        self._speech_blocks += 1
+        mean_snr = self._snr_sum / self._speech_blocks
+        snr_confidence = (mean_snr - self.onset_snr_db) / (
+            self.confident_snr_db - self.onset_snr_db
+        )
+        duration_confidence = self._speech_blocks / (self.onset_blocks * 4)
+        self.confidence = float(
+            np.clip(min(snr_confidence, duration_confidence), 0.0, 1.0)
+        )
+
+    def _is_stationary(self) -> bool:
+        """Checks whether a long "utterance" is really a steady noise onset.
+
+        Speech level swings by several dB between syllables, while hum, fans and
+        rumble stay nearly constant.
+
+        Returns:
+            True once enough blocks have been seen with a near-constant level.
+        """
+        if self._utterance_blocks != self.stationary_blocks:
+            return False
+        mean = self._level_sum / self._utterance_blocks
+        variance = self._level_sq_sum / self._utterance_blocks - mean * mean
+        return variance < self.stationary_std_db**2
+
+    def _finish_utterance(self) -> None:
+        """
+        Resets utterance state and records end-of-speech detection latency.
+
+        Latency is measured in captured audio, from the end of the last speech
+        block to the block that triggered the decision.
+        """
+        latency = self._silent_samples / self.sample_rate
+        self.last_end_latency = latency
+        self._end_count += 1
+        if self.mean_end_latency is None:
+            self.mean_end_latency = latency
+        else:
+            self.mean_end_latency += (latency - self.mean_end_latency) / self._end_count
+        self.last_end_confidence = self.confidence
+
+        self.in_speech = False
+        self.confidence = 0.0
+        self._speech_run = 0
+        self._silent_samples = 0
+
+    def reset(self) -> None:
+        """
+        Abandons the current utterance while keeping the noise floor estimate.
+        """
+        self.in_speech = False
+        self.confidence = 0.0
+        self._speech_run = 0
+        self._silent_samples = 0
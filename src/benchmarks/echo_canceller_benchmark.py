@@ -0,0 +1,241 @@
+import argparse
+import glob
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import soundfile as sf
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SRC_DIR not in sys.path:
+    sys.path.append(SRC_DIR)
+
+from audio_engine.echo_canceller import EchoCanceller
+from audio_engine.vad import SPEECH_START, VoiceActivityDetector
+
+SAMPLE_RATE = 16000
+BLOCK_SIZE = 1024
+
+
+def _speech_like(duration: float, rng: np.random.Generator) -> np.ndarray:
+    """Generates band-limited noise with a syllable-rate envelope.
+
+    Args:
+        duration: The length in seconds.
+        rng: The random generator to draw from.
+
+    Returns:
+        The float32 samples.
+    """
+    length = int(duration * SAMPLE_RATE)
+    noise = np.convolve(rng.standard_normal(length), np.ones(8) / 8, "same")
+    envelope = np.abs(np.sin(np.arange(length) / SAMPLE_RATE * 3 * np.pi))
+    return (noise * envelope * 0.3).astype(np.float32)
+
+
+def synthetic_fixture(
+    seed: int = 0,
+) -> Tuple[np.ndarray, np.ndarray, Tuple[int, int]]:
+    """Builds a loopback pair with a simulated room and a double-talk section.
+
+    Args:
+        seed: Seed for the random generator.
+
+    Returns:
+        The microphone signal, the reference signal and the sample range in
+        which the near-end talker speaks.
+    """
+    rng = np.random.default_rng(seed)
+    reference = _speech_like(12.0, rng)
+
+    impulse = np.zeros(2400)
+    impulse[480] = 0.6
+    impulse[700] = -0.3
+    impulse[480:] += rng.standard_normal(1920) * np.exp(-np.arange(1920) / 300) * 0.1
+    echo = np.convolve(reference, impulse)[: len(reference)]
+
+    near_range = (8 * SAMPLE_RATE, 10 * SAMPLE_RATE)
+    near = np.zeros(len(reference))
+    near[near_range[0] : near_range[1]] = _speech_like(2.0, rng) * 0.5
+    noise = rng.standard_normal(len(reference)) * 0.001
+    return (echo + near + noise).astype(np.float32), reference, near_range
+
+
+def _near_range(near: np.ndarray, threshold: float = 1e-3) -> Optional[Tuple[int, int]]:
+    """Finds where the near-end talker speaks in a clean near-end track.
+
+    Args:
+        near: The near-end signal on its own.
+        threshold: The amplitude above which a sample counts as speech.
+
+    Returns:
+        The sample range from the first to the last loud sample, or None.
+    """
+    loud = np.flatnonzero(np.abs(near) > threshold)
+    if loud.size == 0:
+        return None
+    return int(loud[0]), int(loud[-1]) + 1
+
+
+def load_fixtures(
+    directory: str,
+) -> List[Tuple[str, np.ndarray, np.ndarray, Optional[Tuple[int, int]]]]:
+    """Loads recorded `<name>_mic.wav` / `<name>_ref.wav` pairs.
+
+    An optional `<name>_near.wav` with the near-end talker on its own marks
+    the double-talk section.
+
+    Args:
+        directory: The directory containing the fixtures.
+
+    Returns:
+        A list of (name, microphone, reference, near range) tuples at the
+        capture rate, the near range being None without a near-end track.
+    """
+    fixtures = []
+    for mic_path in sorted(glob.glob(os.path.join(directory, "*_mic.wav"))):
+        name = os.path.basename(mic_path)[: -len("_mic.wav")]
+        ref_path = os.path.join(directory, f"{name}_ref.wav")
+        if not os.path.exists(ref_path):
+            continue
+        mic, mic_rate = sf.read(mic_path, dtype="float32")
+        reference, ref_rate = sf.read(ref_path, dtype="float32")
+        if mic_rate != SAMPLE_RATE or ref_rate != SAMPLE_RATE:
+            print(f"Skipping {name}: fixtures must be {SAMPLE_RATE} Hz")
+            continue
+        mic = mic.mean(axis=1) if mic.ndim > 1 else mic
+        reference = reference.mean(axis=1) if reference.ndim > 1 else reference
+        length = min(len(mic), len(reference))
+        near_range = None
+        near_path = os.path.join(directory, f"{name}_near.wav")
+        if os.path.exists(near_path):
+            near, _ = sf.read(near_path, dtype="float32")
+            near_range = _near_range(near[:length])
+        fixtures.append((name, mic[:length], reference[:length], near_range))
+    return fixtures
+
+
+def record_fixture(directory: str, name: str, duration: float) -> None:
+    """Plays a reference signal through the speakers while recording the mic.
+
+    Args:
+        directory: The directory to write the fixture pair to.
+        name: The fixture name.
+        duration: The length of the recording in seconds.
+    """
+    import sounddevice as sd
+
+    reference = _speech_like(duration, np.random.default_rng())
+    mic = sd.playrec(reference, samplerate=SAMPLE_RATE, channels=1, blocking=True)
+    os.makedirs(directory, exist_ok=True)
+    sf.write(os.path.join(directory, f"{name}_ref.wav"), reference, SAMPLE_RATE)
+    sf.write(os.path.join(directory, f"{name}_mic.wav"), mic[:, 0], SAMPLE_RATE)
+    print(f"Recorded fixture '{name}' to {directory}")
+
+
+def run_fixture(
+    name: str,
+    mic: np.ndarray,
+    reference: np.ndarray,
+    near_range: Optional[Tuple[int, int]] = None,
+) -> Dict[str, Union[str, float, int]]:
+    """Runs the canceller block by block over one fixture.
+
+    Args:
+        name: The fixture name.
+        mic: The recorded microphone signal.
+        reference: The loudspeaker signal.
+        near_range: Optional sample range with near-end speech, excluded from
+            the ERLE and false barge-in counts.
+
+    Returns:
+        A dictionary with ERLE, convergence time, CPU cost and VAD triggers.
+    """
+    canceller = EchoCanceller(block_size=BLOCK_SIZE)
+    vad = VoiceActivityDetector(sample_rate=SAMPLE_RATE)
+    residual = np.zeros_like(mic)
+    block_times: List[float] = []
+    converged_at: Optional[float] = None
+    false_starts = 0
+    near_starts = 0
+
+    for start in range(0, len(mic) - BLOCK_SIZE + 1, BLOCK_SIZE):
+        end = start + BLOCK_SIZE
+        block_start = time.perf_counter()
+        residual[start:end] = canceller.process(mic[start:end], reference[start:end])
+        block_times.append(time.perf_counter() - block_start)
+
+        if converged_at is None and canceller.erle_db > canceller.converged_erle_db:
+            converged_at = start / SAMPLE_RATE
+
+        event = vad.process(residual[start:end])
+        if event == SPEECH_START and canceller.is_warmed_up():
+            if near_range and start < near_range[1] and end > near_range[0]:
+                near_starts += 1
+            else:
+                false_starts += 1
+
+    echo_only = np.ones(len(mic), dtype=bool)
+    if near_range:
+        echo_only[near_range[0] : near_range[1]] = False
+    erle = 10 * np.log10(
+        (np.sum(mic[echo_only] ** 2) + 1e-12)
+        / (np.sum(residual[echo_only] ** 2) + 1e-12)
+    )
+
+    block_period = BLOCK_SIZE / SAMPLE_RATE
+    return {
+        "fixture": name,
+        "erle_db": erle,
+        "converged_s": converged_at if converged_at is not None else float("nan"),
+        "mean_block_ms": float(np.mean(block_times)) * 1000,
+        "max_block_ms": float(np.max(block_times)) * 1000,
+        "cpu_share": float(np.mean(block_times)) / block_period,
+        "false_barge_ins": false_starts,
+        "near_end_detected": near_starts,
+    }
+
+
+def main(fixture_dir: Optional[str] = None) -> None:
+    """Benchmarks the echo canceller on recorded or synthetic fixtures.
+
+    Record fixtures with `--record` on the target hardware. Without a
+    fixture directory only the synthetic room is measured.
+
+    Args:
+        fixture_dir: Directory with recorded loopback pairs, synthetic when omitted.
+    """
+    results = []
+    if fixture_dir:
+        for name, mic, reference, near_range in load_fixtures(fixture_dir):
+            results.append(run_fixture(name, mic, reference, near_range))
+    if not results:
+        mic, reference, near_range = synthetic_fixture()
+        results.append(run_fixture("synthetic", mic, reference, near_range))
+
+    print(
+        f"{'fixture':<16}{'ERLE dB':>10}{'conv s':>10}{'mean ms':>10}"
+        f"{'max ms':>10}{'CPU %':>8}{'false':>8}{'near':>8}"
+    )
+    for result in results:
+        print(
+            f"{result['fixture']:<16}{result['erle_db']:>10.1f}"
+            f"{result['converged_s']:>10.2f}{result['mean_block_ms']:>10.2f}"
+            f"{result['max_block_ms']:>10.2f}{result['cpu_share'] * 100:>8.1f}"
+            f"{result['false_barge_ins']:>8}{result['near_end_detected']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure echo cancellation and CPU cost on loopback fixtures."
+    )
+    parser.add_argument("--fixtures", help="directory of *_mic.wav/*_ref.wav pairs")
+    parser.add_argument("--record", help="record a new fixture with this name")
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+    if args.record:
+        record_fixture(args.fixtures or "fixtures", args.record, args.duration)
+    main(args.fixtures)
@@ -0,0 +1,287 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+import numpy as np
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SRC_DIR not in sys.path:
+    sys.path.append(SRC_DIR)
+
+from google.genai import types
+
+from audio_engine.vad import SPEECH_END, VoiceActivityDetector
+from benchmarks.turn_latency_benchmark import USER_TEXT, TurnTimer
+from managers.state_manager import StateManager
+from managers.tool_register import ToolRegister
+from services.gemini_service import GeminiService
+from services.live_engine import INPUT_SAMPLE_RATE, LiveSession, to_pcm16
+from services.live_stand_in import LiveStandIn
+from services.llm_backend import FakeBackend
+
+BLOCK_SIZE = 1024
+REPLY = {
+    "text": "Great job, that was exactly right. Now I will add a second "
+    "speaker in the background, so listen carefully."
+}
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    """Returns a nearest-rank percentile.
+
+    Args:
+        values: The samples.
+        fraction: The percentile as a fraction, e.g. 0.95.
+
+    Returns:
+        The percentile value.
+    """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def synthetic_utterance(
+    duration: float = 2.0, lead: float = 0.5, tail: float = 3.0, seed: int = 0
+) -> List[np.ndarray]:
+    """Builds a spoken turn as microphone blocks.
+
+    Args:
+        duration: The length of the speech in seconds.
+        lead: Quiet before the speech, for the noise floor to settle.
+        tail: Quiet after the speech.
+        seed: Seed for the random generator.
+
+    Returns:
+        The float32 blocks; the speech ends with the last block before
+        `tail` begins.
+    """
+    rng = np.random.default_rng(seed)
+    length = int(duration * INPUT_SAMPLE_RATE)
+    noise = np.convolve(rng.standard_normal(length), np.ones(8) / 8, "same")
+    envelope = np.abs(np.sin(np.arange(length) / INPUT_SAMPLE_RATE * 3 * np.pi))
+    speech = noise * envelope * 0.3
+
+    lead_blocks = int(lead * INPUT_SAMPLE_RATE / BLOCK_SIZE)
+    speech_blocks = length // BLOCK_SIZE
+    tail_blocks = int(tail * INPUT_SAMPLE_RATE / BLOCK_SIZE)
+    signal = np.concatenate(
+        [
+            np.zeros(lead_blocks * BLOCK_SIZE),
+            speech[: speech_blocks * BLOCK_SIZE],
+            np.zeros(tail_blocks * BLOCK_SIZE),
+        ]
+    )
+    signal += rng.standard_normal(len(signal)) * 0.0005
+    return list(signal.astype(np.float32).reshape(-1, BLOCK_SIZE))
+
+
+def speech_end_block(blocks: List[np.ndarray], threshold: float = 0.01) -> int:
+    """Finds the last block of the speech.
+
+    Args:
+        blocks: The turn's blocks.
+        threshold: The RMS level counted as speech.
+
+    Returns:
+        int: The index of the last voiced block.
+    """
+    levels = [np.sqrt(np.mean(block**2)) for block in blocks]
+    return max(index for index, level in enumerate(levels) if level >= threshold)
+
+
+def classic_detection(blocks: List[np.ndarray]) -> float:
+    """Measures how long the capture VAD waits before ending the utterance.
+
+    Args:
+        blocks: The turn's blocks.
+
+    Returns:
+        float: The end-of-speech detection latency in ms.
+    """
+    vad = VoiceActivityDetector(sample_rate=INPUT_SAMPLE_RATE)
+    for block in blocks:
+        if vad.process(block) == SPEECH_END:
+            return vad.last_end_latency * 1000
+    raise RuntimeError("The utterance never ended; lengthen the tail")
+
+
+def classic_first_sentence(backend: FakeBackend, turns: int) -> List[float]:
+    """Measures time to the first speakable sentence from the streamed LLM.
+
+    Args:
+        backend: The scripted backend.
+        turns: The number of turns to run.
+
+    Returns:
+        List[float]: The first-sentence time of each turn in ms.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        state_manager = StateManager(os.path.join(directory, "progress.json"))
+        tools = ToolRegister(None, state_manager).get_tools()
+        gemini_service = GeminiService(state_manager, tools, backend=backend)
+        results = []
+        for _ in range(turns):
+            timer = TurnTimer()
+            for item in gemini_service.stream_with_gemini(USER_TEXT):
+                if not isinstance(item, types.FunctionCall):
+                    timer.feed(item)
+            results.append(timer.finish()["first_ms"])
+        gemini_service.close()
+    return results
+
+
+async def live_turn(session: LiveSession, blocks: List[np.ndarray]) -> float:
+    """Streams a turn in real time and times the first audio of the reply.
+
+    Args:
+        session: The open session.
+        blocks: The turn's blocks.
+
+    Returns:
+        float: Time from the end of speech to the first reply audio in ms.
+    """
+    loop = asyncio.get_running_loop()
+    first_audio: "asyncio.Future[float]" = loop.create_future()
+
+    async def receive() -> None:
+        async for message in session.receive():
+            content = message.server_content
+            if content is None:
+                continue
+            parts = content.model_turn.parts if content.model_turn else None
+            if parts and not first_audio.done():
+                first_audio.set_result(time.perf_counter())
+            if content.turn_complete:
+                return
+
+    receiver = asyncio.create_task(receive())
+    last_voiced = speech_end_block(blocks)
+    block_duration = BLOCK_SIZE / INPUT_SAMPLE_RATE
+    speech_end = next_send = time.perf_counter()
+    for index, block in enumerate(blocks):
+        if first_audio.done():
+            break
+        await asyncio.sleep(max(0.0, next_send - time.perf_counter()))
+        next_send += block_duration
+        await session.send_audio(to_pcm16(block))
+        if index == last_voiced:
+            speech_end = time.perf_counter()
+
+    await asyncio.wait_for(receiver, timeout=30)
+    if not first_audio.done():
+        raise RuntimeError("The stand-in never replied; lengthen the tail")
+    return (first_audio.result() - speech_end) * 1000
+
+
+async def live_turns(url: str, blocks: List[np.ndarray], turns: int) -> List[float]:
+    """Runs several turns over one Live session.
+
+    Args:
+        url: The websocket endpoint.
+        blocks: The turn's blocks.
+        turns: The number of turns to run.
+
+    Returns:
+        List[float]: The end-of-speech to first audio time of each turn in ms.
+    """
+    setup = types.LiveClientSetup(
+        model="models/stand-in",
+        generation_config=types.GenerationConfig(
+            response_modalities=[types.Modality.AUDIO]
+        ),
+    )
+    session = await LiveSession.connect(url, setup)
+    try:
+        return [await live_turn(session, blocks) for _ in range(turns)]
+    finally:
+        await session.close()
+
+
+def main(
+    turns: int = 5,
+    time_to_first_token: float = 0.3,
+    token_latency: float = 0.01,
+    live_time_to_first_token: Optional[float] = None,
+    silence_duration: float = 0.5,
+    stt: float = 0.25,
+    tts: float = 0.15,
+) -> None:
+    """Compares end of speech to first reply audio for both engines.
+
+    The classic figure adds the capture VAD's measured end-of-speech wait on
+    the synthetic turn, the given Whisper and Piper costs, and the measured
+    first-sentence time of the streamed LLM. The Live figure is measured
+    over a websocket to the local stand-in, whose server-side turn detection
+    waits `silence_duration`. Playback latency is left out of both.
+
+    Args:
+        turns: The number of turns per engine.
+        time_to_first_token: Simulated LLM delay before the first chunk.
+        token_latency: Simulated delay per generated word.
+        live_time_to_first_token: Simulated Live delay before the first
+            audio, `time_to_first_token` if omitted.
+        silence_duration: The quiet the stand-in waits for before replying.
+        stt: Assumed Whisper time for the final pass, in seconds.
+        tts: Assumed Piper time for the first sentence, in seconds.
+    """
+    if live_time_to_first_token is None:
+        live_time_to_first_token = time_to_first_token
+    blocks = synthetic_utterance(tail=silence_duration + 3.0)
+
+    detection = classic_detection(blocks)
+    backend = FakeBackend([REPLY], time_to_first_token, token_latency)
+    first_sentence = classic_first_sentence(backend, turns)
+    classic = [detection + stt * 1000 + first + tts * 1000 for first in first_sentence]
+
+    stand_in = LiveStandIn(
+        [REPLY],
+        time_to_first_token=live_time_to_first_token,
+        token_latency=token_latency,
+        silence_duration=silence_duration,
+    )
+    url = stand_in.start()
+    try:
+        live = asyncio.run(live_turns(url, blocks, turns))
+    finally:
+        stand_in.stop()
+
+    print(
+        f"Classic breakdown: end of speech {detection:.0f} ms, "
+        f"Whisper {stt * 1000:.0f} ms, first sentence "
+        f"{statistics.median(first_sentence):.0f} ms, Piper {tts * 1000:.0f} ms"
+    )
+    print(f"{'engine':<10}{'turns':>6}{'first audio p50':>17}{'first audio p95':>17}")
+    for name, results in (("classic", classic), ("live", live)):
+        print(
+            f"{name:<10}{len(results):>6}{statistics.median(results):>17.0f}"
+            f"{_percentile(results, 0.95):>17.0f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare end of speech to first reply audio for the classic "
+        "pipeline and the Live engine, offline."
+    )
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--ttft", type=float, default=0.3)
+    parser.add_argument("--token-latency", type=float, default=0.01)
+    parser.add_argument("--live-ttft", type=float, help="defaults to --ttft")
+    parser.add_argument("--silence", type=float, default=0.5)
+    parser.add_argument("--stt", type=float, default=0.25)
+    parser.add_argument("--tts", type=float, default=0.15)
+    args = parser.parse_args()
+    main(
+        args.turns,
+        args.ttft,
+        args.token_latency,
+        args.live_ttft,
+        args.silence,
+        args.stt,
+        args.tts,
+    )
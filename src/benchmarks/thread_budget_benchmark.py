@@ -0,0 +1,156 @@
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SRC_DIR not in sys.path:
+    sys.path.append(SRC_DIR)
+
+from managers.thread_budget import THREAD_PRESETS, ThreadBudget
+from services.model_loader import ModelLoader
+
+USER_TEXT = "I heard the rain on the left and a man talking on the right side."
+REPLY_TEXT = (
+    "Great job, that was exactly right. "
+    "Now I will add a second speaker in the background. "
+    "Listen carefully and tell me what the first speaker says."
+)
+OUTPUT_RATE = 24000
+OUTPUT_BLOCK = 512
+
+
+def _resample(audio: np.ndarray, source_rate: int, target_rate: int) -> np.ndarray:
+    """Resamples mono audio with linear interpolation.
+
+    Args:
+        audio: The mono samples to resample.
+        source_rate: The sample rate of the input.
+        target_rate: The desired sample rate.
+
+    Returns:
+        The resampled float32 samples.
+    """
+    target_length = int(len(audio) * target_rate / source_rate)
+    return np.interp(
+        np.linspace(0, len(audio) - 1, target_length),
+        np.arange(len(audio)),
+        audio,
+    ).astype(np.float32)
+
+
+def _audio_deadline_thread(stop_event: threading.Event, underruns: List[int]) -> None:
+    """Simulates the output mixer callback and counts missed deadlines.
+
+    Args:
+        stop_event: Event that ends the simulation.
+        underruns: Single-element list receiving the number of missed periods.
+    """
+    period = OUTPUT_BLOCK / OUTPUT_RATE
+    mix_a = np.zeros((OUTPUT_BLOCK, 2), dtype=np.float32)
+    mix_b = np.ones((OUTPUT_BLOCK, 2), dtype=np.float32)
+    next_deadline = time.perf_counter() + period
+    while not stop_event.is_set():
+        np.multiply(mix_b, 0.5, out=mix_a)
+        np.add(mix_a, mix_b, out=mix_a)
+        remaining = next_deadline - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
+        lateness = time.perf_counter() - next_deadline
+        if lateness > period:
+            underruns[0] += 1
+            next_deadline = time.perf_counter()
+        next_deadline += period
+
+
+def run_preset(preset: str, turns: int) -> Dict[str, Union[str, float, int]]:
+    """Measures turn latency and underruns for one thread preset.
+
+    Each turn transcribes a spoken utterance and synthesizes the first reply
+    sentence while the previous reply is still being synthesized, which is the
+    overlap that oversubscribes the CPU during streaming.
+
+    Args:
+        preset: The thread budget preset name.
+        turns: The number of turns to measure.
+
+    Returns:
+        A dictionary with latency percentiles and the underrun count.
+    """
+    loader = ModelLoader(thread_budget=ThreadBudget(preset=preset))
+    tts_voice, whisper_model = loader.get_models()
+
+    speech = np.concatenate(
+        [chunk.audio_float_array for chunk in tts_voice.synthesize(USER_TEXT)]
+    )
+    utterance = _resample(speech, tts_voice.config.sample_rate, 16000)
+    first_sentence = REPLY_TEXT.split(". ")[0] + "."
+
+    stop_event = threading.Event()
+    underruns = [0]
+    deadline_thread = threading.Thread(
+        target=_audio_deadline_thread, args=(stop_event, underruns), daemon=True
+    )
+    deadline_thread.start()
+
+    latencies: List[float] = []
+    for _ in range(turns):
+        background = threading.Thread(
+            target=lambda: sum(1 for _ in tts_voice.synthesize(REPLY_TEXT)),
+            daemon=True,
+        )
+        background.start()
+
+        start_time = time.perf_counter()
+        segments, _ = whisper_model.transcribe(utterance, language="en", beam_size=1)
+        for _ in segments:
+            pass
+        next(iter(tts_voice.synthesize(first_sentence)))
+        latencies.append(time.perf_counter() - start_time)
+
+        background.join()
+
+    stop_event.set()
+    deadline_thread.join()
+
+    latencies.sort()
+    return {
+        "preset": preset,
+        "median_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] * 1000,
+        "underruns": underruns[0],
+    }
+
+
+def main(presets: Optional[List[str]] = None, turns: int = 10) -> None:
+    """Runs every preset in a fresh process and prints a comparison table.
+
+    Args:
+        presets: The presets to benchmark, all of them when omitted.
+        turns: The number of turns per preset.
+    """
+    context = multiprocessing.get_context("spawn")
+    print(f"{'preset':<12}{'median ms':>12}{'p95 ms':>12}{'underruns':>12}")
+    for preset in presets or list(THREAD_PRESETS):
+        with context.Pool(1) as pool:
+            result = pool.apply(run_preset, (preset, turns))
+        print(
+            f"{result['preset']:<12}{result['median_ms']:>12.0f}"
+            f"{result['p95_ms']:>12.0f}{result['underruns']:>12}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare turn latency and audio underruns per thread preset."
+    )
+    parser.add_argument("--preset", action="append", choices=list(THREAD_PRESETS))
+    parser.add_argument("--turns", type=int, default=10)
+    args = parser.parse_args()
+    main(args.preset, args.turns)
@@ -0,0 +1,258 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Union
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SRC_DIR not in sys.path:
+    sys.path.append(SRC_DIR)
+
+from google.genai import types
+
+from managers.state_manager import StateManager
+from managers.tool_register import ToolRegister
+from services.conversation_service import split_sentences
+from services.gemini_service import GeminiService
+from services.llm_backend import FakeBackend
+from services.resilient_backend import ResilientBackend
+
+USER_TEXT = "I heard the rain on the left and a man talking on the right side."
+DEFAULT_SCRIPT: List[Dict[str, Any]] = [
+    {
+        "text": "Great job, that was exactly right. Now I will add a second "
+        "speaker in the background. Listen carefully and tell me what the "
+        "first speaker says."
+    },
+    {"function_calls": [{"name": "play_speaker_sound", "args": {"volume": 0.5}}]},
+    {
+        "text": "I have started a new speaker on the left. Tell me when you "
+        "can follow what they are saying."
+    },
+]
+TOOL_RESULT = {
+    "clip_id": 1,
+    "description": "A man reading the news",
+    "type": "speakers",
+}
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    """Returns a nearest-rank percentile.
+
+    Args:
+        values: The samples.
+        fraction: The percentile as a fraction, e.g. 0.95.
+
+    Returns:
+        The percentile value.
+    """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class TurnTimer:
+    """
+    Records when the first sentence of a turn became speakable.
+    """
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.first_sentence: Optional[float] = None
+        self._buffer = ""
+
+    def feed(self, text: str) -> None:
+        """Adds streamed text and notes the first complete sentence.
+
+        Args:
+            text: The next text delta.
+        """
+        sentences, self._buffer = split_sentences(self._buffer + text)
+        if sentences and self.first_sentence is None:
+            self.first_sentence = time.perf_counter() - self.start
+
+    def finish(self) -> Dict[str, float]:
+        """Returns the timings of the finished turn.
+
+        Returns:
+            A dictionary with the first-sentence and total turn time in ms.
+        """
+        total = time.perf_counter() - self.start
+        if self.first_sentence is None:
+            self.first_sentence = total
+        return {"first_ms": self.first_sentence * 1000, "turn_ms": total * 1000}
+
+
+def blocking_turn(gemini_service: GeminiService) -> Dict[str, float]:
+    """Runs one turn with blocking requests.
+
+    Args:
+        gemini_service: The service under test.
+
+    Returns:
+        The turn timings.
+    """
+    timer = TurnTimer()
+    response = gemini_service.generate_with_gemini(USER_TEXT)
+    while True:
+        calls = response.function_calls or []
+        parts = response.candidates[0].content.parts or []
+        text = "".join(part.text for part in parts if part.text)
+        if text:
+            timer.feed(text + " ")
+        if not calls or text:
+            return timer.finish()
+        gemini_service.add_tool_results(calls, [TOOL_RESULT] * len(calls))
+        response = gemini_service.generate_tool_follow_up()
+
+
+def streaming_turn(gemini_service: GeminiService) -> Dict[str, float]:
+    """Runs one turn with streamed requests.
+
+    Args:
+        gemini_service: The service under test.
+
+    Returns:
+        The turn timings.
+    """
+    timer = TurnTimer()
+    stream = gemini_service.stream_with_gemini(USER_TEXT)
+    while True:
+        calls: List[types.FunctionCall] = []
+        spoken = False
+        for item in stream:
+            if isinstance(item, types.FunctionCall):
+                calls.append(item)
+            else:
+                timer.feed(item)
+                spoken = True
+        if not calls or spoken:
+            return timer.finish()
+        gemini_service.add_tool_results(calls, [TOOL_RESULT] * len(calls))
+        stream = gemini_service.stream_tool_follow_up()
+
+
+def async_turn(gemini_service: GeminiService) -> Dict[str, float]:
+    """Runs one turn with streamed requests from an event loop.
+
+    Args:
+        gemini_service: The service under test.
+
+    Returns:
+        The turn timings.
+    """
+
+    async def run() -> Dict[str, float]:
+        timer = TurnTimer()
+        stream = gemini_service.astream_with_gemini(USER_TEXT)
+        while True:
+            calls: List[types.FunctionCall] = []
+            spoken = False
+            async for item in stream:
+                if isinstance(item, types.FunctionCall):
+                    calls.append(item)
+                else:
+                    timer.feed(item)
+                    spoken = True
+            if not calls or spoken:
+                return timer.finish()
+            gemini_service.add_tool_results(calls, [TOOL_RESULT] * len(calls))
+            stream = gemini_service.astream_tool_follow_up()
+
+    return asyncio.run(run())
+
+
+MODES: Dict[str, Callable[[GeminiService], Dict[str, float]]] = {
+    "blocking": blocking_turn,
+    "streaming": streaming_turn,
+    "async": async_turn,
+}
+
+
+def run_mode(
+    mode: str, backend: FakeBackend, turns: int
+) -> Dict[str, Union[str, float, int]]:
+    """Measures turn latency for one request mode against the offline backend.
+
+    Args:
+        mode: One of `MODES`.
+        backend: The scripted backend.
+        turns: The number of turns to run.
+
+    Returns:
+        A dictionary with first-sentence and turn latency percentiles.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        state_manager = StateManager(os.path.join(directory, "progress.json"))
+        tools = ToolRegister(None, state_manager).get_tools()
+        resilient_backend = ResilientBackend(backend)
+        gemini_service = GeminiService(state_manager, tools, backend=resilient_backend)
+
+        results = [MODES[mode](gemini_service) for _ in range(turns)]
+        resilient_backend.close()
+
+    first = [result["first_ms"] for result in results]
+    total = [result["turn_ms"] for result in results]
+    return {
+        "mode": mode,
+        "turns": turns,
+        "first_p50": statistics.median(first),
+        "first_p95": _percentile(first, 0.95),
+        "turn_p50": statistics.median(total),
+        "turn_p95": _percentile(total, 0.95),
+        "requests": len(backend.requests),
+    }
+
+
+def main(
+    turns: int = 10,
+    time_to_first_token: float = 0.3,
+    token_latency: float = 0.01,
+    script: Optional[str] = None,
+) -> None:
+    """Benchmarks turn latency offline for each request mode.
+
+    Args:
+        turns: The number of turns per mode.
+        time_to_first_token: Simulated delay before the first chunk.
+        token_latency: Simulated delay per generated word.
+        script: Optional JSON file of scripted replies.
+    """
+    results = []
+    for mode in MODES:
+        latency = {
+            "time_to_first_token": time_to_first_token,
+            "token_latency": token_latency,
+        }
+        if script:
+            backend = FakeBackend.from_file(script, **latency)
+        else:
+            backend = FakeBackend(DEFAULT_SCRIPT, **latency)
+        results.append(run_mode(mode, backend, turns))
+
+    print(
+        f"{'mode':<12}{'turns':>6}{'first p50':>11}{'first p95':>11}"
+        f"{'turn p50':>10}{'turn p95':>10}{'requests':>10}"
+    )
+    for result in results:
+        print(
+            f"{result['mode']:<12}{result['turns']:>6}"
+            f"{result['first_p50']:>11.0f}{result['first_p95']:>11.0f}"
+            f"{result['turn_p50']:>10.0f}{result['turn_p95']:>10.0f}"
+            f"{result['requests']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure turn latency offline against the scripted LLM stand-in."
+    )
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--ttft", type=float, default=0.3)
+    parser.add_argument("--token-latency", type=float, default=0.01)
+    parser.add_argument("--script", help="JSON list of scripted replies")
+    args = parser.parse_args()
+    main(args.turns, args.ttft, args.token_latency, args.script)
@@ -8,10 +8,8 @@ from typing import Tuple
 import certifi
 from dotenv import load_dotenv
 
-from audio_engine.audio_controller import AudioController
-from managers.state_manager import StateManager, get_app_data_dir
-from services.conversation_service import ConversationService
-from ui.main_app import TesseraApp
+from managers.state_manager import get_app_data_dir
+from ui.main_app import TesseraApp, live_engine_selected
 
 os.environ["KIVY_LOG_LEVEL"] = "warning"
 logging.getLogger().setLevel(logging.WARNING)
@@ -80,22 +78,26 @@ def clear_system_api_key() -> None:
 
 
 def main() -> None:
-    """Launches the Tessera application."""
+    """Launches the Tessera application.
+
+    Whisper and Piper start loading in the background unless the Live
+    engine is selected, which does not use them.
+    """
     load_environment()
 
+    model_loader = None
+    if not live_engine_selected():
+        from services.model_loader import ModelLoader
+
+        model_loader = ModelLoader()
+        model_loader.start()
+
     api_key, source = get_api_key_source()
-    conversation_manager = None
 
     if source == "system" and not is_valid_api_key(api_key):
         clear_system_api_key()
-        api_key = ""
-
-    if is_valid_api_key(api_key):
-        state_manager = StateManager()
-        audio_controller = AudioController()
-        conversation_manager = ConversationService(audio_controller, state_manager)
 
-    app = TesseraApp(conversation_manager=conversation_manager)
+    app = TesseraApp(model_loader=model_loader)
     app.run()
 
 
@@ -3,7 +3,10 @@ import json
 import os
 import sys
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
+
+CONTEXT_SESSIONS = 5
+CONTEXT_OBSERVATIONS = 5
 
 
 def get_resource_path(relative_path: str) -> str:
@@ -33,6 +36,9 @@ class StateManager:
 
     def __init__(self, progress_file: str = "progress.json") -> None:
         self.progress_file = get_app_data_dir() / progress_file
+        self.context_version: int = 0
+        self._recent_sessions: Optional[List[Dict[str, Any]]] = None
+        self._context_summary: Optional[str] = None
 
     def _read_state(self) -> Dict[str, Any]:
         """Reads state from progress file, initializing if empty.
@@ -87,21 +93,53 @@ class StateManager:
         state["sessions"][-1]["observations"].append(new_observation)
         self._write_state(state)
 
+        if self._recent_sessions is not None:
+            recent = self._recent_sessions
+            if not recent or recent[-1]["date"] != today:
+                recent.append({"date": today, "observations": []})
+                del recent[:-CONTEXT_SESSIONS]
+            recent[-1]["observations"].append(new_observation)
+            del recent[-1]["observations"][:-CONTEXT_OBSERVATIONS]
+        self._invalidate_context()
+
+    def _invalidate_context(self) -> None:
+        """
+        Marks the cached context summary as stale.
+        """
+        self._context_summary = None
+        self.context_version += 1
+
+    def _get_recent_sessions(self) -> List[Dict[str, Any]]:
+        """Returns the sessions shown in the context summary, loading them once.
+
+        Returns:
+            List[Dict[str, Any]]: The most recent sessions with their latest observations.
+        """
+        if self._recent_sessions is None:
+            self._recent_sessions = [
+                {
+                    "date": sess["date"],
+                    "observations": sess["observations"][-CONTEXT_OBSERVATIONS:],
+                }
+                for sess in self._read_state().get("sessions", [])[-CONTEXT_SESSIONS:]
+            ]
+        return self._recent_sessions
+
     def get_context_summary(self) -> str:
         """Generates a summary of recent sessions.
 
         Returns:
             str: A summary of the last 5 sessions.
         """
-        state = self._read_state()
-        lines = []
-
-        for sess in state.get("sessions", [])[-5:]:
-            lines.append(f"Session {sess['date']}:")
-            for obs in sess["observations"][-5:]:
-                lines.append(f"  - {obs}")
+        if self._context_summary is None:
+            lines = []
+            for sess in self._get_recent_sessions():
+                lines.append(f"Session {sess['date']}:")
+                for obs in sess["observations"]:
+                    lines.append(f"  - {obs}")
+            self._context_summary = "\n".join(lines)
 
-        return "\n".join(lines)
+        return self._context_summary
 
     def get_full_progress(self) -> str:
         """Returns the complete progress data as a JSON string.
@@ -124,6 +162,9 @@ class StateManager:
         state = self._read_state()
         state[field] = value
         self._write_state(state)
+        if field == "sessions":
+            self._recent_sessions = None
+            self._invalidate_context()
         return f"{field} updated"
 
     def is_disclaimer_acknowledged(self) -> bool:
@@ -0,0 +1,157 @@
+import os
+from typing import Any, Dict, Optional
+
+import onnxruntime
+from threadpoolctl import threadpool_limits
+
+THREAD_PRESETS: Dict[str, Dict[str, int]] = {
+    "dual_core": {
+        "max_cores": 2,
+        "whisper_cpu_threads": 1,
+        "whisper_num_workers": 1,
+        "piper_intra_op_threads": 1,
+        "piper_inter_op_threads": 1,
+        "blas_threads": 1,
+    },
+    "quad_core": {
+        "max_cores": 4,
+        "whisper_cpu_threads": 2,
+        "whisper_num_workers": 1,
+        "piper_intra_op_threads": 1,
+        "piper_inter_op_threads": 1,
+        "blas_threads": 1,
+    },
+    "octa_core": {
+        "max_cores": 8,
+        "whisper_cpu_threads": 4,
+        "whisper_num_workers": 1,
+        "piper_intra_op_threads": 2,
+        "piper_inter_op_threads": 1,
+        "blas_threads": 1,
+    },
+    "many_core": {
+        "max_cores": 0,
+        "whisper_cpu_threads": 4,
+        "whisper_num_workers": 1,
+        "piper_intra_op_threads": 2,
+        "piper_inter_op_threads": 1,
+        "blas_threads": 1,
+    },
+}
+RESERVED_CORES = 2
+
+
+def scale_many_core(cpu_count: int) -> Dict[str, int]:
+    """Sizes the many_core preset to the available cores.
+
+    The preset's counts are the floor; above it Whisper gets half and Piper a
+    quarter of the cores left after `RESERVED_CORES` for the audio and UI
+    threads, so the total never exceeds what is left.
+
+    Args:
+        cpu_count: The number of usable cores.
+
+    Returns:
+        Dict[str, int]: The scaled preset.
+    """
+    floor = THREAD_PRESETS["many_core"]
+    budget = max(
+        floor["whisper_cpu_threads"]
+        + floor["piper_intra_op_threads"]
+        + floor["blas_threads"],
+        cpu_count - RESERVED_CORES,
+    )
+    whisper = min(8, max(floor["whisper_cpu_threads"], budget // 2))
+    piper = min(4, max(floor["piper_intra_op_threads"], budget // 4))
+    blas = max(floor["blas_threads"], min(2, budget - whisper - piper))
+    return dict(
+        floor,
+        whisper_cpu_threads=whisper,
+        piper_intra_op_threads=piper,
+        blas_threads=blas,
+    )
+
+
+def select_preset(cpu_count: Optional[int] = None) -> str:
+    """Picks the preset that fits the available cores.
+
+    Args:
+        cpu_count: The number of usable cores, detected when omitted.
+
+    Returns:
+        str: The name of the matching preset.
+    """
+    cores = cpu_count or os.cpu_count() or 1
+    for name, preset in THREAD_PRESETS.items():
+        if preset["max_cores"] and cores <= preset["max_cores"]:
+            return name
+    return "many_core"
+
+
+class ThreadBudget:
+    """
+    Partitions CPU threads between Whisper, Piper, BLAS and the audio/UI threads.
+    """
+
+    def __init__(
+        self, preset: Optional[str] = None, cpu_count: Optional[int] = None
+    ) -> None:
+        preset = preset or os.environ.get("TESSERA_THREAD_PRESET")
+        if preset not in THREAD_PRESETS:
+            preset = select_preset(cpu_count)
+        self.preset = preset
+
+        config = THREAD_PRESETS[preset]
+        if preset == "many_core":
+            config = scale_many_core(cpu_count or os.cpu_count() or 1)
+        self.whisper_cpu_threads: int = config["whisper_cpu_threads"]
+        self.whisper_num_workers: int = config["whisper_num_workers"]
+        self.piper_intra_op_threads: int = config["piper_intra_op_threads"]
+        self.piper_inter_op_threads: int = config["piper_inter_op_threads"]
+        self.blas_threads: int = config["blas_threads"]
+        self._blas_limiter: Optional[threadpool_limits] = None
+
+    def apply_blas_limits(self) -> None:
+        """
+        Caps the BLAS/OpenMP pools used by NumPy for the rest of the process.
+        """
+        if self._blas_limiter is None:
+            self._blas_limiter = threadpool_limits(limits=self.blas_threads)
+
+    def whisper_kwargs(self) -> Dict[str, int]:
+        """Returns the CTranslate2 threading arguments for WhisperModel.
+
+        Returns:
+            Dict[str, int]: Keyword arguments for the WhisperModel constructor.
+        """
+        return {
+            "cpu_threads": self.whisper_cpu_threads,
+            "num_workers": self.whisper_num_workers,
+        }
+
+    def piper_session_options(self) -> onnxruntime.SessionOptions:
+        """Builds ONNX Runtime session options for the Piper voice.
+
+        Returns:
+            onnxruntime.SessionOptions: Options with bounded thread pools.
+        """
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = self.piper_intra_op_threads
+        options.inter_op_num_threads = self.piper_inter_op_threads
+        options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        return options
+
+    def describe(self) -> Dict[str, Any]:
+        """Returns the thread assignment for logging.
+
+        Returns:
+            Dict[str, Any]: The preset name and per-component thread counts.
+        """
+        return {
+            "preset": self.preset,
+            "whisper_cpu_threads": self.whisper_cpu_threads,
+            "whisper_num_workers": self.whisper_num_workers,
+            "piper_intra_op_threads": self.piper_intra_op_threads,
+            "piper_inter_op_threads": self.piper_inter_op_threads,
+            "blas_threads": self.blas_threads,
+        }
@@ -1,3 +1,4 @@
+import functools
 import os
 import pathlib
 import shutil
@@ -15,7 +16,6 @@ PROMPT_PATH = SRC_DIR / "prompts" / "audio_labeling_prompt.md"
 TMP_SUFFIX = ".tmp_normalised.wav"
 PROMPT_TEXT = (SRC_DIR / "prompts" / "audio_labeling_prompt.md").read_text()
 
-_CLIENT = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
 _MODEL_NAME = "gemini-2.5-flash"
 _CONTENT_CONFIG = types.GenerateContentConfig(
     response_mime_type="text/plain",
@@ -23,6 +23,16 @@ _CONTENT_CONFIG = types.GenerateContentConfig(
 )
 
 
+@functools.lru_cache(maxsize=1)
+def _get_client() -> genai.Client:
+    """Creates the Gemini client on first use rather than at import time.
+
+    Returns:
+        The shared client.
+    """
+    return genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
+
+
 def _find_audio_files() -> Iterator[pathlib.Path]:
     """Yields absolute file paths for supported audio files found within the project's audio directory.
 
@@ -102,7 +112,7 @@ def _generate_description(audio_bytes: bytes) -> str:
         )
     ]
 
-    response_chunks = _CLIENT.models.generate_content_stream(
+    response_chunks = _get_client().models.generate_content_stream(
         model=_MODEL_NAME,
         contents=contents,
         config=_CONTENT_CONFIG,
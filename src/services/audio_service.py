@@ -1,159 +1,195 @@
-import io
-import threading
-import time as time_module
-import wave
-from typing import Callable, List, Optional
+import time
+from typing import Callable, Dict, Iterable, Optional
 
 import numpy as np
-import pygame
-import sounddevice as sd
 from faster_whisper import WhisperModel
 from piper import PiperVoice, SynthesisConfig
 
+from audio_engine.audio_controller import AudioController
+from audio_engine.capture_engine import CaptureEngine
+from services.latency_tracer import LatencyTracer
+from services.streaming_transcriber import StreamingTranscriber
+
 
 class AudioService:
     def __init__(
         self,
-        tts_model_path: str,
-        tts_config_path: str,
-        whisper_model_size: str = "tiny",
-        whisper_device: str = "cpu",
-        whisper_compute_type: str = "int8",
+        audio_controller: AudioController,
+        tts_voice: PiperVoice,
+        whisper_model: WhisperModel,
         sample_rate: int = 16000,
         threshold: float = 0.01,
         silence_duration: float = 1.5,
+        streaming_transcription: bool = True,
+        echo_cancellation: bool = True,
+        tracer: Optional[LatencyTracer] = None,
     ) -> None:
-        self.tts_voice = PiperVoice.load(tts_model_path, tts_config_path)
-
+        self.audio_controller = audio_controller
+        self.tracer = tracer
+        self.tts_voice = tts_voice
         self.syn_config = SynthesisConfig(length_scale=1.5, noise_scale=0.333)
-        pygame.mixer.init(frequency=22050, size=-16, channels=1, buffer=512)
-
-        self.whisper_model = WhisperModel(
-            whisper_model_size, device=whisper_device, compute_type=whisper_compute_type
-        )
+        self.whisper_model = whisper_model
 
         self.sample_rate: int = sample_rate
-        self.threshold: float = threshold
-        self.silence_duration: float = silence_duration
-        self.is_recording: bool = False
-        self.audio_buffer: List[float] = []
-        self.silence_start_time: Optional[float] = None
-        self.recording_complete: bool = False
+        self.capture_engine = CaptureEngine(
+            sample_rate=sample_rate,
+            threshold=threshold,
+            silence_duration=silence_duration,
+            output_reference=(
+                audio_controller.output_reference if echo_cancellation else None
+            ),
+            tracer=tracer,
+        )
+        self.streaming_transcriber: Optional[StreamingTranscriber] = None
+        if streaming_transcription:
+            self.streaming_transcriber = StreamingTranscriber(
+                self.whisper_model,
+                self.capture_engine,
+                sample_rate=sample_rate,
+                tracer=tracer,
+            )
         self.kai_is_speaking: bool = False
+        self.last_tts_text: Optional[str] = None
+        self.last_tts_audio: Optional[np.ndarray] = None
+        self._tts_cache: Dict[str, np.ndarray] = {}
 
     def text_to_speech(
         self, text: str, callback: Optional[Callable[[], None]] = None
     ) -> None:
+        self.play_speech(text, self.prepare_speech(text), callback=callback)
+
+    def prepare_speech(self, text: str) -> Optional[np.ndarray]:
+        """Synthesizes a reply without playing it, using the cache if possible.
+
+        Args:
+            text: The text to speak.
+
+        Returns:
+            The int16 samples, or None if there is nothing to play.
+        """
         if not text.strip():
+            return None
+        audio_data = self._tts_cache.get(text)
+        if audio_data is None:
+            start_time = time.perf_counter()
+            audio_data = self._synthesize(text)
+            if self.tracer is not None:
+                self.tracer.record(
+                    "tts_synthesis", start_time, time.perf_counter(), chars=len(text)
+                )
+        return audio_data
+
+    def play_speech(
+        self,
+        text: str,
+        audio_data: Optional[np.ndarray],
+        callback: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """Queues speech prepared by `prepare_speech` for playback.
+
+        Args:
+            text: The text being spoken.
+            audio_data: The synthesized samples, or None to skip playback.
+            callback: Optional function called once playback finishes.
+        """
+        if audio_data is None:
             if callback:
                 callback()
             return
 
         print(f"Kai: {text}")
+        self.last_tts_text = text
+        self.last_tts_audio = audio_data
+        self.audio_controller.play_tts_audio(
+            audio_data, self.tts_voice.config.sample_rate, on_complete=callback
+        )
 
-        wav_buffer = io.BytesIO()
-        with wave.open(wav_buffer, "wb") as wav_file:
-            self.tts_voice.synthesize_wav(text, wav_file, syn_config=self.syn_config)
+    def _synthesize(self, text: str) -> Optional[np.ndarray]:
+        chunks = [
+            chunk.audio_int16_array
+            for chunk in self.tts_voice.synthesize(text, syn_config=self.syn_config)
+        ]
+        return np.concatenate(chunks) if chunks else None
+
+    def precache_speech(self, texts: Iterable[str]) -> None:
+        for text in texts:
+            if text not in self._tts_cache:
+                audio_data = self._synthesize(text)
+                if audio_data is not None:
+                    self._tts_cache[text] = audio_data
+
+    def repeat_last_speech(self, callback: Optional[Callable[[], None]] = None) -> None:
+        if self.last_tts_audio is None:
+            if callback:
+                callback()
+            return
 
-        wav_buffer.seek(0)
+        self.audio_controller.play_tts_audio(
+            self.last_tts_audio, self.tts_voice.config.sample_rate, on_complete=callback
+        )
 
-        with wave.open(wav_buffer, "rb") as wav_file:
-            audio_bytes = wav_file.readframes(wav_file.getnframes())
+    def transcribe_audio(self, audio_data: np.ndarray) -> str:
+        if audio_data is None or not audio_data.shape[0]:
+            return ""
 
-        audio_data = np.frombuffer(audio_bytes, dtype=np.int16)
+        whisper_rate = self.whisper_model.feature_extractor.sampling_rate
+        if self.sample_rate != whisper_rate:
+            target_length = int(len(audio_data) * whisper_rate / self.sample_rate)
+            audio_data = np.interp(
+                np.linspace(0, len(audio_data) - 1, target_length),
+                np.arange(len(audio_data)),
+                audio_data,
+            ).astype(np.float32)
+
+        start_time = time.perf_counter()
+        segments, _ = self.whisper_model.transcribe(audio_data)
+        transcription = " ".join([segment.text for segment in segments])
+        if self.tracer is not None:
+            self.tracer.record("transcription", start_time, time.perf_counter())
+        return transcription.strip()
 
-        if audio_data.ndim == 1:
-            audio_data = np.column_stack((audio_data, audio_data))
+    def listen_for_transcript(self) -> Optional[str]:
+        if not self.streaming_transcriber:
+            audio_data = self.record_with_threshold()
+            return self.transcribe_audio(audio_data) if audio_data.shape[0] else None
 
-        sound = pygame.sndarray.make_sound(audio_data)
-        channel = sound.play()
+        if self.kai_is_speaking:
+            return None
 
-        if callback and channel:
+        self.capture_engine.start()
+        print("Listening for voice...")
+        return self.streaming_transcriber.transcribe_next()
 
-            def monitor_completion():
-                while channel.get_busy():
-                    pygame.time.wait(10)
-                callback()
+    def record_with_threshold(self) -> np.ndarray:
+        if self.kai_is_speaking:
+            return np.zeros(0, dtype=np.float32)
 
-            threading.Thread(target=monitor_completion, daemon=True).start()
+        self.capture_engine.start()
+        print("Listening for voice...")
+        audio_data = self.capture_engine.get_utterance()
 
-    def transcribe_audio(self, audio_bytes: bytes) -> str:
-        if not audio_bytes:
-            return ""
+        if audio_data is None:
+            return np.zeros(0, dtype=np.float32)
+        return audio_data
 
-        audio_buffer = io.BytesIO(audio_bytes)
+    def set_barge_in_handler(self, handler: Optional[Callable[[], None]]) -> None:
+        self.capture_engine.on_barge_in = handler
 
-        segments, _ = self.whisper_model.transcribe(audio_buffer)
-        transcription = " ".join([segment.text for segment in segments])
-        return transcription.strip()
+    def set_command_matcher(self, matcher: Optional[Callable[[str], bool]]) -> None:
+        """Lets short utterances that are commands end without the full silence.
 
-    def record_with_threshold(self) -> bytes:
-        if self.kai_is_speaking:
-            return b""
+        Args:
+            matcher: Tells whether a transcript is a command, None to disable.
+        """
+        if self.streaming_transcriber is not None:
+            self.streaming_transcriber.command_matcher = matcher
 
-        print("Listening for voice...")
-        self.is_recording = False
-        self.audio_buffer = []
-        self.silence_start_time = None
-        self.recording_complete = False
-
-        def audio_callback(indata, outdata=None, frames=None, time=None, status=None):
-            if status:
-                print(f"Audio status: {status}")
-
-            if self.kai_is_speaking:
-                self.recording_complete = True
-                return
-
-            rms = np.sqrt(np.mean(indata**2))
-            if rms > self.threshold:
-                if not self.is_recording:
-                    print("Voice detected, starting recording...")
-                    self.is_recording = True
-                    self.audio_buffer = []
-
-                self.audio_buffer.extend(indata.flatten())
-                self.silence_start_time = None
-            elif self.is_recording:
-                self.audio_buffer.extend(indata.flatten())
-                if self.silence_start_time is None:
-                    self.silence_start_time = time_module.time()
-                elif (
-                    time_module.time() - self.silence_start_time > self.silence_duration
-                ):
-                    print("Silence detected, stopping recording...")
-                    self.recording_complete = True
-
-        with sd.InputStream(
-            samplerate=self.sample_rate,
-            channels=1,
-            callback=audio_callback,
-            dtype=np.float32,
-            blocksize=1024,
-        ):
-            recording_event = threading.Event()
-
-            def check_completion():
-                while not self.recording_complete:
-                    recording_event.wait(0.01)
-                recording_event.set()
-
-            completion_thread = threading.Thread(target=check_completion, daemon=True)
-            completion_thread.start()
-            recording_event.wait()
-
-        if self.audio_buffer:
-            audio_data = np.array(self.audio_buffer, dtype=np.float32)
-            audio_data = (audio_data * 32767).astype(np.int16)
-            wav_buffer = io.BytesIO()
-            with wave.open(wav_buffer, "wb") as wav_file:
-                wav_file.setnchannels(1)
-                wav_file.setsampwidth(2)
-                wav_file.setframerate(self.sample_rate)
-                wav_file.writeframes(audio_data.tobytes())
-            return wav_buffer.getvalue()
-
-        return b""
+    def set_listening_paused(self, paused: bool) -> None:
+        self.capture_engine.set_paused(paused)
 
     def set_kai_is_speaking(self, is_speaking: bool) -> None:
         self.kai_is_speaking = is_speaking
+        self.capture_engine.set_muted(is_speaking)
+
+    def close(self) -> None:
+        self.capture_engine.stop()
@@ -0,0 +1,141 @@
+import re
+from typing import Any, Dict, List, Optional
+
+from google.genai import types
+
+from audio_engine.audio_controller import AudioController
+from managers.tool_register import ToolRegister
+
+FILLER_WORDS = {"please", "kai", "um", "uh", "hey"}
+
+DEFAULT_COMMANDS: Dict[str, Dict[str, Any]] = {
+    "stop": {
+        "phrases": ["stop", "stop it", "stop the audio", "stop the sound", "quiet"],
+        "action": "stop_all_audio",
+        "reply": "Okay, stopping the audio.",
+        "forward": False,
+    },
+    "louder": {
+        "phrases": ["louder", "turn it up", "volume up", "make it louder"],
+        "action": "louder",
+        "reply": "Turning it up.",
+        "forward": False,
+    },
+    "quieter": {
+        "phrases": ["quieter", "softer", "turn it down", "volume down"],
+        "action": "quieter",
+        "reply": "Turning it down.",
+        "forward": False,
+    },
+    "repeat": {
+        "phrases": ["repeat", "repeat that", "say that again", "pardon", "what"],
+        "action": "repeat",
+        "reply": None,
+        "forward": False,
+    },
+}
+
+VOLUME_STEP = 1.5
+NO_AUDIO_REPLY = "There's no audio playing right now."
+
+
+def normalize_command_text(text: str) -> str:
+    """Normalizes a transcript for command matching.
+
+    Args:
+        text: The raw transcript.
+
+    Returns:
+        str: Lowercase words without punctuation or filler words.
+    """
+    words = re.sub(r"[^\w' ]", " ", text.lower()).split()
+    return " ".join(word for word in words if word not in FILLER_WORDS)
+
+
+class CommandRouter:
+    """
+    Recognises short control utterances and handles them without the LLM.
+
+    Commands marked `forward` run their action and still go to the LLM,
+    which writes the reply. Answers such as "yes" are not commands, since
+    what they mean depends on the question they answer.
+    """
+
+    def __init__(
+        self,
+        tool_registry: ToolRegister,
+        audio_controller: AudioController,
+        commands: Optional[Dict[str, Dict[str, Any]]] = None,
+    ) -> None:
+        self.tool_registry = tool_registry
+        self.audio_controller = audio_controller
+        self.commands = commands if commands is not None else DEFAULT_COMMANDS
+        self._phrase_map: Dict[str, str] = {
+            normalize_command_text(phrase): name
+            for name, command in self.commands.items()
+            for phrase in command["phrases"]
+        }
+
+    def canned_replies(self) -> List[str]:
+        """Lists the fixed replies so their speech can be synthesized ahead of time.
+
+        Returns:
+            List[str]: The canned reply texts.
+        """
+        replies = [
+            command["reply"] for command in self.commands.values() if command["reply"]
+        ]
+        return replies + [NO_AUDIO_REPLY]
+
+    def match(self, text: str) -> Optional[Dict[str, Any]]:
+        """Matches a whole utterance against the configured command phrases.
+
+        Args:
+            text: The user's transcript.
+
+        Returns:
+            The matching command with its name, or None.
+        """
+        name = self._phrase_map.get(normalize_command_text(text))
+        if name is None:
+            return None
+        return {"name": name, **self.commands[name]}
+
+    def execute(self, command: Dict[str, Any]) -> Optional[str]:
+        """Runs a command's local action.
+
+        Args:
+            command: A command returned by `match`.
+
+        Returns:
+            The text to speak in reply, or None if nothing should be said.
+        """
+        action = command.get("action")
+        if action == "louder":
+            return self._scale_volume(VOLUME_STEP) or command["reply"]
+        if action == "quieter":
+            return self._scale_volume(1 / VOLUME_STEP) or command["reply"]
+        if action and action != "repeat":
+            result = self.tool_registry.execute_function(
+                types.FunctionCall(name=action, args={})
+            )
+            print(f"Command executed: {action} -> {result}")
+        return command.get("reply")
+
+    def _scale_volume(self, factor: float) -> Optional[str]:
+        """Scales the volume of every active clip.
+
+        Args:
+            factor: The multiplier to apply to each clip's volume.
+
+        Returns:
+            A reply when there is nothing to adjust, otherwise None.
+        """
+        status = self.audio_controller.get_status()
+        if not status:
+            return NO_AUDIO_REPLY
+        for clip in status:
+            volume = max(clip["volume"], 0.05) * factor
+            result = self.audio_controller.adjust_volume(volume, clip["clip_id"])
+            print(f"Command executed: adjust_volume -> {result}")
+        return None
@@ -1,203 +1,607 @@
+import asyncio
 import os
+import re
 import ssl
 import threading
-from typing import Dict, List, Union
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Tuple
 
 import certifi
+from faster_whisper import WhisperModel
 from google.genai import types
+from piper import PiperVoice
 
 from audio_engine.audio_controller import AudioController
-from managers.state_manager import StateManager, get_resource_path
+from managers.state_manager import StateManager
 from managers.tool_register import ToolRegister
-from services.gemini_service import GeminiService
+from services.gemini_service import AsyncResponseStream, GeminiService
 from services.audio_service import AudioService
+from services.command_router import CommandRouter
+from services.latency_tracer import LatencyTracer
+from services.model_loader import ModelLoader
+from services.prompt_builder import WELCOME_PROMPT
+from services.tool_executor import ToolExecutor
 
 ssl._create_default_https_context = ssl._create_unverified_context
 os.environ["SSL_CERT_FILE"] = certifi.where()
 os.environ["REQUESTS_CA_BUNDLE"] = certifi.where()
 
+TURN_TAIL_PADDING = 0.25
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])[\"')\]]*\s+")
+MIN_SENTENCE_CHARS = 12
+
+
+def split_sentences(text: str) -> Tuple[List[str], str]:
+    """
+    Splits complete sentences off the front of streamed text.
+
+    Very short sentences are held back and merged with the next one so TTS
+    is not started for a lone "Okay."
+
+    Args:
+        text: The text received so far that has not been spoken yet.
+
+    Returns:
+        Tuple[List[str], str]: The complete sentences and the unfinished remainder.
+    """
+    sentences: List[str] = []
+    start = 0
+    for match in SENTENCE_BOUNDARY.finditer(text):
+        sentence = text[start : match.end()].strip()
+        if len(sentence) < MIN_SENTENCE_CHARS:
+            continue
+        sentences.append(sentence)
+        start = match.end()
+    return sentences, text[start:]
+
+
+def _resolve(future: "asyncio.Future[None]") -> None:
+    """
+    Completes a future unless it was already cancelled.
+
+    Args:
+        future: The future to complete.
+    """
+    if not future.done():
+        future.set_result(None)
+
 
 class ConversationService:
     """
     Manages the complete voice conversation flow between user and AI.
+
+    The conversation runs as an asyncio pipeline on its own event loop: a
+    listen stage turns utterances into transcripts, and a respond stage runs
+    one turn task at a time in which LLM streaming, tool execution and speech
+    synthesis proceed concurrently. Speech and transcription models run on
+    executors, and barge-in or pause cancels the turn task as a whole.
     """
 
     def __init__(
-        self, audio_controller: AudioController, state_manager: StateManager
+        self,
+        audio_controller: AudioController,
+        state_manager: StateManager,
+        model_loader: Optional[ModelLoader] = None,
     ) -> None:
         self.audio_controller = audio_controller
         self.state_manager = state_manager
         self.tool_registry = ToolRegister(audio_controller, state_manager)
 
+        self.tracer = LatencyTracer()
+        if self.tracer.path is not None:
+            print(f"Tracing turn latency to {self.tracer.path}")
+
+        self.gemini_service = GeminiService(
+            state_manager=self.state_manager,
+            tools=self.tool_registry.get_tools(),
+            tracer=self.tracer,
+        )
+        self._runner: Optional[asyncio.Runner] = asyncio.Runner()
+        tts_voice, whisper_model = self._runner.run(
+            self._load_models(model_loader or ModelLoader())
+        )
         self.audio_service = AudioService(
-            tts_model_path=get_resource_path("models/en_US-hfc_male-medium.onnx"),
-            tts_config_path=get_resource_path("models/en_US-hfc_male-medium.onnx.json"),
+            audio_controller=self.audio_controller,
+            tts_voice=tts_voice,
+            whisper_model=whisper_model,
+            tracer=self.tracer,
         )
-        self.gemini_service = GeminiService(
-            state_manager=self.state_manager, tools=self.tool_registry.get_tools()
+        self.audio_service.set_barge_in_handler(self._handle_barge_in)
+        self.command_router = CommandRouter(self.tool_registry, self.audio_controller)
+        self.audio_service.set_command_matcher(
+            lambda text: self.command_router.match(text) is not None
         )
+        threading.Thread(
+            target=self.audio_service.precache_speech,
+            args=(self.command_router.canned_replies(),),
+            daemon=True,
+        ).start()
 
-        self.turn_complete_event = threading.Event()
-        self.turn_complete_event.set()
         self.has_welcomed = False
         self.running = False
+        self.paused = False
+        self._stt_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stt")
+        self._tts_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts")
+        self.tool_executor = ToolExecutor(self.tool_registry, tracer=self.tracer)
+        self._awaiting_first_audio: bool = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._main_task: Optional["asyncio.Task[None]"] = None
+        self._turn_task: Optional["asyncio.Task[None]"] = None
+        self._listening: Optional[asyncio.Event] = None
+
+    async def _load_models(
+        self, model_loader: ModelLoader
+    ) -> Tuple[PiperVoice, WhisperModel]:
+        """
+        Waits for the speech models while opening the LLM connection on the
+        pipeline's event loop, so the welcome request finds it warm.
+
+        Args:
+            model_loader: The loader providing the models.
+
+        Returns:
+            Tuple[PiperVoice, WhisperModel]: The TTS and STT models.
+        """
+        warm_up = asyncio.create_task(self.gemini_service.awarm_up())
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                None, model_loader.get_models
+            )
+        finally:
+            await warm_up
 
     def start(self) -> None:
         """
-        Starts the conversation with welcome message and voice loop.
+        Runs the conversation pipeline until `stop` is called.
         """
+        if self.running:
+            return
         self.running = True
+        runner = self._runner or asyncio.Runner()
+        self._runner = None
+        try:
+            runner.run(self._run())
+        finally:
+            runner.close()
+
+    async def _run(self) -> None:
+        """
+        Runs the listen and respond stages until the pipeline is cancelled.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._main_task = asyncio.current_task()
+        self._listening = asyncio.Event()
+        transcripts: "asyncio.Queue[str]" = asyncio.Queue()
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(self._listen_stage(transcripts))
+                tg.create_task(self._respond_stage(transcripts))
+                tg.create_task(self.gemini_service.keep_alive())
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop = None
+            self._main_task = None
+
+    def _call_on_loop(self, callback: Callable[..., Any], *args: Any) -> None:
+        """
+        Schedules a callback on the pipeline's event loop from any thread.
 
-        if not self.has_welcomed:
-            self.has_welcomed = True
-            welcome_prompt = "Give a brief greeting like 'Welcome back, glad to see you again' or similar, then ask if they're ready to get started again and recommend headphones. Wait for their response before proceeding with any training."
-            response = self.gemini_service.generate_with_gemini(welcome_prompt)
-            self._handle_ai_response(response)
+        Args:
+            callback: The function to call.
+            *args: Arguments for the callback.
+        """
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            pass
+
+    async def _listen_stage(self, transcripts: "asyncio.Queue[str]") -> None:
+        """
+        Transcribes utterances whenever the pipeline is listening.
 
-        self._start_voice_loop()
+        Capture and voice activity detection run in the audio callback; this
+        stage waits for complete utterances and runs Whisper on an executor.
 
-    def _start_voice_loop(self) -> None:
+        Args:
+            transcripts: The queue the transcripts are handed to.
         """
-        Starts the main voice interaction loop in a separate thread.
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._listening.wait()
+            user_text = await loop.run_in_executor(
+                self._stt_executor, self.audio_service.listen_for_transcript
+            )
+
+            if user_text is None:
+                print("No audio recorded.")
+            elif user_text.strip():
+                print(f"User: {user_text}")
+                self._listening.clear()
+                await transcripts.put(user_text)
+            else:
+                print("Could not understand audio")
+
+    async def _respond_stage(self, transcripts: "asyncio.Queue[str]") -> None:
         """
+        Runs one assistant turn per transcript, starting with the welcome.
 
-        def voice_interaction_loop():
-            while self.running:
-                self.turn_complete_event.wait()
-                if not self.running:
-                    break
+        Args:
+            transcripts: The queue of user transcripts.
+        """
+        if not self.has_welcomed:
+            self.has_welcomed = True
+            await self._run_turn(self._reply_turn(WELCOME_PROMPT))
+        self._resume_listening()
 
-                audio_bytes = self.audio_service.record_with_threshold()
+        while True:
+            user_text = await transcripts.get()
+            await self._handle_transcript(user_text)
+            self._resume_listening()
 
-                if audio_bytes:
-                    user_text = self.audio_service.transcribe_audio(audio_bytes)
+    async def _handle_transcript(self, user_text: str) -> None:
+        """
+        Handles short control utterances locally and sends the rest to the LLM.
 
-                    if user_text.strip():
-                        print(f"User: {user_text}")
-                        response = self.gemini_service.generate_with_gemini(user_text)
-                        self._handle_ai_response(response)
-                    else:
-                        print("Could not understand audio")
-                else:
-                    print("No audio recorded.")
+        Args:
+            user_text: The user's transcript.
+        """
+        command = self.command_router.match(user_text)
+        if not command:
+            await self._run_turn(self._reply_turn(user_text))
+            return
 
-        threading.Thread(target=voice_interaction_loop, daemon=True).start()
+        speech_end = self.audio_service.capture_engine.last_speech_end
+        await self._run_turn(self._command_turn(user_text, command, speech_end))
 
-    def _handle_ai_response(self, response: types.GenerateContentResponse) -> None:
+    async def _run_turn(self, turn: Coroutine[Any, Any, None]) -> None:
         """
-        Handles the response from the AI service.
+        Runs a turn as its own task so it can be cancelled without stopping
+        the pipeline.
 
         Args:
-            response: The response from the AI service.
+            turn: The coroutine that carries out the turn.
         """
-        response_text = ""
-        tool_calls: List[types.FunctionCall] = []
-
-        if (
-            response.candidates
-            and response.candidates[0].content
-            and response.candidates[0].content.parts
-        ):
-            for part in response.candidates[0].content.parts:
-                if hasattr(part, "text") and part.text:
-                    response_text += part.text
-                elif hasattr(part, "function_call") and part.function_call:
-                    tool_calls.append(part.function_call)
+        self.tracer.start_turn()
+        self._awaiting_first_audio = True
+        self._turn_task = asyncio.create_task(turn)
+        outcome = "completed"
+        try:
+            await self._turn_task
+        except asyncio.CancelledError:
+            outcome = "interrupted"
+            if asyncio.current_task().cancelling():
+                raise
+        except Exception as e:
+            outcome = "failed"
+            print(f"Turn failed: {e}")
+        finally:
+            self._turn_task = None
+            self.tracer.end_turn(outcome=outcome)
+
+    async def _reply_turn(self, user_text: str) -> None:
+        """
+        Streams the LLM reply into speech, running tools alongside it.
 
-        self.audio_service.set_kai_is_speaking(True)
-        self.turn_complete_event.clear()
+        Args:
+            user_text: The message to send.
+        """
+        self._begin_speaking()
+        sentences: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+        streams: List[AsyncResponseStream] = []
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(self._speak_stage(sentences))
+                try:
+                    await self._generate_stage(user_text, sentences, streams, tg)
+                finally:
+                    sentences.put_nowait(None)
+            await self._wait_for_playback()
+        except asyncio.CancelledError:
+            for stream in streams:
+                self.gemini_service.discard_reply(stream.content)
+            raise
+        finally:
+            self._end_speaking()
+
+    async def _command_turn(
+        self,
+        user_text: str,
+        command: Dict[str, Any],
+        speech_end: Optional[float],
+    ) -> None:
+        """
+        Runs a command's action within the turn, so barge-in and pause cancel
+        it like any other reply, then answers locally or through the LLM.
 
-        if response_text and tool_calls:
-            self._execute_tools_during_speech(response_text, tool_calls)
-        elif response_text:
-            self.audio_service.text_to_speech(
-                response_text, callback=self._complete_turn
-            )
-        elif tool_calls:
-            self._execute_tools_and_follow_up(tool_calls)
+        Args:
+            user_text: The user's transcript.
+            command: The matched command.
+            speech_end: When the user stopped speaking, from
+                `time.perf_counter()`, None if unknown.
+        """
+        reply = await self.tool_executor.run(self.command_router.execute, command)
+        if command["forward"]:
+            print(f"Command '{command['name']}' ran locally, forwarding to the model")
+            await self._reply_turn(user_text)
         else:
-            self._complete_turn()
+            await self._local_turn(user_text, command, reply, speech_end)
+
+    async def _local_turn(
+        self,
+        user_text: str,
+        command: Dict[str, Any],
+        reply: Optional[str],
+        speech_end: Optional[float],
+    ) -> None:
+        """
+        Speaks the reply to a locally handled command.
 
-    def _execute_tools_during_speech(
-        self, response_text: str, tool_calls: List[types.FunctionCall]
+        Args:
+            user_text: The user's transcript.
+            command: The matched command.
+            reply: The reply produced by the command.
+            speech_end: When the user stopped speaking, from
+                `time.perf_counter()`, None if unknown.
+        """
+        self._begin_speaking()
+        try:
+            spoken = True
+            if command["action"] == "repeat":
+                reply = self.audio_service.last_tts_text
+                self.audio_service.repeat_last_speech()
+            elif reply:
+                await self._speak(reply)
+            else:
+                spoken = False
+            self.gemini_service.add_local_turn(user_text, reply)
+            if speech_end is not None:
+                answered = time.perf_counter()
+                if spoken:
+                    answered += self.audio_controller.get_output_latency()
+                print(
+                    f"Command '{command['name']}' answered locally "
+                    f"{(answered - speech_end) * 1000:.0f} ms after the end of speech"
+                )
+            await self._wait_for_playback()
+        finally:
+            self._end_speaking()
+
+    async def _generate_stage(
+        self,
+        user_text: str,
+        sentences: "asyncio.Queue[Optional[str]]",
+        streams: List[AsyncResponseStream],
+        tg: asyncio.TaskGroup,
     ) -> None:
         """
-        Executes tools immediately while speech is playing.
+        Streams the reply, and if it consists only of tool calls, runs them
+        and streams the follow-up.
 
         Args:
-            response_text: The text to speak
-            tool_calls: A list of tool calls to execute during speech.
+            user_text: The message to send.
+            sentences: The queue feeding the speech stage.
+            streams: Collects every stream started for the turn.
+            tg: The turn's task group, for tools run during speech.
+        """
+        stream: Optional[AsyncResponseStream] = self.gemini_service.astream_with_gemini(
+            user_text
+        )
+        while stream is not None:
+            streams.append(stream)
+            spoken, tool_calls = await self._stream_sentences(stream, sentences, tg)
+            if spoken or not tool_calls:
+                return
+            await self._execute_tools(tool_calls)
+            stream = self.gemini_service.astream_tool_follow_up()
+
+    async def _stream_sentences(
+        self,
+        stream: AsyncResponseStream,
+        sentences: "asyncio.Queue[Optional[str]]",
+        tg: asyncio.TaskGroup,
+    ) -> Tuple[bool, List[types.FunctionCall]]:
         """
+        Hands each complete sentence to the speech stage while the reply is
+        still generating.
 
-        def execute_tools_immediately():
-            for tool_call in tool_calls:
-                result = self.tool_registry.execute_function(tool_call)
-                print(f"Tool executed during speech: {tool_call.name} -> {result}")
+        Tool calls are started alongside the speech once something has been
+        said; calls in a reply without text are returned for a follow-up.
+        Calls still pending when the reply fails are skipped, since the
+        history has no call for their results to answer.
 
-        threading.Thread(target=execute_tools_immediately, daemon=True).start()
-        self.audio_service.text_to_speech(response_text, callback=self._complete_turn)
+        Args:
+            stream: The streamed LLM reply.
+            sentences: The queue feeding the speech stage.
+            tg: The turn's task group, for tools run during speech.
 
-    def _execute_tools_and_follow_up(
-        self, tool_calls: List[types.FunctionCall]
-    ) -> None:
+        Returns:
+            Tuple[bool, List[types.FunctionCall]]: Whether anything was spoken,
+            and the tool calls still to be run.
         """
-        Executes tools and generates a follow-up response.
+        start_time = time.perf_counter()
+        buffer = ""
+        spoken = False
+        tool_calls: List[types.FunctionCall] = []
+        reply_recorded: "asyncio.Future[bool]" = (
+            asyncio.get_running_loop().create_future()
+        )
+
+        try:
+            async for item in stream:
+                if isinstance(item, types.FunctionCall):
+                    tool_calls.append(item)
+                else:
+                    complete, buffer = split_sentences(buffer + item)
+                    for sentence in complete:
+                        if not spoken:
+                            print(
+                                "First sentence ready after "
+                                f"{(time.perf_counter() - start_time) * 1000:.0f} ms"
+                            )
+                        sentences.put_nowait(sentence)
+                        spoken = True
+                if spoken and tool_calls:
+                    tg.create_task(self._execute_tools(tool_calls, reply_recorded))
+                    tool_calls = []
+        except Exception as e:
+            print(f"Gemini request failed: {e}")
+        finally:
+            if not reply_recorded.done():
+                reply_recorded.set_result(stream.content is not None)
+
+        if stream.content is None and tool_calls:
+            print(f"The reply failed, skipping its {len(tool_calls)} tool calls")
+            tool_calls = []
+        if buffer.strip():
+            sentences.put_nowait(buffer.strip())
+            spoken = True
+        if spoken and tool_calls:
+            tg.create_task(self._execute_tools(tool_calls, reply_recorded))
+            tool_calls = []
+        return spoken, tool_calls
+
+    async def _speak_stage(self, sentences: "asyncio.Queue[Optional[str]]") -> None:
+        """
+        Synthesizes sentences on an executor and queues them for playback.
 
         Args:
-            tool_calls: A list of tool calls to execute.
+            sentences: The sentences to speak, ended by None.
         """
-        tool_results = []
-        for tool_call in tool_calls:
-            result = self.tool_registry.execute_function(tool_call)
-            tool_results.append({"function_name": tool_call.name, "result": result})
-            print(f"Tool executed: {tool_call.name} -> {result}")
+        while True:
+            sentence = await sentences.get()
+            if sentence is None:
+                return
+            await self._speak(sentence)
 
-        if tool_results:
-            tool_context = self._format_tool_results(tool_results)
-            follow_up_response = self.gemini_service.generate_tool_follow_up(
-                tool_context
+    async def _speak(self, text: str) -> None:
+        """
+        Synthesizes one piece of text off the event loop and queues it.
+
+        Args:
+            text: The text to speak.
+        """
+        audio_data = await asyncio.get_running_loop().run_in_executor(
+            self._tts_executor, self.audio_service.prepare_speech, text
+        )
+        self.audio_service.play_speech(text, audio_data)
+        if audio_data is not None and self._awaiting_first_audio:
+            self._awaiting_first_audio = False
+            output_latency = self.audio_controller.get_output_latency()
+            self.tracer.mark(
+                "first_audio_out",
+                at=time.perf_counter() + output_latency,
+                output_latency_ms=round(output_latency * 1000),
             )
-            self._handle_ai_response(follow_up_response)
-        else:
-            self._complete_turn()
 
-    def _format_tool_results(
-        self, tool_results: List[Dict[str, Union[str, int]]]
-    ) -> str:
+    async def _wait_for_playback(self) -> None:
+        """
+        Waits until all queued speech has left the speakers.
+
+        The completion callback already allows for the output latency, so only
+        a short padding is added before listening resumes.
         """
-        Formats tool results into a context message for the LLM.
+        loop = asyncio.get_running_loop()
+        done: "asyncio.Future[None]" = loop.create_future()
+        self.audio_controller.notify_when_tts_done(
+            lambda: self._call_on_loop(_resolve, done)
+        )
+        await done
+        await asyncio.sleep(TURN_TAIL_PADDING)
+
+    async def _execute_tools(
+        self,
+        tool_calls: List[types.FunctionCall],
+        reply_recorded: Optional["asyncio.Future[bool]"] = None,
+    ) -> None:
+        """
+        Executes a batch of tools concurrently where they do not depend on
+        each other, and answers the calls in the history.
 
         Args:
-            tool_results: A list of tool results.
+            tool_calls: A list of tool calls to execute.
+            reply_recorded: For calls started while their reply is still
+                streaming, resolves to whether the reply reached the history.
+                The results wait for it, since a function response must
+                follow its call.
+        """
+        results = await self.tool_executor.execute(tool_calls)
+        if reply_recorded is not None and not await reply_recorded:
+            print("The reply calling the tools failed, dropping their results")
+            return
+        self.gemini_service.add_tool_results(tool_calls, results)
 
-        Returns:
-            A formatted string of tool results.
-        """
-        if not tool_results:
-            return ""
-        context_parts = [
-            f"Tool '{result['function_name']}' executed: {result['result']}"
-            for result in tool_results
-        ]
-        return (
-            "Tool execution results: "
-            + "; ".join(context_parts)
-            + ". Now respond to the user based on these results."
+    def _begin_speaking(self) -> None:
+        """
+        Mutes listening while the assistant takes its turn.
+        """
+        self.audio_service.set_kai_is_speaking(True)
+
+    def _end_speaking(self) -> None:
+        """
+        Hands the floor back to the user and restores the background audio.
+        """
+        self.audio_service.set_kai_is_speaking(False)
+        print("Turn completed - ready for user input")
+        asyncio.get_running_loop().run_in_executor(
+            None, self.audio_controller.restore_background_after_tts
         )
 
-    def _complete_turn(self) -> None:
+    def _resume_listening(self) -> None:
+        """
+        Lets the listen stage pick up the next utterance unless paused.
+        """
+        if not self.paused:
+            self._listening.set()
+
+    def _interrupt_turn(self, reason: str) -> None:
+        """
+        Cancels the turn in flight and silences the assistant immediately.
+
+        Args:
+            reason: Why the turn is being interrupted, for the log.
         """
-        Completes the assistant's turn and allows user input again.
+        if self._turn_task is None or self._turn_task.done():
+            return
+        self._turn_task.cancel()
+        self.audio_controller.stop_tts_audio()
+        self.audio_service.set_kai_is_speaking(False)
+        print(f"Turn interrupted by {reason}")
+
+    def _handle_barge_in(self) -> None:
         """
+        Cancels the assistant's turn when the user starts talking over it.
+        """
+        if self.running:
+            self._call_on_loop(self._interrupt_turn, "barge-in")
 
-        def delayed_turn_completion():
-            threading.Event().wait(1.5)
-            self.audio_service.set_kai_is_speaking(False)
-            self.audio_controller.restore_background_after_tts()
-            self.turn_complete_event.set()
-            print("Turn completed - ready for user input")
+    def set_paused(self, paused: bool) -> None:
+        """
+        Pauses or resumes the conversation, cancelling the turn in flight.
 
-        threading.Thread(target=delayed_turn_completion, daemon=True).start()
+        Args:
+            paused: Whether the conversation should be paused.
+        """
+        self.paused = paused
+        self.audio_service.set_listening_paused(paused)
+        self._call_on_loop(self._apply_pause, paused)
+
+    def _apply_pause(self, paused: bool) -> None:
+        """
+        Applies a pause change on the event loop.
+
+        Args:
+            paused: Whether the conversation is paused.
+        """
+        if paused:
+            self._listening.clear()
+            self._interrupt_turn("pause")
+        elif self._turn_task is None:
+            self._resume_listening()
 
     def is_speaking(self) -> bool:
         """
@@ -206,11 +610,19 @@ class ConversationService:
         Returns:
             True if speaking, False otherwise.
         """
-        return not self.turn_complete_event.is_set()
+        return self.audio_service.kai_is_speaking
 
     def stop(self) -> None:
         """
         Stops the conversation manager.
         """
         self.running = False
-        self.turn_complete_event.set()
+        main_task = self._main_task
+        if main_task is not None:
+            self._call_on_loop(main_task.cancel)
+        self.audio_service.close()
+        self.gemini_service.close()
+        self.tool_executor.close()
+        for executor in (self._stt_executor, self._tts_executor):
+            executor.shutdown(wait=False, cancel_futures=True)
+        self.tracer.close()
@@ -1,22 +1,267 @@
-import os
-from typing import List
+import asyncio
+import threading
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Union,
+)
 
-import google.genai as genai
 from google.genai import types
 
-from managers.state_manager import StateManager, get_resource_path
+from managers.state_manager import StateManager
+from services.history_manager import HistoryManager
+from services.latency_tracer import LatencyTracer
+from services.llm_backend import LLMBackend, create_backend, prepend_chunk
+from services.model_router import ModelRouter
+from services.prompt_builder import PromptBuilder
+from services.prompt_cache import PromptCache
+from services.resilient_backend import ResilientBackend
+from services.usage_tracker import UsageTracker
 
+KEEPALIVE_INTERVAL = 45.0
+MAX_KEEPALIVE_IDLE = 600.0
 
-def load_system_prompt() -> str:
-    """
-    Loads the system prompt from the prompts directory.
+
+def tool_response_part(
+    tool_call: types.FunctionCall, result: Union[str, Dict[str, Any]]
+) -> types.Part:
+    """Wraps a tool result as a function response with a compact payload.
+
+    Dictionaries are sent as they are minus empty fields, anything else as
+    `{"result": ...}`.
+
+    Args:
+        tool_call (types.FunctionCall): The call being answered.
+        result (Union[str, Dict[str, Any]]): What the tool returned.
 
     Returns:
-        str: The system prompt content.
+        types.Part: The function response part.
+    """
+    if isinstance(result, dict):
+        payload = {
+            key: value for key, value in result.items() if value not in (None, "")
+        }
+    else:
+        payload = {"result": result}
+    return types.Part(
+        function_response=types.FunctionResponse(
+            id=tool_call.id, name=tool_call.name, response=payload
+        )
+    )
+
+
+class ResponseStream:
+    """
+    Iterates over a streamed Gemini reply as text deltas and function calls.
+    """
+
+    def __init__(
+        self,
+        chunks: Iterable[types.GenerateContentResponse],
+        on_complete: Callable[["ResponseStream"], None],
+        fallback: Optional[
+            Callable[[], Iterable[types.GenerateContentResponse]]
+        ] = None,
+        on_error: Optional[Callable[["ResponseStream"], None]] = None,
+    ) -> None:
+        self._chunks = chunks
+        self._on_complete = on_complete
+        self._fallback = fallback
+        self._on_error = on_error
+        self.content: Optional[types.Content] = None
+        self.usage_metadata: Optional[types.GenerateContentResponseUsageMetadata] = None
+        self.time_to_first_chunk: Optional[float] = None
+        self.duration: Optional[float] = None
+        self.start_time: float = 0.0
+        self.interrupted: bool = False
+        self._text: str = ""
+        self._call_parts: List[types.Part] = []
+
+    def __iter__(self) -> Iterator[Union[str, types.FunctionCall]]:
+        """
+        Yields each text delta and function call as soon as it arrives.
+
+        `on_complete` is called with the finished stream only if it is
+        consumed to the end, so an abandoned stream leaves nothing in the
+        history. A failed request is reported to `on_error` before the error
+        propagates, and so is one that is abandoned, with `interrupted` set.
+
+        Yields:
+            Union[str, types.FunctionCall]: The next piece of the reply.
+        """
+        self.start_time = time.perf_counter()
+        try:
+            for chunk in self._iter_chunks():
+                yield from self._accept(chunk)
+        except Exception:
+            self._fail()
+            raise
+        except BaseException:
+            self._fail(interrupted=True)
+            raise
+        self._finish()
+
+    def _accept(
+        self, chunk: types.GenerateContentResponse
+    ) -> List[Union[str, types.FunctionCall]]:
+        """Records one chunk and returns the pieces of the reply it carries.
+
+        Args:
+            chunk (types.GenerateContentResponse): The streamed chunk.
+
+        Returns:
+            List[Union[str, types.FunctionCall]]: Its text deltas and function calls.
+        """
+        if self.time_to_first_chunk is None:
+            self.time_to_first_chunk = time.perf_counter() - self.start_time
+        if chunk.usage_metadata:
+            self.usage_metadata = chunk.usage_metadata
+        if not (
+            chunk.candidates
+            and chunk.candidates[0].content
+            and chunk.candidates[0].content.parts
+        ):
+            return []
+        items: List[Union[str, types.FunctionCall]] = []
+        for part in chunk.candidates[0].content.parts:
+            if part.text:
+                self._text += part.text
+                items.append(part.text)
+            elif part.function_call:
+                self._call_parts.append(part)
+                items.append(part.function_call)
+        return items
+
+    def _finish(self) -> None:
+        """
+        Assembles the complete reply and hands the stream to `on_complete`.
+        """
+        self.duration = time.perf_counter() - self.start_time
+        parts = [types.Part.from_text(text=self._text)] if self._text else []
+        self.content = types.ModelContent(parts=parts + self._call_parts)
+        self._on_complete(self)
+
+    def _fail(self, interrupted: bool = False) -> None:
+        """
+        Notes how long a failed request took and hands the stream to `on_error`.
+
+        Args:
+            interrupted (bool): Whether the request was cancelled or abandoned
+                rather than failing.
+        """
+        self.duration = time.perf_counter() - self.start_time
+        self.interrupted = interrupted
+        if self._on_error is not None:
+            self._on_error(self)
+
+    def _iter_chunks(self) -> Iterator[types.GenerateContentResponse]:
+        """
+        Yields the raw chunks, retrying once via the fallback if the request
+        fails before anything arrived.
+
+        Yields:
+            types.GenerateContentResponse: The next streamed chunk.
+        """
+        chunks = iter(self._chunks)
+        try:
+            first = next(chunks)
+        except StopIteration:
+            return
+        except Exception as e:
+            if self._fallback is None:
+                raise
+            print(f"Streamed request failed ({e}), retrying without the prompt cache")
+            chunks = iter(self._fallback())
+            try:
+                first = next(chunks)
+            except StopIteration:
+                return
+        yield first
+        yield from chunks
+
+
+class AsyncResponseStream(ResponseStream):
     """
-    prompt_path = get_resource_path("src/prompts/system_prompt.md")
-    with open(prompt_path, "r") as file:
-        return file.read()
+    Async counterpart of `ResponseStream` for requests sent from the event loop.
+
+    The request is only sent once iteration starts, and cancelling the
+    consuming task closes the underlying HTTP stream.
+    """
+
+    def __init__(
+        self,
+        open_stream: Callable[
+            [], Awaitable[AsyncIterator[types.GenerateContentResponse]]
+        ],
+        on_complete: Callable[["ResponseStream"], None],
+        fallback: Optional[
+            Callable[[], Awaitable[AsyncIterator[types.GenerateContentResponse]]]
+        ] = None,
+        on_error: Optional[Callable[["ResponseStream"], None]] = None,
+    ) -> None:
+        super().__init__([], on_complete, on_error=on_error)
+        self._open_stream = open_stream
+        self._async_fallback = fallback
+
+    async def __aiter__(self) -> AsyncIterator[Union[str, types.FunctionCall]]:
+        """
+        Yields each text delta and function call as soon as it arrives.
+
+        A cancelled or abandoned stream is reported to `on_error` with
+        `interrupted` set, like in `ResponseStream`.
+
+        Yields:
+            Union[str, types.FunctionCall]: The next piece of the reply.
+        """
+        self.start_time = time.perf_counter()
+        try:
+            chunks = await self._open_chunks()
+            try:
+                async for chunk in chunks:
+                    for item in self._accept(chunk):
+                        yield item
+            finally:
+                await chunks.aclose()
+        except Exception:
+            self._fail()
+            raise
+        except BaseException:
+            self._fail(interrupted=True)
+            raise
+        self._finish()
+
+    async def _open_chunks(self) -> AsyncIterator[types.GenerateContentResponse]:
+        """
+        Starts the request, retrying once via the fallback if it fails before
+        anything arrived.
+
+        Returns:
+            AsyncIterator[types.GenerateContentResponse]: The streamed chunks,
+            with the first one already received.
+        """
+        try:
+            chunks = await self._open_stream()
+            first = await anext(chunks)
+        except StopAsyncIteration:
+            return prepend_chunk(None, chunks)
+        except Exception as e:
+            if self._async_fallback is None:
+                raise
+            print(f"Streamed request failed ({e}), retrying without the prompt cache")
+            chunks = await self._async_fallback()
+            try:
+                first = await anext(chunks)
+            except StopAsyncIteration:
+                return prepend_chunk(None, chunks)
+        return prepend_chunk(first, chunks)
 
 
 class GeminiService:
@@ -24,75 +269,483 @@ class GeminiService:
     Handles all communication with the Gemini LLM.
     """
 
-    def __init__(self, state_manager: StateManager, tools: List[types.Tool]) -> None:
+    def __init__(
+        self,
+        state_manager: StateManager,
+        tools: List[types.Tool],
+        backend: Optional[LLMBackend] = None,
+        router: Optional[ModelRouter] = None,
+        tracer: Optional[LatencyTracer] = None,
+        usage: Optional[UsageTracker] = None,
+    ) -> None:
         self.state_manager = state_manager
         self.tools = tools
-        self.client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
-        self.conversation_history: List[types.Content] = []
+        self.backend = backend or ResilientBackend(create_backend())
+        self.router = router or ModelRouter()
+        self.tracer = tracer
+        self.usage = usage or UsageTracker()
+        self.turn: int = 0
+        self._last_request: float = time.monotonic()
+        threading.Thread(target=self.backend.warm_up, daemon=True).start()
+        self.prompt_cache: Optional[PromptCache] = None
+        if self.backend.client is not None:
+            self.prompt_cache = PromptCache(self.backend.client)
+        self.prompt_builder = PromptBuilder(
+            state_manager, tools, prompt_cache=self.prompt_cache
+        )
+        self.history = HistoryManager(
+            self.backend, router=self.router, usage=self.usage
+        )
 
-    def generate_with_gemini(self, user_message: str) -> types.GenerateContentResponse:
+    def _start_turn(self, user_message: str) -> None:
         """
-        Generates a response from the Gemini LLM.
+        Starts a new turn in the history with the user's message.
 
         Args:
             user_message (str): The user's message.
+        """
+        self.turn += 1
+        self.history.start_turn(
+            types.UserContent(parts=[types.Part.from_text(text=user_message)])
+        )
+
+    def _connection_state(self, aio: bool) -> Optional[str]:
+        """
+        Notes that a request is starting and whether it can reuse a connection.
+
+        Args:
+            aio (bool): Whether the request is sent from the event loop.
 
         Returns:
-            types.GenerateContentResponse: The response from the Gemini LLM.
+            Optional[str]: "warm" or "cold", None if the backend has no connection.
+        """
+        self._last_request = time.monotonic()
+        warm = self.backend.is_warm(aio)
+        if warm is None:
+            return None
+        return "warm" if warm else "cold"
+
+    async def awarm_up(self) -> None:
+        """
+        Opens the event loop's connection to the API ahead of the first request.
+        """
+        await self.backend.awarm_up()
+
+    async def keep_alive(
+        self,
+        interval: float = KEEPALIVE_INTERVAL,
+        max_idle: float = MAX_KEEPALIVE_IDLE,
+    ) -> None:
+        """
+        Pings the API while the conversation is idle so the next request
+        finds its connection open. Pings stop once nothing has been sent for
+        `max_idle` seconds, e.g. while the session is paused.
+
+        Args:
+            interval (float): Seconds of idleness between pings.
+            max_idle (float): Seconds of idleness after which pinging stops.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            idle = time.monotonic() - self._last_request
+            if interval <= idle <= max_idle:
+                await self.backend.awarm_up()
+
+    def _request_contents(self, model: str) -> List[types.Content]:
         """
-        system_prompt = load_system_prompt()
-        progress_context = self.state_manager.get_context_summary()
-        if progress_context:
-            system_prompt += f"\n\n## Current Progress Context:\n{progress_context}"
+        Builds the contents for the next request and logs their estimated size.
+
+        Args:
+            model (str): The model the request is routed to.
 
-        user_content = types.UserContent(
-            parts=[types.Part.from_text(text=user_message)]
+        Returns:
+            List[types.Content]: The summarised history followed by recent turns.
+        """
+        contents = self.history.contents()
+        print(
+            f"Sending {self.history.turn_count()} turns to {model}"
+            f"{' + summary' if self.history.summary else ''}, "
+            f"~{self.history.last_request_tokens} history tokens"
         )
-        self.conversation_history.append(user_content)
+        return contents
+
+    def _record_reply(self, content: Optional[types.Content]) -> None:
+        """
+        Adds a completed reply to the history.
+
+        Args:
+            content (Optional[types.Content]): The model's reply.
+        """
+        if content is not None and content.parts:
+            self.history.append(content)
+
+    def _finish_request(
+        self,
+        request_type: str,
+        model: str,
+        start_time: float,
+        time_to_first_chunk: Optional[float],
+        usage_metadata: Optional[types.GenerateContentResponseUsageMetadata],
+        ok: bool,
+        connection: Optional[str] = None,
+        interrupted: bool = False,
+    ) -> None:
+        """
+        Reports a finished or failed request to the router, the usage
+        accounting and the latency trace.
 
-        generation_config = types.GenerateContentConfig(
-            system_instruction=system_prompt, tools=self.tools, temperature=0.7
+        Args:
+            request_type (str): The kind of request.
+            model (str): The model the request went to.
+            start_time (float): When the request was sent.
+            time_to_first_chunk (Optional[float]): Seconds to the first chunk,
+                None for blocking requests.
+            usage_metadata: Token usage reported for the request, if any; for
+                an interrupted request, what was reported before it stopped.
+            ok (bool): Whether the request completed.
+            connection (Optional[str]): "cold" or "warm", None if unknown.
+            interrupted (bool): Whether the request was cancelled before it
+                completed, so its total latency says nothing about the model.
+        """
+        end_time = time.perf_counter()
+        if interrupted:
+            self.router.record_interrupted(model, time_to_first_chunk, request_type)
+        else:
+            self.router.record(
+                model, time_to_first_chunk, end_time - start_time, request_type
+            )
+        usage: Optional[types.GenerateContentResponseUsageMetadata] = None
+        if ok:
+            usage = usage_metadata or types.GenerateContentResponseUsageMetadata()
+        elif interrupted:
+            usage = usage_metadata
+        self.usage.record(
+            model,
+            request_type,
+            usage,
+            end_time - start_time,
+            time_to_first_chunk,
+            turn=self.turn,
+            history_tokens=self.history.last_request_tokens,
+            connection=connection,
+            interrupted=interrupted,
         )
+        if self.tracer is None:
+            return
+        if time_to_first_chunk is not None:
+            self.tracer.mark(
+                "llm_first_token",
+                at=start_time + time_to_first_chunk,
+                model=model,
+                request_type=request_type,
+            )
+        self.tracer.record(
+            "llm_request",
+            start_time,
+            end_time,
+            model=model,
+            request_type=request_type,
+            ttft_ms=(
+                None
+                if time_to_first_chunk is None
+                else round(time_to_first_chunk * 1000)
+            ),
+            prompt_tokens=usage_metadata.prompt_token_count if usage_metadata else None,
+            connection=connection,
+            ok=ok,
+        )
+
+    def _stream_callbacks(
+        self, request_type: str, model: str, connection: Optional[str]
+    ) -> Dict[str, Any]:
+        """
+        Builds the callbacks that record a streamed reply and its latency.
+
+        Args:
+            request_type (str): The kind of request.
+            model (str): The model the request went to.
+            connection (Optional[str]): "cold" or "warm", None if unknown.
 
-        response = self.client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=self.conversation_history,
-            config=generation_config,
+        Returns:
+            Dict[str, Any]: The `on_complete` and `on_error` stream arguments.
+        """
+
+        def on_complete(stream: ResponseStream) -> None:
+            self._finish_request(
+                request_type,
+                model,
+                stream.start_time,
+                stream.time_to_first_chunk,
+                stream.usage_metadata,
+                ok=True,
+                connection=connection,
+            )
+            self._record_reply(stream.content)
+
+        def on_error(stream: ResponseStream) -> None:
+            self._finish_request(
+                request_type,
+                model,
+                stream.start_time,
+                stream.time_to_first_chunk,
+                stream.usage_metadata,
+                ok=False,
+                connection=connection,
+                interrupted=stream.interrupted,
+            )
+
+        return {"on_complete": on_complete, "on_error": on_error}
+
+    def _stream(
+        self, request_type: str, include_progress: bool = True
+    ) -> ResponseStream:
+        """
+        Starts a streamed request over the current history.
+
+        Args:
+            request_type (str): The kind of request, which picks the model.
+            include_progress (bool): Whether the request carries the progress context.
+
+        Returns:
+            ResponseStream: The reply as text deltas and function calls.
+        """
+        model = self.router.choose(request_type)
+        config, prefix = self.prompt_builder.build_request(model, include_progress)
+        history = self._request_contents(model)
+        connection = self._connection_state(aio=False)
+
+        fallback = None
+        if config.cached_content:
+
+            def fallback() -> Iterable[types.GenerateContentResponse]:
+                self.prompt_cache.invalidate(model)
+                return self.backend.generate_content_stream(
+                    model=model,
+                    contents=history,
+                    config=self.prompt_builder.get_config(include_progress),
+                )
+
+        return ResponseStream(
+            self.backend.generate_content_stream(
+                model=model, contents=prefix + history, config=config
+            ),
+            fallback=fallback,
+            **self._stream_callbacks(request_type, model, connection),
         )
 
-        if response.candidates and response.candidates[0].content:
-            self.conversation_history.append(response.candidates[0].content)
+    def _astream(
+        self, request_type: str, include_progress: bool = True
+    ) -> AsyncResponseStream:
+        """
+        Prepares a streamed request over the current history from the event loop.
 
-        return response
+        Args:
+            request_type (str): The kind of request, which picks the model.
+            include_progress (bool): Whether the request carries the progress context.
+
+        Returns:
+            AsyncResponseStream: The reply as text deltas and function calls.
+        """
+        model = self.router.choose(request_type)
+        config, prefix = self.prompt_builder.build_request(model, include_progress)
+        history = self._request_contents(model)
+        connection = self._connection_state(aio=True)
+
+        def open_stream() -> Awaitable[AsyncIterator[types.GenerateContentResponse]]:
+            return self.backend.agenerate_content_stream(
+                model=model, contents=prefix + history, config=config
+            )
 
-    def generate_tool_follow_up(
-        self, tool_context: str
+        fallback = None
+        if config.cached_content:
+
+            def fallback() -> Awaitable[AsyncIterator[types.GenerateContentResponse]]:
+                self.prompt_cache.invalidate(model)
+                return self.backend.agenerate_content_stream(
+                    model=model,
+                    contents=history,
+                    config=self.prompt_builder.get_config(include_progress),
+                )
+
+        return AsyncResponseStream(
+            open_stream,
+            fallback=fallback,
+            **self._stream_callbacks(request_type, model, connection),
+        )
+
+    def _generate(
+        self, request_type: str, include_progress: bool = True
     ) -> types.GenerateContentResponse:
         """
-        Generates a follow-up response after a tool has been executed.
+        Sends a blocking request over the current history.
 
         Args:
-            tool_context (str): The context from the tool's execution.
+            request_type (str): The kind of request, which picks the model.
+            include_progress (bool): Whether the request carries the progress context.
 
         Returns:
             types.GenerateContentResponse: The response from the Gemini LLM.
         """
-        tool_content = types.UserContent(
-            parts=[types.Part.from_text(text=tool_context)]
+        model = self.router.choose(request_type)
+        config, prefix = self.prompt_builder.build_request(model, include_progress)
+        history = self._request_contents(model)
+        connection = self._connection_state(aio=False)
+        start_time = time.perf_counter()
+        try:
+            try:
+                response = self.backend.generate_content(
+                    model=model, contents=prefix + history, config=config
+                )
+            except Exception as e:
+                if not config.cached_content:
+                    raise
+                print(f"Request failed ({e}), retrying without the prompt cache")
+                self.prompt_cache.invalidate(model)
+                response = self.backend.generate_content(
+                    model=model,
+                    contents=history,
+                    config=self.prompt_builder.get_config(include_progress),
+                )
+        except Exception:
+            self._finish_request(
+                request_type, model, start_time, None, None, False, connection
+            )
+            raise
+        self._finish_request(
+            request_type,
+            model,
+            start_time,
+            None,
+            response.usage_metadata,
+            True,
+            connection,
         )
-        self.conversation_history.append(tool_content)
 
-        generation_config = types.GenerateContentConfig(
-            system_instruction=load_system_prompt(), tools=self.tools, temperature=0.7
+        self._record_reply(
+            response.candidates[0].content if response.candidates else None
         )
+        return response
+
+    def generate_with_gemini(self, user_message: str) -> types.GenerateContentResponse:
+        """
+        Generates a response from the Gemini LLM.
+
+        Args:
+            user_message (str): The user's message.
+
+        Returns:
+            types.GenerateContentResponse: The response from the Gemini LLM.
+        """
+        self._start_turn(user_message)
+
+        return self._generate("chat")
+
+    def stream_with_gemini(self, user_message: str) -> ResponseStream:
+        """
+        Streams a response from the Gemini LLM as it is generated.
+
+        Args:
+            user_message (str): The user's message.
 
-        follow_up_response = self.client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=self.conversation_history,
-            config=generation_config,
+        Returns:
+            ResponseStream: The reply as text deltas and function calls.
+        """
+        self._start_turn(user_message)
+        return self._stream("chat")
+
+    def astream_with_gemini(self, user_message: str) -> AsyncResponseStream:
+        """
+        Streams a response from the Gemini LLM from the event loop.
+
+        Args:
+            user_message (str): The user's message.
+
+        Returns:
+            AsyncResponseStream: The reply as text deltas and function calls.
+        """
+        self._start_turn(user_message)
+        return self._astream("chat")
+
+    def discard_reply(self, content: Optional[types.Content]) -> None:
+        """
+        Removes a reply the user never heard from the conversation history.
+
+        Args:
+            content (Optional[types.Content]): The discarded reply.
+        """
+        if content is not None:
+            self.history.remove(content)
+
+    def add_local_turn(self, user_message: str, reply: Optional[str]) -> None:
+        """
+        Records an exchange that was handled locally so the model keeps context.
+
+        Args:
+            user_message (str): The user's message.
+            reply (Optional[str]): What was said in reply, if anything.
+        """
+        self._start_turn(user_message)
+        if reply:
+            self.history.append(
+                types.ModelContent(parts=[types.Part.from_text(text=reply)])
+            )
+
+    def add_tool_results(
+        self,
+        tool_calls: List[types.FunctionCall],
+        results: List[Union[str, Dict[str, Any]]],
+    ) -> None:
+        """
+        Answers the model's function calls with their results in the history.
+
+        Args:
+            tool_calls (List[types.FunctionCall]): The calls that were executed.
+            results (List[Union[str, Dict[str, Any]]]): Their results, in call order.
+        """
+        if not tool_calls:
+            return
+        self.history.append(
+            types.UserContent(
+                parts=[
+                    tool_response_part(tool_call, result)
+                    for tool_call, result in zip(tool_calls, results)
+                ]
+            )
         )
 
-        if follow_up_response.candidates and follow_up_response.candidates[0].content:
-            self.conversation_history.append(follow_up_response.candidates[0].content)
+    def generate_tool_follow_up(self) -> types.GenerateContentResponse:
+        """
+        Generates a follow-up response to the tool results in the history.
+
+        Returns:
+            types.GenerateContentResponse: The response from the Gemini LLM.
+        """
+        return self._generate("tool_follow_up")
+
+    def stream_tool_follow_up(self) -> ResponseStream:
+        """
+        Streams a follow-up response to the tool results in the history.
 
-        return follow_up_response
+        Returns:
+            ResponseStream: The reply as text deltas and function calls.
+        """
+        return self._stream("tool_follow_up")
+
+    def astream_tool_follow_up(self) -> AsyncResponseStream:
+        """
+        Streams a follow-up response to the tool results from the event loop.
+
+        Returns:
+            AsyncResponseStream: The reply as text deltas and function calls.
+        """
+        return self._astream("tool_follow_up")
+
+    def close(self) -> None:
+        """
+        Logs the session's token usage and releases the server-side prompt
+        caches and the backend.
+        """
+        self.usage.report()
+        if self.prompt_cache is not None:
+            self.prompt_cache.close()
+        self.backend.close()
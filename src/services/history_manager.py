@@ -0,0 +1,279 @@
+import json
+import threading
+import time
+from typing import TYPE_CHECKING, List, Optional
+
+from google.genai import types
+
+if TYPE_CHECKING:
+    from services.llm_backend import LLMBackend
+    from services.model_router import ModelRouter
+    from services.usage_tracker import UsageTracker
+
+SUMMARY_MODEL = "gemini-2.0-flash"
+SUMMARY_PROMPT = (
+    "Summarise this hearing-training conversation between a user and the coach "
+    "Kai for Kai's own memory. Keep exercises run, sounds played, the user's "
+    "answers and difficulties, and anything Kai promised to do next. Use at "
+    "most 150 words.\n\n"
+)
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(content: types.Content) -> int:
+    """Roughly estimates the tokens a content entry adds to a request.
+
+    Args:
+        content (types.Content): The history entry.
+
+    Returns:
+        int: The estimated token count.
+    """
+    chars = 0
+    for part in content.parts or []:
+        if part.text:
+            chars += len(part.text)
+        elif part.function_call:
+            chars += len(part.function_call.name or "")
+            chars += len(json.dumps(part.function_call.args or {}, default=str))
+        elif part.function_response:
+            chars += len(part.function_response.name or "")
+            chars += len(json.dumps(part.function_response.response or {}, default=str))
+    return chars // CHARS_PER_TOKEN + 4
+
+
+def _render_turn(turn: List[types.Content]) -> str:
+    """Formats one turn as plain text for the summariser.
+
+    Args:
+        turn (List[types.Content]): The contents that make up the turn.
+
+    Returns:
+        str: One line per message.
+    """
+    lines = []
+    for content in turn:
+        speaker = "Kai" if content.role == "model" else "User"
+        for part in content.parts or []:
+            if part.text:
+                lines.append(f"{speaker}: {part.text.strip()}")
+            elif part.function_call:
+                lines.append(f"Kai called {part.function_call.name}")
+            elif part.function_response:
+                lines.append(
+                    f"{part.function_response.name} returned "
+                    f"{json.dumps(part.function_response.response, default=str)}"
+                )
+    return "\n".join(lines)
+
+
+def _is_function_response(content: types.Content) -> bool:
+    """Checks whether an entry only carries function responses.
+
+    Args:
+        content (types.Content): The history entry.
+
+    Returns:
+        bool: True if every part is a function response.
+    """
+    return bool(content.parts) and all(part.function_response for part in content.parts)
+
+
+class HistoryManager:
+    """
+    Keeps recent turns verbatim and folds older ones into a rolling summary.
+    """
+
+    def __init__(
+        self,
+        backend: "LLMBackend",
+        max_tokens: int = 3000,
+        keep_turns: int = 6,
+        summary_model: str = SUMMARY_MODEL,
+        router: Optional["ModelRouter"] = None,
+        usage: Optional["UsageTracker"] = None,
+    ) -> None:
+        self.backend = backend
+        self.max_tokens = max_tokens
+        self.keep_turns = keep_turns
+        self.summary_model = summary_model
+        self.router = router
+        self.usage = usage
+        self.summary: str = ""
+        self.last_request_tokens: int = 0
+        self._turns: List[List[types.Content]] = []
+        self._dropped: List[List[types.Content]] = []
+        self._lock = threading.Lock()
+        self._summarizing: bool = False
+
+    def start_turn(self, content: types.Content) -> None:
+        """Begins a new turn with the user's message.
+
+        Args:
+            content (types.Content): The user's message.
+        """
+        with self._lock:
+            self._turns.append([content])
+        self._maybe_compact()
+
+    def append(self, content: types.Content) -> None:
+        """Adds a reply or tool result to the current turn.
+
+        Args:
+            content (types.Content): The entry to add.
+        """
+        with self._lock:
+            if not self._turns:
+                self._turns.append([])
+            self._turns[-1].append(content)
+        self._maybe_compact()
+
+    def remove(self, content: types.Content) -> None:
+        """Removes an entry, e.g. a reply the user never heard, together with
+        the function responses answering its calls.
+
+        Args:
+            content (types.Content): The entry to remove.
+        """
+        with self._lock:
+            for turn in self._turns:
+                kept: List[types.Content] = []
+                removing = False
+                for entry in turn:
+                    if entry is content:
+                        removing = True
+                        continue
+                    if removing and _is_function_response(entry):
+                        continue
+                    removing = False
+                    kept.append(entry)
+                turn[:] = kept
+
+    def contents(self) -> List[types.Content]:
+        """Builds the contents for the next request and records their size.
+
+        Returns:
+            List[types.Content]: The summary exchange followed by recent turns.
+        """
+        with self._lock:
+            contents: List[types.Content] = []
+            if self.summary:
+                contents.append(
+                    types.UserContent(
+                        parts=[
+                            types.Part.from_text(
+                                text=f"Summary of our conversation so far: {self.summary}"
+                            )
+                        ]
+                    )
+                )
+                contents.append(
+                    types.ModelContent(parts=[types.Part.from_text(text="Understood.")])
+                )
+            for turn in self._turns:
+                contents.extend(turn)
+        self.last_request_tokens = sum(estimate_tokens(c) for c in contents)
+        return contents
+
+    def turn_count(self) -> int:
+        """Returns the number of turns kept verbatim.
+
+        Returns:
+            int: The number of turns.
+        """
+        with self._lock:
+            return len(self._turns)
+
+    def _total_tokens(self) -> int:
+        """Estimates the size of the verbatim turns. Callers hold the lock.
+
+        Returns:
+            int: The estimated token count.
+        """
+        return sum(estimate_tokens(c) for turn in self._turns for c in turn)
+
+    def _maybe_compact(self) -> None:
+        """
+        Starts folding old turns into the summary once the budget is exceeded.
+
+        Beyond twice the budget the old turns leave the requests at once and
+        wait to be folded in, so a slow summariser cannot let requests grow.
+        """
+        with self._lock:
+            over = (
+                len(self._turns) > self.keep_turns
+                and self._total_tokens() > self.max_tokens
+            )
+            if over and self._total_tokens() > 2 * self.max_tokens:
+                dropped = len(self._turns) - self.keep_turns
+                self._dropped.extend(self._turns[:dropped])
+                del self._turns[:dropped]
+                print(f"History over hard limit, set aside {dropped} old turns")
+                over = False
+            if not (over or self._dropped) or self._summarizing:
+                return
+            self._summarizing = True
+            folding = len(self._turns) - self.keep_turns if over else 0
+            old_turns = self._dropped + self._turns[:folding]
+            summary = self.summary
+
+        threading.Thread(
+            target=self._summarize, args=(old_turns, summary), daemon=True
+        ).start()
+
+    def _summarize(self, old_turns: List[List[types.Content]], summary: str) -> None:
+        """Folds turns into the summary and removes them from the history.
+
+        Args:
+            old_turns (List[List[types.Content]]): The turns to fold, oldest first.
+            summary (str): The summary the turns follow on from.
+        """
+        transcript = "\n".join(_render_turn(turn) for turn in old_turns)
+        if summary:
+            transcript = f"Earlier summary: {summary}\n\n{transcript}"
+        model = self.router.choose("summary") if self.router else self.summary_model
+        start_time = time.perf_counter()
+        usage: Optional[types.GenerateContentResponseUsageMetadata] = None
+        try:
+            response = self.backend.generate_content(
+                model=model,
+                contents=[
+                    types.UserContent(
+                        parts=[types.Part.from_text(text=SUMMARY_PROMPT + transcript)]
+                    )
+                ],
+                config=types.GenerateContentConfig(temperature=0.2),
+            )
+            new_summary: Optional[str] = (response.text or "").strip()
+            usage = (
+                response.usage_metadata or types.GenerateContentResponseUsageMetadata()
+            )
+        except Exception as e:
+            print(f"History summarisation failed: {e}")
+            new_summary = None
+        duration = time.perf_counter() - start_time
+        if self.router is not None:
+            self.router.record(model, None, duration, "summary")
+        if self.usage is not None:
+            self.usage.record(model, "summary", usage, duration)
+
+        with self._lock:
+            self._summarizing = False
+            folded = {id(turn) for turn in old_turns}
+            if new_summary:
+                self.summary = new_summary
+                self._turns = [turn for turn in self._turns if id(turn) not in folded]
+            else:
+                lost = sum(1 for turn in self._dropped if id(turn) in folded)
+                if lost:
+                    turns = "turn was" if lost == 1 else "turns were"
+                    self.summary = (
+                        f"{self.summary} ({lost} earlier {turns} dropped "
+                        "without a summary.)"
+                    ).strip()
+            self._dropped = [turn for turn in self._dropped if id(turn) not in folded]
+            pending = bool(self._dropped)
+        if new_summary:
+            print(f"Folded {len(old_turns)} turns into the conversation summary")
+        if pending:
+            self._maybe_compact()
@@ -0,0 +1,184 @@
+import datetime
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from managers.state_manager import get_app_data_dir
+
+TRACE_DIR = "traces"
+
+
+class LatencyTracer:
+    """
+    Records timed spans across the voice pipeline, grouped by turn.
+
+    Spans are buffered in memory so recording is cheap enough for the audio
+    callback, and appended to a JSONL file per session whenever a turn ends.
+    Times are `time.perf_counter()` values; the file stores them in ms from
+    the start of the session. Each session adds a file, so tracing is off
+    unless `TESSERA_TRACE=1`, and `TESSERA_TRACE_CHROME=1` also exports a
+    Chrome trace-event file when the session closes.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        enabled: Optional[bool] = None,
+        chrome_trace: Optional[bool] = None,
+    ) -> None:
+        if enabled is None:
+            enabled = os.environ.get("TESSERA_TRACE") == "1"
+        if chrome_trace is None:
+            chrome_trace = os.environ.get("TESSERA_TRACE_CHROME") == "1"
+        self.enabled = enabled
+        self.chrome_trace = chrome_trace
+        self.path: Optional[Path] = None
+        if enabled:
+            stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+            self.path = (
+                path or get_app_data_dir() / TRACE_DIR / f"session-{stamp}.jsonl"
+            )
+        self.turn: int = 1
+        self.turn_start: Optional[float] = None
+        self._origin = time.perf_counter()
+        self._pending: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        name: str,
+        start: float,
+        end: Optional[float] = None,
+        **args: Any,
+    ) -> None:
+        """Records a span, or an instant event if it has no end.
+
+        Args:
+            name (str): What the span measures.
+            start (float): When it started, from `time.perf_counter()`.
+            end (Optional[float]): When it ended, None for an instant event.
+            **args: Extra details stored with the span.
+        """
+        if not self.enabled:
+            return
+        span = {
+            "turn": self.turn,
+            "name": name,
+            "start_ms": round((start - self._origin) * 1000, 3),
+            "duration_ms": None if end is None else round((end - start) * 1000, 3),
+            "thread": threading.current_thread().name,
+        }
+        if args:
+            span["args"] = args
+        with self._lock:
+            self._pending.append(span)
+
+    def mark(self, name: str, at: Optional[float] = None, **args: Any) -> None:
+        """Records an instant event.
+
+        Args:
+            name (str): The event.
+            at (Optional[float]): When it happened, now if omitted.
+            **args: Extra details stored with the event.
+        """
+        self.record(name, time.perf_counter() if at is None else at, **args)
+
+    def start_turn(self) -> None:
+        """
+        Notes when the assistant started handling the current turn.
+        """
+        self.turn_start = time.perf_counter()
+
+    def end_turn(self, **args: Any) -> None:
+        """Records the turn span, writes the turn's spans and moves to the next turn.
+
+        Args:
+            **args: Extra details stored with the turn span.
+        """
+        if self.turn_start is not None:
+            self.record("turn", self.turn_start, time.perf_counter(), **args)
+        self.flush()
+        self.turn += 1
+        self.turn_start = None
+
+    def flush(self) -> None:
+        """
+        Appends the buffered spans to the session file.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending or self.path is None:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as file:
+                for span in pending:
+                    file.write(json.dumps(span) + "\n")
+        except OSError as e:
+            print(f"Could not write latency trace: {e}")
+
+    def close(self) -> None:
+        """
+        Writes what is left and exports the Chrome trace if enabled.
+        """
+        self.flush()
+        if self.chrome_trace and self.path is not None and self.path.exists():
+            output = export_chrome_trace(self.path)
+            print(f"Chrome trace written to {output}")
+
+
+def read_spans(path: Path) -> List[Dict[str, Any]]:
+    """Loads the spans of a session trace.
+
+    Args:
+        path (Path): The JSONL trace file.
+
+    Returns:
+        List[Dict[str, Any]]: The spans in recording order.
+    """
+    with open(path, "r") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def export_chrome_trace(path: Path, output: Optional[Path] = None) -> Path:
+    """Converts a session trace to the Chrome trace-event format.
+
+    The result opens as a flame chart in chrome://tracing or Perfetto, with
+    one row per thread.
+
+    Args:
+        path (Path): The JSONL trace file.
+        output (Optional[Path]): Where to write, next to the trace if omitted.
+
+    Returns:
+        Path: The written file.
+    """
+    output = output or Path(path).with_suffix(".trace.json")
+    threads: Dict[str, int] = {}
+    events: List[Dict[str, Any]] = []
+    for span in read_spans(path):
+        tid = threads.setdefault(span["thread"], len(threads) + 1)
+        event = {
+            "name": span["name"],
+            "cat": "turn",
+            "pid": 1,
+            "tid": tid,
+            "ts": span["start_ms"] * 1000,
+            "args": dict(span.get("args", {}), turn=span["turn"]),
+        }
+        if span["duration_ms"] is None:
+            event.update(ph="i", s="t")
+        else:
+            event.update(ph="X", dur=span["duration_ms"] * 1000)
+        events.append(event)
+    events += [
+        {"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": name}}
+        for name, tid in threads.items()
+    ]
+
+    with open(output, "w") as file:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+    return output
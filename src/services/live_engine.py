@@ -0,0 +1,575 @@
+import asyncio
+import json
+import os
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Union
+
+import numpy as np
+from google.genai import types
+from websockets.asyncio.client import ClientConnection, connect
+
+from audio_engine.audio_controller import AudioController
+from audio_engine.capture_engine import CaptureEngine
+from managers.state_manager import StateManager
+from managers.tool_register import ToolRegister
+from services.gemini_service import tool_response_part
+from services.latency_tracer import LatencyTracer
+from services.prompt_builder import WELCOME_PROMPT, PromptBuilder
+from services.tool_executor import ToolExecutor
+
+LIVE_MODEL = "gemini-2.0-flash-live-001"
+LIVE_URL = (
+    "wss://generativelanguage.googleapis.com/ws/"
+    "google.ai.generativelanguage.v1beta.GenerativeService.BidiGenerateContent"
+)
+INPUT_SAMPLE_RATE = 16000
+OUTPUT_SAMPLE_RATE = 24000
+PLAYBACK_CHUNK = 0.2
+MIC_QUEUE_BLOCKS = 32
+RECONNECT_DELAY = 2.0
+
+
+def encode_message(
+    message: Union[types.LiveClientMessage, types.LiveServerMessage],
+) -> str:
+    """Serialises a Live API message to its JSON wire format.
+
+    Args:
+        message: The client or server message.
+
+    Returns:
+        str: The JSON text, with camelCase keys and base64 audio.
+    """
+    return json.dumps(message.model_dump(mode="json", by_alias=True, exclude_none=True))
+
+
+def to_pcm16(samples: np.ndarray) -> bytes:
+    """Converts float samples in [-1, 1] to little-endian 16-bit PCM.
+
+    Args:
+        samples: The float samples.
+
+    Returns:
+        bytes: The PCM data.
+    """
+    return (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+
+class LiveSession:
+    """
+    A Gemini Live session over a websocket, speaking the
+    BidiGenerateContent protocol.
+    """
+
+    def __init__(self, websocket: ClientConnection) -> None:
+        self.websocket = websocket
+
+    @classmethod
+    async def connect(
+        cls,
+        url: str,
+        setup: types.LiveClientSetup,
+        api_key: Optional[str] = None,
+    ) -> "LiveSession":
+        """Opens a session and waits for the server to accept its setup.
+
+        Args:
+            url: The websocket endpoint.
+            setup: The model, system instruction, tools and output settings.
+            api_key: The API key, sent as a query parameter if given.
+
+        Returns:
+            LiveSession: The ready session.
+        """
+        uri = f"{url}?key={api_key}" if api_key else url
+        websocket = await connect(uri, max_size=None)
+        try:
+            await websocket.send(encode_message(types.LiveClientMessage(setup=setup)))
+            reply = types.LiveServerMessage.model_validate(
+                json.loads(await websocket.recv())
+            )
+            if reply.setup_complete is None:
+                raise ConnectionError(f"Unexpected reply to the Live setup: {reply}")
+        except BaseException:
+            await websocket.close()
+            raise
+        return cls(websocket)
+
+    async def send_audio(self, pcm: bytes) -> None:
+        """Streams a block of microphone audio.
+
+        Args:
+            pcm: 16-bit mono PCM at `INPUT_SAMPLE_RATE`.
+        """
+        await self.websocket.send(
+            encode_message(
+                types.LiveClientMessage(
+                    realtime_input=types.LiveClientRealtimeInput(
+                        audio=types.Blob(
+                            data=pcm, mime_type=f"audio/pcm;rate={INPUT_SAMPLE_RATE}"
+                        )
+                    )
+                )
+            )
+        )
+
+    async def send_text(self, text: str) -> None:
+        """Sends a complete user turn as text.
+
+        Args:
+            text: The message.
+        """
+        await self.websocket.send(
+            encode_message(
+                types.LiveClientMessage(
+                    client_content=types.LiveClientContent(
+                        turns=[types.UserContent(parts=[types.Part(text=text)])],
+                        turn_complete=True,
+                    )
+                )
+            )
+        )
+
+    async def send_tool_response(
+        self, function_responses: List[types.FunctionResponse]
+    ) -> None:
+        """Answers the model's function calls.
+
+        Args:
+            function_responses: One response per call, carrying the call's ID.
+        """
+        await self.websocket.send(
+            encode_message(
+                types.LiveClientMessage(
+                    tool_response=types.LiveClientToolResponse(
+                        function_responses=function_responses
+                    )
+                )
+            )
+        )
+
+    async def receive(self) -> AsyncIterator[types.LiveServerMessage]:
+        """
+        Yields server messages until the connection closes.
+
+        Yields:
+            types.LiveServerMessage: The next message.
+        """
+        async for raw in self.websocket:
+            yield types.LiveServerMessage.model_validate(json.loads(raw))
+
+    async def close(self) -> None:
+        """
+        Closes the connection.
+        """
+        await self.websocket.close()
+
+
+class LiveConversationEngine:
+    """
+    Runs the conversation over a Gemini Live session instead of the
+    record, transcribe, generate and synthesise pipeline.
+
+    Echo-cancelled microphone audio streams up continuously and the server
+    decides when the user has finished speaking. Audio replies stream down
+    and are played as they arrive, and function calls are executed with
+    the same tools as `ConversationService`. When the server reports that
+    the user interrupted, playback stops immediately. Select it with
+    `TESSERA_CONVERSATION_ENGINE=live`; `TESSERA_LIVE_URL` points it at
+    another endpoint such as the local stand-in.
+    """
+
+    def __init__(
+        self,
+        audio_controller: AudioController,
+        state_manager: StateManager,
+        url: Optional[str] = None,
+        model: str = LIVE_MODEL,
+        api_key: Optional[str] = None,
+    ) -> None:
+        self.audio_controller = audio_controller
+        self.state_manager = state_manager
+        self.tool_registry = ToolRegister(audio_controller, state_manager)
+        self.tools = self.tool_registry.get_tools()
+        self.prompt_builder = PromptBuilder(state_manager, self.tools)
+        self.url = url or os.environ.get("TESSERA_LIVE_URL", LIVE_URL)
+        self.model = model
+        self.api_key = api_key or os.environ.get("GEMINI_API_KEY")
+
+        self.tracer = LatencyTracer()
+        self.capture_engine = CaptureEngine(
+            sample_rate=INPUT_SAMPLE_RATE,
+            output_reference=audio_controller.output_reference,
+            tracer=self.tracer,
+            segment_utterances=False,
+        )
+        self.capture_engine.on_audio = self._on_mic_audio
+        self.tool_executor = ToolExecutor(self.tool_registry, tracer=self.tracer)
+
+        self.has_welcomed = False
+        self.running = False
+        self.paused = False
+        self.kai_is_speaking = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._main_task: Optional["asyncio.Task[None]"] = None
+        self._mic_blocks: Optional["asyncio.Queue[bytes]"] = None
+        self._playback: List[np.ndarray] = []
+        self._playback_samples: int = 0
+        self._turn_id: int = 0
+        self._turn_started: bool = False
+        self._first_audio_sent: bool = False
+        self._input_text: str = ""
+        self._output_text: str = ""
+        self._tool_tasks: Dict[str, "asyncio.Task[None]"] = {}
+
+    def start(self) -> None:
+        """
+        Runs the Live session until `stop` is called, reconnecting if it drops.
+        """
+        if self.running:
+            return
+        self.running = True
+        asyncio.run(self._run())
+
+    async def _run(self) -> None:
+        """
+        Opens the microphone and keeps a Live session running.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._main_task = asyncio.current_task()
+        self._mic_blocks = asyncio.Queue(maxsize=MIC_QUEUE_BLOCKS)
+        self.capture_engine.start()
+        try:
+            while self.running:
+                try:
+                    session = await LiveSession.connect(
+                        self.url, self._setup(), self.api_key
+                    )
+                except Exception as e:
+                    print(f"Could not open the Live session: {e}")
+                    await asyncio.sleep(RECONNECT_DELAY)
+                    continue
+
+                print(f"Live session open with {self.model}")
+                try:
+                    async with asyncio.TaskGroup() as tg:
+                        tg.create_task(self._send_stage(session))
+                        tg.create_task(self._receive_stage(session))
+                except Exception as e:
+                    errors = e.exceptions if isinstance(e, ExceptionGroup) else [e]
+                    print(f"Live session ended: {'; '.join(map(repr, errors))}")
+                finally:
+                    await session.close()
+                self._interrupt_turn("disconnect")
+                await asyncio.sleep(RECONNECT_DELAY)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop = None
+            self._main_task = None
+
+    def _setup(self) -> types.LiveClientSetup:
+        """Builds the session setup from the current prompt and tools.
+
+        Returns:
+            types.LiveClientSetup: The setup message.
+        """
+        return types.LiveClientSetup(
+            model=f"models/{self.model}",
+            generation_config=types.GenerationConfig(
+                response_modalities=[types.Modality.AUDIO]
+            ),
+            system_instruction=types.Content(
+                parts=[types.Part(text=self.prompt_builder.system_instruction())]
+            ),
+            tools=self.tools,
+            input_audio_transcription=types.AudioTranscriptionConfig(),
+            output_audio_transcription=types.AudioTranscriptionConfig(),
+        )
+
+    def _call_on_loop(self, callback: Callable[..., Any], *args: Any) -> None:
+        """
+        Schedules a callback on the session's event loop from any thread.
+
+        Args:
+            callback: The function to call.
+            *args: Arguments for the callback.
+        """
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            pass
+
+    def _on_mic_audio(self, samples: np.ndarray) -> None:
+        """
+        Hands a captured block to the send stage. Runs in the audio callback.
+
+        Args:
+            samples: The echo-cancelled float32 block.
+        """
+        if self.paused:
+            return
+        self._call_on_loop(self._queue_mic_block, to_pcm16(samples))
+
+    def _queue_mic_block(self, pcm: bytes) -> None:
+        """
+        Queues a microphone block, dropping the oldest if the connection is
+        not keeping up.
+
+        Args:
+            pcm: The block as 16-bit PCM.
+        """
+        if self._mic_blocks.full():
+            self._mic_blocks.get_nowait()
+        self._mic_blocks.put_nowait(pcm)
+
+    async def _send_stage(self, session: LiveSession) -> None:
+        """
+        Sends the welcome prompt once, then streams the microphone.
+
+        Args:
+            session: The open session.
+        """
+        if not self.has_welcomed:
+            self.has_welcomed = True
+            await session.send_text(WELCOME_PROMPT)
+        while not self._mic_blocks.empty():
+            self._mic_blocks.get_nowait()
+        while True:
+            pcm = await self._mic_blocks.get()
+            if not self.paused:
+                await session.send_audio(pcm)
+
+    async def _receive_stage(self, session: LiveSession) -> None:
+        """
+        Plays, prints and acts on server messages as they arrive.
+
+        Tools run in their own task so barge-in and cancellations are still
+        read while they execute.
+
+        Args:
+            session: The open session.
+        """
+        try:
+            await self._receive_messages(session)
+        finally:
+            for task in set(self._tool_tasks.values()):
+                task.cancel()
+            self._tool_tasks = {}
+
+    async def _receive_messages(self, session: LiveSession) -> None:
+        """
+        Handles server messages until the connection closes.
+
+        Args:
+            session: The open session.
+        """
+        async for message in session.receive():
+            if message.tool_call and message.tool_call.function_calls:
+                self._begin_turn()
+                tool_calls = message.tool_call.function_calls
+                task = asyncio.create_task(self._run_tools(session, tool_calls))
+                for tool_call in tool_calls:
+                    self._tool_tasks[tool_call.id] = task
+            if message.tool_call_cancellation:
+                self._cancel_tools(message.tool_call_cancellation.ids or [])
+
+            content = message.server_content
+            if content is not None:
+                if content.interrupted:
+                    self._interrupt_turn("barge-in")
+                if content.input_transcription and content.input_transcription.text:
+                    self._input_text += content.input_transcription.text
+                if content.model_turn and content.model_turn.parts:
+                    for part in content.model_turn.parts:
+                        if part.inline_data and part.inline_data.data:
+                            self._play_chunk(part.inline_data.data)
+                        elif part.text:
+                            self._output_text += part.text
+                if content.output_transcription and content.output_transcription.text:
+                    self._output_text += content.output_transcription.text
+                if content.turn_complete:
+                    self._complete_turn()
+
+            if message.go_away:
+                print(f"Live session closing in {message.go_away.time_left}")
+        raise ConnectionError("the server closed the connection")
+
+    async def _run_tools(
+        self, session: LiveSession, tool_calls: List[types.FunctionCall]
+    ) -> None:
+        """
+        Executes the model's function calls and sends back the results of
+        those the server has not cancelled meanwhile.
+
+        Args:
+            session: The open session.
+            tool_calls: The calls to execute.
+        """
+        try:
+            results = await self.tool_executor.execute(tool_calls)
+            responses = [
+                tool_response_part(tool_call, result).function_response
+                for tool_call, result in zip(tool_calls, results)
+                if tool_call.id in self._tool_tasks
+            ]
+            if responses:
+                await session.send_tool_response(responses)
+        except Exception as e:
+            print(f"Could not answer the tool calls: {e}")
+        finally:
+            for tool_call in tool_calls:
+                self._tool_tasks.pop(tool_call.id, None)
+
+    def _cancel_tools(self, ids: List[str]) -> None:
+        """
+        Forgets cancelled calls, stopping their task once none of its calls
+        are still wanted.
+
+        Args:
+            ids: The IDs of the cancelled calls.
+        """
+        tasks = {self._tool_tasks.pop(id) for id in ids if id in self._tool_tasks}
+        for task in tasks:
+            if task not in self._tool_tasks.values():
+                task.cancel()
+        print(f"Live session cancelled tool calls {', '.join(ids)}")
+
+    def _begin_turn(self) -> None:
+        """
+        Marks the assistant as speaking when the first output of a turn arrives.
+        """
+        if self._turn_started:
+            return
+        self._turn_started = True
+        self._first_audio_sent = False
+        self._turn_id += 1
+        self.kai_is_speaking = True
+        self.tracer.start_turn()
+        if self._input_text.strip():
+            print(f"User: {self._input_text.strip()}")
+            self._input_text = ""
+
+    def _play_chunk(self, data: bytes) -> None:
+        """
+        Buffers streamed reply audio and plays it in short pieces.
+
+        Args:
+            data: 16-bit mono PCM at `OUTPUT_SAMPLE_RATE`.
+        """
+        if self.paused:
+            return
+        self._begin_turn()
+        samples = np.frombuffer(data, dtype="<i2")
+        self._playback.append(samples)
+        self._playback_samples += len(samples)
+        if (
+            not self._first_audio_sent
+            or self._playback_samples >= PLAYBACK_CHUNK * OUTPUT_SAMPLE_RATE
+        ):
+            self._flush_playback()
+
+    def _flush_playback(self) -> None:
+        """
+        Queues the buffered reply audio on the TTS channel.
+        """
+        if not self._playback:
+            return
+        samples = np.concatenate(self._playback)
+        self._playback = []
+        self._playback_samples = 0
+        self.audio_controller.play_tts_audio(samples, OUTPUT_SAMPLE_RATE)
+        if not self._first_audio_sent:
+            self._first_audio_sent = True
+            output_latency = self.audio_controller.get_output_latency()
+            self.tracer.mark(
+                "first_audio_out",
+                at=time.perf_counter() + output_latency,
+                output_latency_ms=round(output_latency * 1000),
+            )
+
+    def _complete_turn(self) -> None:
+        """
+        Plays what is left of the reply and ends the turn once it has been heard.
+        """
+        self._flush_playback()
+        if self._output_text.strip():
+            print(f"Kai: {self._output_text.strip()}")
+        self._output_text = ""
+        if not self._turn_started:
+            return
+        self._turn_started = False
+        turn_id = self._turn_id
+        self.audio_controller.notify_when_tts_done(
+            lambda: self._call_on_loop(self._end_speaking, turn_id, "completed")
+        )
+
+    def _end_speaking(self, turn_id: int, outcome: str) -> None:
+        """
+        Hands the floor back to the user unless a newer turn has started.
+
+        Args:
+            turn_id: The turn whose playback finished.
+            outcome: How the turn ended, for the trace.
+        """
+        if turn_id != self._turn_id or self._turn_started:
+            return
+        self.kai_is_speaking = False
+        self.tracer.end_turn(outcome=outcome)
+        if outcome == "completed":
+            print("Turn completed - ready for user input")
+        asyncio.get_running_loop().run_in_executor(
+            None, self.audio_controller.restore_background_after_tts
+        )
+
+    def _interrupt_turn(self, reason: str) -> None:
+        """
+        Silences the reply in progress.
+
+        Args:
+            reason: Why the turn is being interrupted, for the log.
+        """
+        self._playback = []
+        self._playback_samples = 0
+        self._output_text = ""
+        if not self.kai_is_speaking:
+            return
+        self.audio_controller.stop_tts_audio()
+        self._turn_started = False
+        self._end_speaking(self._turn_id, "interrupted")
+        print(f"Turn interrupted by {reason}")
+
+    def set_paused(self, paused: bool) -> None:
+        """
+        Pauses or resumes the conversation, silencing the reply in progress.
+
+        Args:
+            paused: Whether the conversation should be paused.
+        """
+        self.paused = paused
+        if paused:
+            self._call_on_loop(self._interrupt_turn, "pause")
+
+    def is_speaking(self) -> bool:
+        """
+        Checks if the AI is currently speaking.
+
+        Returns:
+            True if speaking, False otherwise.
+        """
+        return self.kai_is_speaking
+
+    def stop(self) -> None:
+        """
+        Stops the engine.
+        """
+        self.running = False
+        main_task = self._main_task
+        if main_task is not None:
+            self._call_on_loop(main_task.cancel)
+        self.capture_engine.stop()
+        self.tool_executor.close()
+        self.tracer.close()
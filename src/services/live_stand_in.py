@@ -0,0 +1,305 @@
+import asyncio
+import base64
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from google.genai import types
+from websockets.asyncio.server import Server, ServerConnection, serve
+
+from services.live_engine import INPUT_SAMPLE_RATE, OUTPUT_SAMPLE_RATE, encode_message
+
+
+class LiveStandIn:
+    """
+    Replays scripted replies over the Gemini Live protocol on a local
+    websocket, for tests and benchmarks without network access.
+
+    Replies use the same script format as `FakeBackend`. A reply is started
+    by a text turn, by a tool response, or by `silence_duration` of quiet
+    after streamed audio louder than `threshold`. It waits
+    `time_to_first_token`, then streams `chunk_tokens` words per chunk,
+    each word costing `token_latency` and carrying a tone lasting as long as
+    the word would take to say. Function calls are sent as a tool call and
+    the reply continues once they are answered. Audio heard while the reply
+    would still be playing interrupts it, and audio heard while calls are
+    unanswered cancels them. Every setup, text turn and tool response is
+    kept in `requests` for inspection.
+    """
+
+    def __init__(
+        self,
+        replies: Optional[List[Dict[str, Any]]] = None,
+        time_to_first_token: float = 0.3,
+        token_latency: float = 0.01,
+        chunk_tokens: int = 4,
+        silence_duration: float = 0.5,
+        threshold: float = 0.01,
+        words_per_second: float = 3.0,
+    ) -> None:
+        self.replies = replies or [{"text": "Okay, let's keep going."}]
+        self.time_to_first_token = time_to_first_token
+        self.token_latency = token_latency
+        self.chunk_tokens = max(1, chunk_tokens)
+        self.silence_duration = silence_duration
+        self.threshold = threshold
+        self.words_per_second = words_per_second
+        self.requests: List[Dict[str, Any]] = []
+        self.url: Optional[str] = None
+        self._next_reply: int = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serves on a background thread until `stop` is called.
+
+        Args:
+            host: The interface to listen on.
+            port: The port, any free port if 0.
+
+        Returns:
+            str: The websocket URL to connect to.
+        """
+        ready = threading.Event()
+
+        def run() -> None:
+            self._loop = asyncio.new_event_loop()
+            self._server = self._loop.run_until_complete(self.serve(host, port))
+            ready.set()
+            self._loop.run_until_complete(self._server.wait_closed())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="live-stand-in", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self.url
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 0) -> Server:
+        """Starts serving on the running event loop.
+
+        Args:
+            host: The interface to listen on.
+            port: The port, any free port if 0.
+
+        Returns:
+            Server: The running server.
+        """
+        server = await serve(self._handle, host, port, max_size=None)
+        bound_host, bound_port = server.sockets[0].getsockname()[:2]
+        self.url = f"ws://{bound_host}:{bound_port}"
+        return server
+
+    def stop(self) -> None:
+        """
+        Closes the server and waits for its thread.
+        """
+        if self._server is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._server = None
+        self._thread = None
+
+    def _take_reply(self) -> Dict[str, Any]:
+        """Picks the next scripted reply.
+
+        Returns:
+            Dict[str, Any]: The reply, the script wrapping around.
+        """
+        reply = self.replies[self._next_reply % len(self.replies)]
+        self._next_reply += 1
+        return reply
+
+    def _tone(self, words: int) -> bytes:
+        """Synthesises the audio standing in for some spoken words.
+
+        Args:
+            words: The number of words.
+
+        Returns:
+            bytes: 16-bit mono PCM at `OUTPUT_SAMPLE_RATE`.
+        """
+        length = int(words / self.words_per_second * OUTPUT_SAMPLE_RATE)
+        tone = 0.2 * np.sin(2 * np.pi * 220 * np.arange(length) / OUTPUT_SAMPLE_RATE)
+        return (tone * 32767).astype("<i2").tobytes()
+
+    async def _handle(self, websocket: ServerConnection) -> None:
+        """Runs one session.
+
+        Args:
+            websocket: The client connection.
+        """
+        setup = types.LiveClientMessage.model_validate(
+            json.loads(await websocket.recv())
+        ).setup
+        self.requests.append({"setup": setup})
+        await websocket.send(
+            encode_message(
+                types.LiveServerMessage(setup_complete=types.LiveServerSetupComplete())
+            )
+        )
+
+        session = {"reply": None, "playing_until": 0.0, "pending_calls": []}
+        heard_voice = False
+        silence = 0.0
+        try:
+            async for raw in websocket:
+                message = json.loads(raw)
+                if "realtimeInput" in message:
+                    audio = message["realtimeInput"].get("audio") or {}
+                    samples = (
+                        np.frombuffer(
+                            base64.urlsafe_b64decode(audio.get("data", "")), "<i2"
+                        )
+                        / 32768.0
+                    )
+                    if not len(samples):
+                        continue
+                    if np.sqrt(np.mean(samples**2)) >= self.threshold:
+                        silence = 0.0
+                        if not heard_voice:
+                            heard_voice = True
+                            await self._interrupt(websocket, session)
+                    elif heard_voice:
+                        silence += len(samples) / INPUT_SAMPLE_RATE
+                        if silence >= self.silence_duration:
+                            heard_voice = False
+                            self._start_reply(websocket, session)
+                elif "clientContent" in message:
+                    self.requests.append({"client_content": message["clientContent"]})
+                    if message["clientContent"].get("turnComplete"):
+                        self._start_reply(websocket, session)
+                elif "toolResponse" in message:
+                    self.requests.append({"tool_response": message["toolResponse"]})
+                    if session["pending_calls"]:
+                        session["pending_calls"] = []
+                        self._start_reply(websocket, session)
+        finally:
+            if session["reply"] is not None:
+                session["reply"].cancel()
+
+    async def _interrupt(
+        self, websocket: ServerConnection, session: Dict[str, Any]
+    ) -> None:
+        """Abandons the reply, or cancels unanswered calls, if the user starts
+        talking over it.
+
+        Args:
+            websocket: The client connection.
+            session: The session's reply state.
+        """
+        if session["pending_calls"]:
+            ids, session["pending_calls"] = session["pending_calls"], []
+            await websocket.send(
+                encode_message(
+                    types.LiveServerMessage(
+                        tool_call_cancellation=types.LiveServerToolCallCancellation(
+                            ids=ids
+                        )
+                    )
+                )
+            )
+            return
+        replying = session["reply"] is not None and not session["reply"].done()
+        if not replying and time.monotonic() >= session["playing_until"]:
+            return
+        if session["reply"] is not None:
+            session["reply"].cancel()
+        session["playing_until"] = 0.0
+        await websocket.send(
+            encode_message(
+                types.LiveServerMessage(
+                    server_content=types.LiveServerContent(interrupted=True)
+                )
+            )
+        )
+
+    def _start_reply(
+        self, websocket: ServerConnection, session: Dict[str, Any]
+    ) -> None:
+        """Starts streaming the next scripted reply.
+
+        Args:
+            websocket: The client connection.
+            session: The session's reply state.
+        """
+        if session["reply"] is not None:
+            session["reply"].cancel()
+        session["reply"] = asyncio.create_task(self._reply(websocket, session))
+
+    async def _reply(
+        self, websocket: ServerConnection, session: Dict[str, Any]
+    ) -> None:
+        """Streams one scripted reply.
+
+        Args:
+            websocket: The client connection.
+            session: The session's reply state.
+        """
+        reply = self._take_reply()
+        await asyncio.sleep(self.time_to_first_token)
+
+        calls = reply.get("function_calls", [])
+        if calls:
+            function_calls = [
+                types.FunctionCall(
+                    id=f"call-{self._next_reply}-{index}",
+                    name=call["name"],
+                    args=call.get("args", {}),
+                )
+                for index, call in enumerate(calls)
+            ]
+            session["pending_calls"] = [call.id for call in function_calls]
+            await websocket.send(
+                encode_message(
+                    types.LiveServerMessage(
+                        tool_call=types.LiveServerToolCall(
+                            function_calls=function_calls
+                        )
+                    )
+                )
+            )
+            return
+
+        words = reply.get("text", "").split()
+        session["playing_until"] = time.monotonic()
+        for start in range(0, len(words), self.chunk_tokens):
+            piece = words[start : start + self.chunk_tokens]
+            await asyncio.sleep(len(piece) * self.token_latency)
+            session["playing_until"] = (
+                max(session["playing_until"], time.monotonic())
+                + len(piece) / self.words_per_second
+            )
+            text = " ".join(piece) + (" " if start + len(piece) < len(words) else "")
+            await websocket.send(
+                encode_message(
+                    types.LiveServerMessage(
+                        server_content=types.LiveServerContent(
+                            model_turn=types.Content(
+                                role="model",
+                                parts=[
+                                    types.Part(
+                                        inline_data=types.Blob(
+                                            data=self._tone(len(piece)),
+                                            mime_type=f"audio/pcm;rate={OUTPUT_SAMPLE_RATE}",
+                                        )
+                                    )
+                                ],
+                            ),
+                            output_transcription=types.Transcription(text=text),
+                        )
+                    )
+                )
+            )
+        await websocket.send(
+            encode_message(
+                types.LiveServerMessage(
+                    server_content=types.LiveServerContent(
+                        generation_complete=True, turn_complete=True
+                    )
+                )
+            )
+        )
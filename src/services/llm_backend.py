@@ -0,0 +1,446 @@
+import asyncio
+import importlib.util
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+import google.genai as genai
+import httpx
+from google.genai import types
+
+from services.history_manager import estimate_tokens
+
+KEEPALIVE_EXPIRY = 120.0
+WARM_UP_MODEL = "gemini-2.0-flash"
+
+
+class LLMBackend(ABC):
+    """
+    Sends generation requests on behalf of `GeminiService`.
+
+    `client` is the underlying genai client, or None for backends that have
+    no server-side features such as prompt caching.
+    """
+
+    client: Optional[genai.Client] = None
+
+    @abstractmethod
+    def generate_content(
+        self,
+        model: str,
+        contents: List[types.Content],
+        config: types.GenerateContentConfig,
+    ) -> types.GenerateContentResponse:
+        """Sends a blocking request.
+
+        Args:
+            model (str): The model to query.
+            contents (List[types.Content]): The request contents.
+            config (types.GenerateContentConfig): The generation config.
+
+        Returns:
+            types.GenerateContentResponse: The complete response.
+        """
+
+    @abstractmethod
+    def generate_content_stream(
+        self,
+        model: str,
+        contents: List[types.Content],
+        config: types.GenerateContentConfig,
+    ) -> Iterator[types.GenerateContentResponse]:
+        """Sends a streamed request.
+
+        Args:
+            model (str): The model to query.
+            contents (List[types.Content]): The request contents.
+            config (types.GenerateContentConfig): The generation config.
+
+        Returns:
+            Iterator[types.GenerateContentResponse]: The streamed chunks.
+        """
+
+    @abstractmethod
+    async def agenerate_content_stream(
+        self,
+        model: str,
+        contents: List[types.Content],
+        config: types.GenerateContentConfig,
+    ) -> AsyncIterator[types.GenerateContentResponse]:
+        """Sends a streamed request from the event loop.
+
+        Args:
+            model (str): The model to query.
+            contents (List[types.Content]): The request contents.
+            config (types.GenerateContentConfig): The generation config.
+
+        Returns:
+            AsyncIterator[types.GenerateContentResponse]: The streamed chunks.
+        """
+
+    def warm_up(self) -> None:
+        """
+        Opens a connection for blocking requests ahead of the first one.
+        """
+
+    async def awarm_up(self) -> None:
+        """
+        Opens, or keeps open, a connection for requests from the event loop.
+        """
+
+    def is_warm(self, aio: bool) -> Optional[bool]:
+        """Checks whether the next request can reuse an open connection.
+
+        Args:
+            aio (bool): Whether the request is sent from the event loop.
+
+        Returns:
+            Optional[bool]: True if a connection should still be open, False
+            if the request will connect first, None if there is no connection.
+        """
+        return None
+
+    def close(self) -> None:
+        """
+        Releases anything the backend holds on to.
+        """
+
+
+async def prepend_chunk(
+    first: Optional[types.GenerateContentResponse],
+    chunks: AsyncIterator[types.GenerateContentResponse],
+) -> AsyncIterator[types.GenerateContentResponse]:
+    """Re-attaches an already received first chunk to the rest of a stream.
+
+    Args:
+        first (Optional[types.GenerateContentResponse]): The first chunk, if any.
+        chunks (AsyncIterator[types.GenerateContentResponse]): The remaining chunks.
+
+    Yields:
+        types.GenerateContentResponse: Every chunk in order.
+    """
+    try:
+        if first is None:
+            return
+        yield first
+        async for chunk in chunks:
+            yield chunk
+    finally:
+        aclose = getattr(chunks, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+class GeminiBackend(LLMBackend):
+    """
+    Sends requests to the Gemini API.
+
+    `timeout` bounds each HTTP read, so a stream that stops sending fails
+    instead of hanging. Idle connections are kept for `keepalive_expiry`
+    seconds instead of httpx's default of five, so a user pausing to think
+    does not cost a new TLS handshake; HTTP/2 is used when the `h2` package
+    is installed. The blocking and event-loop clients each have their own
+    connection pool, tracked separately to tell cold requests from warm ones.
+    """
+
+    def __init__(
+        self,
+        client: Optional[genai.Client] = None,
+        timeout: float = 15.0,
+        keepalive_expiry: float = KEEPALIVE_EXPIRY,
+        warm_up_model: str = WARM_UP_MODEL,
+    ) -> None:
+        self.keepalive_expiry = keepalive_expiry
+        self.warm_up_model = warm_up_model
+        pool_args = {
+            "http2": importlib.util.find_spec("h2") is not None,
+            "limits": httpx.Limits(
+                max_keepalive_connections=8, keepalive_expiry=keepalive_expiry
+            ),
+        }
+        self.client = client or genai.Client(
+            api_key=os.environ.get("GEMINI_API_KEY"),
+            http_options=types.HttpOptions(
+                timeout=int(timeout * 1000),
+                client_args=pool_args,
+                async_client_args=dict(pool_args),
+            ),
+        )
+        self._last_used: Dict[bool, Optional[float]] = {False: None, True: None}
+
+    def _mark_used(self, aio: bool) -> None:
+        """Notes that a pool has just been used.
+
+        Args:
+            aio (bool): Whether it is the event-loop pool.
+        """
+        self._last_used[aio] = time.monotonic()
+
+    def is_warm(self, aio: bool) -> Optional[bool]:
+        last_used = self._last_used[aio]
+        return (
+            last_used is not None
+            and time.monotonic() - last_used < self.keepalive_expiry
+        )
+
+    def warm_up(self) -> None:
+        was_warm = self.is_warm(False)
+        start_time = time.perf_counter()
+        try:
+            self.client.models.get(model=self.warm_up_model)
+        except Exception as e:
+            print(f"Could not pre-warm the Gemini connection: {e}")
+            return
+        self._mark_used(False)
+        if not was_warm:
+            print(
+                "Pre-warmed the Gemini connection in "
+                f"{(time.perf_counter() - start_time) * 1000:.0f} ms"
+            )
+
+    async def awarm_up(self) -> None:
+        was_warm = self.is_warm(True)
+        start_time = time.perf_counter()
+        try:
+            await self.client.aio.models.get(model=self.warm_up_model)
+        except Exception as e:
+            print(f"Could not pre-warm the Gemini connection: {e}")
+            return
+        self._mark_used(True)
+        if not was_warm:
+            print(
+                "Pre-warmed the Gemini streaming connection in "
+                f"{(time.perf_counter() - start_time) * 1000:.0f} ms"
+            )
+
+    def generate_content(
+        self,
+        model: str,
+        contents: List[types.Content],
+        config: types.GenerateContentConfig,
+    ) -> types.GenerateContentResponse:
+        self._mark_used(False)
+        return self.client.models.generate_content(
+            model=model, contents=contents, config=config
+        )
+
+    def generate_content_stream(
+        self,
+        model: str,
+        contents: List[types.Content],
+        config: types.GenerateContentConfig,
+    ) -> Iterator[types.GenerateContentResponse]:
+        self._mark_used(False)
+        return self.client.models.generate_content_stream(
+            model=model, contents=contents, config=config
+        )
+
+    async def agenerate_content_stream(
+        self,
+        model: str,
+        contents: List[types.Content],
+        config: types.GenerateContentConfig,
+    ) -> AsyncIterator[types.GenerateContentResponse]:
+        self._mark_used(True)
+        return await self.client.aio.models.generate_content_stream(
+            model=model, contents=contents, config=config
+        )
+
+
+class FakeBackend(LLMBackend):
+    """
+    Replays scripted replies offline with configurable latency.
+
+    Each scripted reply is a dict with optional `text` and `function_calls`
+    (a list of `{"name": ..., "args": {...}}`). Replies are used in order and
+    the script wraps around. A streamed reply waits `time_to_first_token`,
+    then sends `chunk_tokens` words per chunk, each word costing
+    `token_latency`; function calls arrive in the last chunk. Every request
+    is kept in `requests` for inspection.
+    """
+
+    def __init__(
+        self,
+        replies: Optional[List[Dict[str, Any]]] = None,
+        time_to_first_token: float = 0.3,
+        token_latency: float = 0.01,
+        chunk_tokens: int = 4,
+    ) -> None:
+        self.replies = replies or [{"text": "Okay, let's keep going."}]
+        self.time_to_first_token = time_to_first_token
+        self.token_latency = token_latency
+        self.chunk_tokens = max(1, chunk_tokens)
+        self.requests: List[Dict[str, Any]] = []
+        self._next_reply: int = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs: Any) -> "FakeBackend":
+        """Loads the scripted replies from a JSON list.
+
+        Args:
+            path (str): The script file.
+            **kwargs: Latency settings passed to the constructor.
+
+        Returns:
+            FakeBackend: The backend replaying the script.
+        """
+        with open(path, "r") as file:
+            return cls(json.load(file), **kwargs)
+
+    def _take_reply(
+        self,
+        model: str,
+        contents: List[types.Content],
+        config: types.GenerateContentConfig,
+    ) -> Dict[str, Any]:
+        """Records a request and picks the reply to it.
+
+        Args:
+            model (str): The model queried.
+            contents (List[types.Content]): The request contents.
+            config (types.GenerateContentConfig): The generation config.
+
+        Returns:
+            Dict[str, Any]: The scripted reply.
+        """
+        with self._lock:
+            self.requests.append(
+                {"model": model, "contents": contents, "config": config}
+            )
+            reply = self.replies[self._next_reply % len(self.replies)]
+            self._next_reply += 1
+        return reply
+
+    def _chunks(
+        self, reply: Dict[str, Any], contents: List[types.Content]
+    ) -> List[types.GenerateContentResponse]:
+        """Splits a scripted reply into the chunks a stream would deliver.
+
+        Args:
+            reply (Dict[str, Any]): The scripted reply.
+            contents (List[types.Content]): The request contents, for usage.
+
+        Returns:
+            List[types.GenerateContentResponse]: The chunks, the last one
+            carrying the function calls and usage.
+        """
+        words = reply.get("text", "").split(" ") if reply.get("text") else []
+        pieces = [
+            " ".join(words[i : i + self.chunk_tokens])
+            for i in range(0, len(words), self.chunk_tokens)
+        ]
+        pieces = [
+            piece + (" " if index < len(pieces) - 1 else "")
+            for index, piece in enumerate(pieces)
+        ]
+        calls = [
+            types.Part(
+                function_call=types.FunctionCall(
+                    name=call["name"], args=call.get("args", {})
+                )
+            )
+            for call in reply.get("function_calls", [])
+        ]
+
+        chunk_parts: List[List[types.Part]] = [
+            [types.Part.from_text(text=piece)] for piece in pieces
+        ]
+        if calls or not chunk_parts:
+            chunk_parts.append(calls)
+        usage = types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=sum(estimate_tokens(c) for c in contents),
+            candidates_token_count=len(words) + len(calls),
+        )
+        return [
+            types.GenerateContentResponse(
+                candidates=[types.Candidate(content=types.ModelContent(parts=parts))],
+                usage_metadata=usage if index == len(chunk_parts) - 1 else None,
+            )
+            for index, parts in enumerate(chunk_parts)
+        ]
+
+    def _chunk_delay(self, chunk: types.GenerateContentResponse) -> float:
+        """Returns how long a chunk takes to generate.
+
+        Args:
+            chunk (types.GenerateContentResponse): The chunk.
+
+        Returns:
+            float: The delay in seconds.
+        """
+        parts = chunk.candidates[0].content.parts or []
+        words = sum(len(part.text.split()) for part in parts if part.text)
+        return words * self.token_latency
+
+    def generate_content(
+        self,
+        model: str,
+        contents: List[types.Content],
+        config: types.GenerateContentConfig,
+    ) -> types.GenerateContentResponse:
+        chunks = self._chunks(self._take_reply(model, contents, config), contents)
+        time.sleep(self.time_to_first_token + sum(self._chunk_delay(c) for c in chunks))
+        parts = [part for chunk in chunks for part in chunk.candidates[0].content.parts]
+        text = "".join(part.text for part in parts if part.text)
+        merged = [types.Part.from_text(text=text)] if text else []
+        merged += [part for part in parts if part.function_call]
+        return types.GenerateContentResponse(
+            candidates=[types.Candidate(content=types.ModelContent(parts=merged))],
+            usage_metadata=chunks[-1].usage_metadata,
+        )
+
+    def generate_content_stream(
+        self,
+        model: str,
+        contents: List[types.Content],
+        config: types.GenerateContentConfig,
+    ) -> Iterator[types.GenerateContentResponse]:
+        chunks = self._chunks(self._take_reply(model, contents, config), contents)
+        time.sleep(self.time_to_first_token)
+        for chunk in chunks:
+            time.sleep(self._chunk_delay(chunk))
+            yield chunk
+
+    async def agenerate_content_stream(
+        self,
+        model: str,
+        contents: List[types.Content],
+        config: types.GenerateContentConfig,
+    ) -> AsyncIterator[types.GenerateContentResponse]:
+        chunks = self._chunks(self._take_reply(model, contents, config), contents)
+
+        async def stream() -> AsyncIterator[types.GenerateContentResponse]:
+            await asyncio.sleep(self.time_to_first_token)
+            for chunk in chunks:
+                await asyncio.sleep(self._chunk_delay(chunk))
+                yield chunk
+
+        return stream()
+
+
+def create_backend() -> LLMBackend:
+    """Builds the backend selected by `TESSERA_LLM_BACKEND`.
+
+    `fake` replays `TESSERA_FAKE_LLM_SCRIPT` (a JSON list of replies) or a
+    default reply, with latency from `TESSERA_FAKE_TTFT` and
+    `TESSERA_FAKE_TOKEN_LATENCY`. Anything else uses the Gemini API.
+
+    Returns:
+        LLMBackend: The backend to use.
+    """
+    if os.environ.get("TESSERA_LLM_BACKEND", "gemini").lower() != "fake":
+        return GeminiBackend()
+
+    latency = {
+        "time_to_first_token": float(os.environ.get("TESSERA_FAKE_TTFT", 0.3)),
+        "token_latency": float(os.environ.get("TESSERA_FAKE_TOKEN_LATENCY", 0.01)),
+    }
+    script = os.environ.get("TESSERA_FAKE_LLM_SCRIPT")
+    print("Using the offline LLM stand-in")
+    if script:
+        return FakeBackend.from_file(script, **latency)
+    return FakeBackend(**latency)
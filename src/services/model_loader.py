@@ -0,0 +1,127 @@
+import json
+import threading
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+import onnxruntime
+from faster_whisper import WhisperModel
+from piper import PiperConfig, PiperVoice, SynthesisConfig
+
+from managers.state_manager import get_resource_path
+from managers.thread_budget import ThreadBudget
+
+TTS_MODEL_PATH = "models/en_US-hfc_male-medium.onnx"
+TTS_CONFIG_PATH = "models/en_US-hfc_male-medium.onnx.json"
+WARMUP_TEXT = "Hello."
+
+
+class ModelLoader:
+    """
+    Loads and warms up the speech models in a background thread.
+    """
+
+    def __init__(
+        self,
+        tts_model_path: str = TTS_MODEL_PATH,
+        tts_config_path: str = TTS_CONFIG_PATH,
+        whisper_model_size: str = "tiny",
+        whisper_device: str = "cpu",
+        whisper_compute_type: str = "int8",
+        thread_budget: Optional[ThreadBudget] = None,
+    ) -> None:
+        self.tts_model_path = get_resource_path(tts_model_path)
+        self.tts_config_path = get_resource_path(tts_config_path)
+        self.whisper_model_size = whisper_model_size
+        self.whisper_device = whisper_device
+        self.whisper_compute_type = whisper_compute_type
+        self.thread_budget = thread_budget or ThreadBudget()
+
+        self.tts_voice: Optional[PiperVoice] = None
+        self.whisper_model: Optional[WhisperModel] = None
+        self.error: Optional[BaseException] = None
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """
+        Starts loading the models in a daemon thread if not already started.
+        """
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._load, daemon=True)
+            self._thread.start()
+
+    def _load(self) -> None:
+        """
+        Loads both models and runs a dummy inference pass through each.
+        """
+        try:
+            self.thread_budget.apply_blas_limits()
+            print(f"Thread budget: {self.thread_budget.describe()}")
+
+            start_time = time.perf_counter()
+            self.tts_voice = self._load_tts_voice()
+            for _ in self.tts_voice.synthesize(
+                WARMUP_TEXT, syn_config=SynthesisConfig()
+            ):
+                pass
+            print(f"TTS model ready in {time.perf_counter() - start_time:.2f}s")
+
+            start_time = time.perf_counter()
+            self.whisper_model = WhisperModel(
+                self.whisper_model_size,
+                device=self.whisper_device,
+                compute_type=self.whisper_compute_type,
+                **self.thread_budget.whisper_kwargs(),
+            )
+            sampling_rate = self.whisper_model.feature_extractor.sampling_rate
+            segments, _ = self.whisper_model.transcribe(
+                np.zeros(sampling_rate, dtype=np.float32), language="en"
+            )
+            for _ in segments:
+                pass
+            print(f"STT model ready in {time.perf_counter() - start_time:.2f}s")
+        except Exception as e:
+            self.error = e
+            print(f"Model loading failed: {e}")
+        finally:
+            self._ready.set()
+
+    def _load_tts_voice(self) -> PiperVoice:
+        """Loads the Piper voice with thread-limited ONNX Runtime session options.
+
+        Returns:
+            PiperVoice: The loaded voice.
+        """
+        with open(self.tts_config_path, "r", encoding="utf-8") as config_file:
+            config = PiperConfig.from_dict(json.load(config_file))
+
+        session = onnxruntime.InferenceSession(
+            self.tts_model_path,
+            sess_options=self.thread_budget.piper_session_options(),
+            providers=["CPUExecutionProvider"],
+        )
+        return PiperVoice(session=session, config=config)
+
+    def is_ready(self) -> bool:
+        """Checks whether loading has finished.
+
+        Returns:
+            True if loading finished, successfully or not.
+        """
+        return self._ready.is_set()
+
+    def get_models(self) -> Tuple[PiperVoice, WhisperModel]:
+        """Returns the loaded models, starting and waiting for loading if needed.
+
+        Returns:
+            Tuple[PiperVoice, WhisperModel]: The warmed-up TTS and STT models.
+        """
+        self.start()
+        self._ready.wait()
+        if self.error is not None:
+            raise RuntimeError("Speech models failed to load") from self.error
+        return self.tts_voice, self.whisper_model
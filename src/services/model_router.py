@@ -0,0 +1,253 @@
+import json
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+MODEL_ROUTES: Dict[str, Dict[str, Any]] = {
+    "chat": {
+        "primary": "gemini-2.0-flash",
+        "fallback": "gemini-2.0-flash-lite",
+        "ttft_slo": 1.5,
+        "total_slo": 4.0,
+    },
+    "tool_follow_up": {
+        "primary": "gemini-2.0-flash",
+        "fallback": "gemini-2.0-flash-lite",
+        "ttft_slo": 1.5,
+        "total_slo": 4.0,
+    },
+    "summary": {
+        "primary": "gemini-2.0-flash",
+        "fallback": "gemini-2.0-flash-lite",
+        "ttft_slo": None,
+        "total_slo": 10.0,
+    },
+}
+
+
+def load_routes(path: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Returns the model routes, with overrides from a JSON file if given.
+
+    The file maps request types to any of `primary`, `fallback`, `ttft_slo`
+    and `total_slo`; missing keys keep their defaults.
+
+    Args:
+        path (Optional[str]): The override file, `TESSERA_MODEL_ROUTES` if omitted.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: The routes per request type.
+    """
+    routes = {name: dict(route) for name, route in MODEL_ROUTES.items()}
+    path = path or os.environ.get("TESSERA_MODEL_ROUTES")
+    if not path:
+        return routes
+    try:
+        with open(path, "r") as file:
+            overrides = json.load(file)
+    except (OSError, ValueError) as e:
+        print(f"Could not read model routes from {path}: {e}")
+        return routes
+    for name, route in overrides.items():
+        routes.setdefault(name, dict(MODEL_ROUTES["chat"])).update(route)
+    return routes
+
+
+class ModelRouter:
+    """
+    Picks the model for each request type and falls back to a faster tier
+    while the primary model misses its latency SLO.
+
+    Time to first token and total latency are tracked per model over the
+    last `window` requests, and compared by median. While a request type
+    is on its fallback, one request is sent to the primary every
+    `probe_interval` seconds; if that probe meets the SLO the route
+    switches back.
+    """
+
+    def __init__(
+        self,
+        routes: Optional[Dict[str, Dict[str, Any]]] = None,
+        window: int = 10,
+        min_samples: int = 3,
+        probe_interval: float = 60.0,
+    ) -> None:
+        self.routes = routes or load_routes()
+        self.window = window
+        self.min_samples = min_samples
+        self.probe_interval = probe_interval
+        self._ttft: Dict[str, Deque[float]] = {}
+        self._total: Dict[str, Deque[float]] = {}
+        self._degraded: Dict[str, float] = {}
+        self._probing: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    def choose(self, request_type: str) -> str:
+        """Picks the model for a request and logs the decision.
+
+        Args:
+            request_type (str): The kind of request, a key of the routes.
+
+        Returns:
+            str: The model to send the request to.
+        """
+        route = self.routes.get(request_type, self.routes["chat"])
+        primary, fallback = route["primary"], route.get("fallback")
+        with self._lock:
+            if not fallback or fallback == primary:
+                return primary
+
+            if request_type not in self._degraded:
+                breach = self._breach(primary, route)
+                if breach is None:
+                    return primary
+                self._degraded[request_type] = time.monotonic()
+                print(f"Routing {request_type} to {fallback}: {primary} {breach}")
+                return fallback
+
+            since = self._degraded[request_type]
+            if not self._probing.get(request_type) and (
+                time.monotonic() - since >= self.probe_interval
+            ):
+                self._probing[request_type] = True
+                print(f"Routing {request_type} to {primary} to probe its latency")
+                return primary
+            return fallback
+
+    def record(
+        self,
+        model: str,
+        ttft: Optional[float],
+        total: float,
+        request_type: Optional[str] = None,
+    ) -> None:
+        """Records the latency of a completed or failed request.
+
+        Args:
+            model (str): The model the request went to.
+            ttft (Optional[float]): Seconds to the first chunk, None for
+                blocking requests.
+            total (float): Seconds until the request finished or failed.
+            request_type (Optional[str]): The kind of request, to settle probes.
+        """
+        with self._lock:
+            if ttft is not None:
+                self._samples(self._ttft, model).append(ttft)
+            self._samples(self._total, model).append(total)
+
+            if request_type is None or not self._probing.get(request_type):
+                return
+            route = self.routes.get(request_type, self.routes["chat"])
+            if model != route["primary"]:
+                return
+            self._probing[request_type] = False
+            if self._meets_slo(ttft, total, route):
+                self._ttft[model] = deque(
+                    [] if ttft is None else [ttft], maxlen=self.window
+                )
+                self._total[model] = deque([total], maxlen=self.window)
+                del self._degraded[request_type]
+                print(f"Routing {request_type} back to {model}: probe met the SLO")
+            else:
+                self._degraded[request_type] = time.monotonic()
+
+    def record_interrupted(
+        self, model: str, ttft: Optional[float], request_type: Optional[str] = None
+    ) -> None:
+        """Records a request that was cancelled before it completed.
+
+        Its time to first token still counts, but its total latency is left
+        out. A cancelled probe settles nothing, so the next request probes
+        again.
+
+        Args:
+            model (str): The model the request went to.
+            ttft (Optional[float]): Seconds to the first chunk, None if none
+                arrived.
+            request_type (Optional[str]): The kind of request, to release probes.
+        """
+        with self._lock:
+            if ttft is not None:
+                self._samples(self._ttft, model).append(ttft)
+            if request_type is None or not self._probing.get(request_type):
+                return
+            route = self.routes.get(request_type, self.routes["chat"])
+            if model == route["primary"]:
+                self._probing[request_type] = False
+
+    def stats(self, model: str) -> Tuple[Optional[float], Optional[float]]:
+        """Returns the rolling median latencies of a model.
+
+        Args:
+            model (str): The model.
+
+        Returns:
+            Tuple[Optional[float], Optional[float]]: Median time to first token
+            and median total latency in seconds, None without samples.
+        """
+        with self._lock:
+            ttft = self._ttft.get(model)
+            total = self._total.get(model)
+            return (
+                statistics.median(ttft) if ttft else None,
+                statistics.median(total) if total else None,
+            )
+
+    def _samples(self, samples: Dict[str, Deque[float]], model: str) -> Deque[float]:
+        """Returns a model's rolling window, creating it if needed.
+
+        Args:
+            samples (Dict[str, Deque[float]]): The windows per model.
+            model (str): The model.
+
+        Returns:
+            Deque[float]: The window.
+        """
+        if model not in samples:
+            samples[model] = deque(maxlen=self.window)
+        return samples[model]
+
+    def _breach(self, model: str, route: Dict[str, Any]) -> Optional[str]:
+        """Checks a model's rolling medians against a route's SLOs.
+
+        Args:
+            model (str): The model.
+            route (Dict[str, Any]): The route with its SLOs.
+
+        Returns:
+            Optional[str]: A description of the breach, or None if within SLO.
+        """
+        ttft = self._ttft.get(model)
+        total = self._total.get(model)
+        if not total or len(total) < self.min_samples:
+            return None
+        if route.get("ttft_slo") and ttft:
+            ttft_median = statistics.median(ttft)
+            if ttft_median > route["ttft_slo"]:
+                return (
+                    f"median time to first token {ttft_median:.2f} s "
+                    f"> {route['ttft_slo']} s"
+                )
+        total_median = statistics.median(total)
+        if route.get("total_slo") and total_median > route["total_slo"]:
+            return f"median latency {total_median:.2f} s > {route['total_slo']} s"
+        return None
+
+    def _meets_slo(
+        self, ttft: Optional[float], total: float, route: Dict[str, Any]
+    ) -> bool:
+        """Checks a single request against a route's SLOs.
+
+        Args:
+            ttft (Optional[float]): Seconds to the first chunk, None if unknown.
+            total (float): Seconds until the request finished.
+            route (Dict[str, Any]): The route with its SLOs.
+
+        Returns:
+            bool: True if the request met every SLO.
+        """
+        if route.get("ttft_slo") and ttft is not None and ttft > route["ttft_slo"]:
+            return False
+        return not (route.get("total_slo") and total > route["total_slo"])
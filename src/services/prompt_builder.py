@@ -0,0 +1,155 @@
+from typing import Dict, List, Optional, Tuple
+
+from google.genai import types
+
+from managers.state_manager import StateManager, get_resource_path
+from services.prompt_cache import PromptCache
+
+SYSTEM_PROMPT_PATH = "src/prompts/system_prompt.md"
+WELCOME_PROMPT = "Give a brief greeting like 'Welcome back, glad to see you again' or similar, then ask if they're ready to get started again and recommend headphones. Wait for their response before proceeding with any training."
+
+
+def load_system_prompt() -> str:
+    """
+    Loads the system prompt from the prompts directory.
+
+    Returns:
+        str: The system prompt content.
+    """
+    prompt_path = get_resource_path(SYSTEM_PROMPT_PATH)
+    with open(prompt_path, "r") as file:
+        return file.read()
+
+
+class PromptBuilder:
+    """
+    Assembles the system instruction and generation config, rebuilding only on change.
+    """
+
+    def __init__(
+        self,
+        state_manager: StateManager,
+        tools: List[types.Tool],
+        temperature: float = 0.7,
+        prompt_cache: Optional[PromptCache] = None,
+    ) -> None:
+        self.state_manager = state_manager
+        self.tools = tools
+        self.temperature = temperature
+        self.prompt_cache = prompt_cache
+        self.prompt_version: int = 0
+        self._system_prompt: str = load_system_prompt()
+        self._configs: Dict[
+            bool, Tuple[Tuple[int, int], types.GenerateContentConfig]
+        ] = {}
+        self._cached_configs: Dict[str, types.GenerateContentConfig] = {}
+        self._context_contents: Tuple[int, List[types.Content]] = (-1, [])
+
+    def reload_system_prompt(self) -> None:
+        """
+        Re-reads the system prompt file, e.g. after it was edited.
+        """
+        prompt = load_system_prompt()
+        if prompt != self._system_prompt:
+            self._system_prompt = prompt
+            self.prompt_version += 1
+
+    def system_instruction(self, include_progress: bool = True) -> str:
+        """Builds the system instruction text.
+
+        Args:
+            include_progress (bool): Whether to append the progress context.
+
+        Returns:
+            str: The static prompt, optionally followed by the progress context.
+        """
+        if not include_progress:
+            return self._system_prompt
+        progress_context = self.state_manager.get_context_summary()
+        if not progress_context:
+            return self._system_prompt
+        return (
+            f"{self._system_prompt}\n\n## Current Progress Context:\n{progress_context}"
+        )
+
+    def get_config(self, include_progress: bool = True) -> types.GenerateContentConfig:
+        """Returns the generation config, rebuilding it only if its inputs changed.
+
+        Args:
+            include_progress (bool): Whether the instruction carries the progress context.
+
+        Returns:
+            types.GenerateContentConfig: The config for the next request.
+        """
+        key = (
+            self.prompt_version,
+            self.state_manager.context_version if include_progress else 0,
+        )
+        cached = self._configs.get(include_progress)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        config = types.GenerateContentConfig(
+            system_instruction=self.system_instruction(include_progress),
+            tools=self.tools,
+            temperature=self.temperature,
+        )
+        self._configs[include_progress] = (key, config)
+        return config
+
+    def build_request(
+        self, model: str, include_progress: bool = True
+    ) -> Tuple[types.GenerateContentConfig, List[types.Content]]:
+        """Returns the config and any leading contents for a request.
+
+        When a server-side cache holds the static prompt and tools, the config
+        only references it, and the progress context, which changes during a
+        session, is sent as a leading exchange instead.
+
+        Args:
+            model (str): The model the request goes to.
+            include_progress (bool): Whether the request carries the progress context.
+
+        Returns:
+            Tuple[types.GenerateContentConfig, List[types.Content]]: The config and
+            the contents to place before the conversation history.
+        """
+        cache_name = None
+        if self.prompt_cache is not None:
+            cache_name = self.prompt_cache.get(
+                model, self._system_prompt, self.tools, self.prompt_version
+            )
+        if cache_name is None:
+            return self.get_config(include_progress), []
+
+        config = self._cached_configs.get(cache_name)
+        if config is None:
+            config = types.GenerateContentConfig(
+                cached_content=cache_name, temperature=self.temperature
+            )
+            self._cached_configs[cache_name] = config
+        return config, self.context_contents() if include_progress else []
+
+    def context_contents(self) -> List[types.Content]:
+        """Builds the progress context as a leading user/model exchange.
+
+        Returns:
+            List[types.Content]: The exchange, or an empty list without progress.
+        """
+        version = self.state_manager.context_version
+        if self._context_contents[0] != version:
+            progress_context = self.state_manager.get_context_summary()
+            contents: List[types.Content] = []
+            if progress_context:
+                contents = [
+                    types.UserContent(
+                        parts=[
+                            types.Part.from_text(
+                                text=f"## Current Progress Context:\n{progress_context}"
+                            )
+                        ]
+                    ),
+                    types.ModelContent(parts=[types.Part.from_text(text="Noted.")]),
+                ]
+            self._context_contents = (version, contents)
+        return self._context_contents[1]
@@ -0,0 +1,215 @@
+import datetime
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import google.genai as genai
+from google.genai import types
+
+CACHE_TTL_SECONDS = 3600
+REFRESH_MARGIN_SECONDS = 300
+RETRY_AFTER_SECONDS = 600
+
+
+class PromptCache:
+    """
+    Keeps server-side cached content for the static system prompt and tools.
+    """
+
+    def __init__(
+        self,
+        client: genai.Client,
+        ttl_seconds: int = CACHE_TTL_SECONDS,
+        refresh_margin: int = REFRESH_MARGIN_SECONDS,
+        retry_after: int = RETRY_AFTER_SECONDS,
+    ) -> None:
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin = refresh_margin
+        self.retry_after = retry_after
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._creating: Dict[str, int] = {}
+        self._unavailable_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._closed: bool = False
+
+    def get(
+        self,
+        model: str,
+        system_prompt: str,
+        tools: List[types.Tool],
+        prompt_version: int,
+    ) -> Optional[str]:
+        """Returns the cache to use for a request without ever blocking on it.
+
+        A missing or outdated cache is (re)created in the background and the
+        caller falls back to sending the prompt inline until it is ready.
+
+        Args:
+            model (str): The model the request goes to; caches are per model.
+            system_prompt (str): The static system instruction.
+            tools (List[types.Tool]): The tool declarations.
+            prompt_version (int): Version of the prompt, bumped when it changes.
+
+        Returns:
+            Optional[str]: The cached content name, or None to send inline.
+        """
+        with self._lock:
+            entry = self._entries.get(model)
+            if entry and entry["prompt_version"] == prompt_version:
+                if entry["expires"] > time.time():
+                    return entry["name"]
+                del self._entries[model]
+                entry = None
+            if self._closed or self._creating.get(model) == prompt_version:
+                return None
+            if self._unavailable_until.get(model, 0) > time.time():
+                return None
+            self._creating[model] = prompt_version
+
+        threading.Thread(
+            target=self._create,
+            args=(model, system_prompt, tools, prompt_version, entry),
+            daemon=True,
+        ).start()
+        return None
+
+    def invalidate(self, model: str) -> None:
+        """Forgets the cache for a model after a request using it failed.
+
+        Args:
+            model (str): The model whose cache should be recreated.
+        """
+        with self._lock:
+            self._entries.pop(model, None)
+
+    def close(self) -> None:
+        """
+        Deletes every cache this process created.
+        """
+        with self._lock:
+            self._closed = True
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            self._delete(entry["name"])
+
+    def _create(
+        self,
+        model: str,
+        system_prompt: str,
+        tools: List[types.Tool],
+        prompt_version: int,
+        outdated: Optional[Dict[str, Any]],
+    ) -> None:
+        """Creates a cache and schedules its refresh.
+
+        Args:
+            model (str): The model to create the cache for.
+            system_prompt (str): The static system instruction.
+            tools (List[types.Tool]): The tool declarations.
+            prompt_version (int): Version of the prompt being cached.
+            outdated (Optional[Dict[str, Any]]): The entry being replaced, if any.
+        """
+        start_time = time.perf_counter()
+        try:
+            cache = self.client.caches.create(
+                model=model,
+                config=types.CreateCachedContentConfig(
+                    display_name=f"tessera-prompt-v{prompt_version}",
+                    system_instruction=system_prompt,
+                    tools=tools,
+                    ttl=f"{self.ttl_seconds}s",
+                ),
+            )
+        except Exception as e:
+            print(f"Prompt caching unavailable for {model}: {e}")
+            with self._lock:
+                self._creating.pop(model, None)
+                self._unavailable_until[model] = time.time() + self.retry_after
+            return
+
+        entry = {
+            "name": cache.name,
+            "prompt_version": prompt_version,
+            "expires": self._expiry(cache),
+        }
+        with self._lock:
+            self._creating.pop(model, None)
+            current = self._entries.get(model)
+            stale = self._closed or (
+                current is not None and current["prompt_version"] > prompt_version
+            )
+            if not stale:
+                self._entries[model] = entry
+        if stale:
+            self._delete(cache.name)
+            return
+        print(
+            f"Prompt cache for {model} ready in "
+            f"{(time.perf_counter() - start_time) * 1000:.0f} ms"
+        )
+        if outdated is not None:
+            self._delete(outdated["name"])
+        self._schedule_refresh(model, entry)
+
+    def _expiry(self, cache: types.CachedContent) -> float:
+        """Converts a cache's expiry to a wall-clock timestamp.
+
+        Args:
+            cache (types.CachedContent): The created or updated cache.
+
+        Returns:
+            float: The Unix time at which the cache expires.
+        """
+        if cache.expire_time is not None:
+            expire_time = cache.expire_time
+            if expire_time.tzinfo is None:
+                expire_time = expire_time.replace(tzinfo=datetime.timezone.utc)
+            return expire_time.timestamp()
+        return time.time() + self.ttl_seconds
+
+    def _schedule_refresh(self, model: str, entry: Dict[str, Any]) -> None:
+        """Arms a timer that extends the cache's TTL before it runs out.
+
+        Args:
+            model (str): The model the cache belongs to.
+            entry (Dict[str, Any]): The cache entry to refresh.
+        """
+        delay = max(1.0, entry["expires"] - time.time() - self.refresh_margin)
+        timer = threading.Timer(delay, self._refresh, args=(model, entry))
+        timer.daemon = True
+        timer.start()
+
+    def _refresh(self, model: str, entry: Dict[str, Any]) -> None:
+        """Extends a cache's TTL if it is still in use.
+
+        Args:
+            model (str): The model the cache belongs to.
+            entry (Dict[str, Any]): The cache entry to refresh.
+        """
+        with self._lock:
+            if self._entries.get(model) is not entry:
+                return
+        try:
+            cache = self.client.caches.update(
+                name=entry["name"],
+                config=types.UpdateCachedContentConfig(ttl=f"{self.ttl_seconds}s"),
+            )
+        except Exception as e:
+            print(f"Prompt cache refresh failed for {model}: {e}")
+            self.invalidate(model)
+            return
+        entry["expires"] = self._expiry(cache)
+        self._schedule_refresh(model, entry)
+
+    def _delete(self, name: str) -> None:
+        """Deletes a cache, ignoring failures since it will expire anyway.
+
+        Args:
+            name (str): The cached content name.
+        """
+        try:
+            self.client.caches.delete(name=name)
+        except Exception as e:
+            print(f"Could not delete prompt cache {name}: {e}")
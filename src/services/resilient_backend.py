@@ -0,0 +1,563 @@
+import asyncio
+import bisect
+import concurrent.futures
+import os
+import random
+import threading
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+import httpx
+from google.genai import errors, types
+
+from services.llm_backend import LLMBackend, prepend_chunk
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+HISTOGRAM_BUCKETS_MS = [
+    50,
+    100,
+    150,
+    200,
+    300,
+    400,
+    500,
+    750,
+    1000,
+    1500,
+    2000,
+    3000,
+    5000,
+    8000,
+    12000,
+    20000,
+]
+
+T = TypeVar("T")
+
+
+def close_stream(chunks: Iterator[Any]) -> None:
+    """Closes a streamed response if it holds a connection open.
+
+    Args:
+        chunks (Iterator[Any]): The stream, usually a generator.
+    """
+    close = getattr(chunks, "close", None)
+    if close is not None:
+        close()
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Checks whether a failed request is worth retrying.
+
+    Args:
+        error (BaseException): The error the request raised.
+
+    Returns:
+        bool: True for timeouts, connection problems and 408/429/5xx responses.
+    """
+    if isinstance(error, errors.APIError):
+        return error.code in RETRYABLE_STATUS_CODES
+    return isinstance(
+        error,
+        (TimeoutError, asyncio.TimeoutError, ConnectionError, httpx.TransportError),
+    )
+
+
+class LatencyHistogram:
+    """
+    Counts request latencies in fixed millisecond buckets.
+    """
+
+    def __init__(self, buckets_ms: Optional[List[float]] = None) -> None:
+        self.buckets_ms = buckets_ms or HISTOGRAM_BUCKETS_MS
+        self.counts: List[int] = [0] * (len(self.buckets_ms) + 1)
+        self.total: int = 0
+        self._samples: List[float] = []
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """Adds one observation.
+
+        Args:
+            seconds (float): The observed latency.
+        """
+        milliseconds = seconds * 1000
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets_ms, milliseconds)] += 1
+            self.total += 1
+            bisect.insort(self._samples, milliseconds)
+            if len(self._samples) > 500:
+                self._samples.pop(random.randrange(len(self._samples)))
+
+    def quantile(self, fraction: float) -> Optional[float]:
+        """Estimates a latency quantile from recent observations.
+
+        Args:
+            fraction (float): The quantile, e.g. 0.95.
+
+        Returns:
+            Optional[float]: The latency in seconds, or None without data.
+        """
+        with self._lock:
+            if not self._samples:
+                return None
+            index = min(len(self._samples) - 1, int(fraction * len(self._samples)))
+            return self._samples[index] / 1000
+
+    def summary(self) -> str:
+        """Formats the percentiles and non-empty buckets for the log.
+
+        Returns:
+            str: A one-line summary.
+        """
+        if not self.total:
+            return "n=0"
+        percentiles = ", ".join(
+            f"p{int(q * 100)} {self.quantile(q) * 1000:.0f} ms"
+            for q in (0.5, 0.95, 0.99)
+        )
+        with self._lock:
+            buckets = " ".join(
+                f"<={bound:g}:{count}"
+                for bound, count in zip(self.buckets_ms + [float("inf")], self.counts)
+                if count
+            )
+        return f"n={self.total}, {percentiles} [{buckets}]"
+
+
+class ResilientBackend(LLMBackend):
+    """
+    Wraps a backend with deadlines, retries with backoff and request hedging.
+
+    Each streamed attempt must deliver its first chunk within
+    `first_chunk_timeout`, and each blocking attempt must complete within
+    `response_timeout`. Retryable failures are retried with jittered
+    exponential backoff until `max_attempts` or the overall `deadline` is
+    reached. With hedging, a second identical request is sent if the first
+    is slower than the p95 of recent requests, and whichever answers first
+    is used. Hedging doubles the cost of slow requests, so it is off unless
+    `hedge` is set or `TESSERA_LLM_HEDGE=1`. A stream that stops sending for
+    `stall_timeout` is aborted.
+    """
+
+    def __init__(
+        self,
+        inner: LLMBackend,
+        first_chunk_timeout: float = 8.0,
+        response_timeout: float = 15.0,
+        stall_timeout: float = 15.0,
+        deadline: float = 20.0,
+        max_attempts: int = 3,
+        base_backoff: float = 0.25,
+        max_backoff: float = 4.0,
+        hedge: Optional[bool] = None,
+        hedge_quantile: float = 0.95,
+        initial_hedge_delay: float = 2.0,
+        min_hedge_delay: float = 0.5,
+        min_hedge_samples: int = 20,
+    ) -> None:
+        self.inner = inner
+        self.client = inner.client
+        self.first_chunk_timeout = first_chunk_timeout
+        self.response_timeout = response_timeout
+        self.stall_timeout = stall_timeout
+        self.deadline = deadline
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        if hedge is None:
+            hedge = os.environ.get("TESSERA_LLM_HEDGE") == "1"
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.initial_hedge_delay = initial_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.min_hedge_samples = min_hedge_samples
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.hedges_sent: int = 0
+        self.hedges_won: int = 0
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=4, thread_name_prefix="llm"
+        )
+        self._lock = threading.Lock()
+
+    def histogram(self, key: str) -> LatencyHistogram:
+        """Returns the histogram for a request kind, creating it if needed.
+
+        Args:
+            key (str): The request kind, e.g. `"gemini-2.0-flash first chunk"`.
+
+        Returns:
+            LatencyHistogram: The histogram.
+        """
+        with self._lock:
+            if key not in self.histograms:
+                self.histograms[key] = LatencyHistogram()
+            return self.histograms[key]
+
+    def report(self) -> None:
+        """
+        Prints the latency histograms and hedging counts.
+        """
+        for key, histogram in sorted(self.histograms.items()):
+            print(f"Latency {key}: {histogram.summary()}")
+        if self.hedges_sent:
+            print(f"Hedged requests: {self.hedges_sent} sent, {self.hedges_won} won")
+
+    def _hedge_delay(self, key: str) -> Optional[float]:
+        """Works out when to send a hedged request.
+
+        Args:
+            key (str): The request kind.
+
+        Returns:
+            Optional[float]: Seconds after the first request, or None to not hedge.
+        """
+        if not self.hedge:
+            return None
+        histogram = self.histogram(key)
+        if histogram.total < self.min_hedge_samples:
+            return self.initial_hedge_delay
+        delay = histogram.quantile(self.hedge_quantile) or self.initial_hedge_delay
+        return max(self.min_hedge_delay, delay)
+
+    def _record(self, key: str, request_start: float, call_start: float) -> None:
+        """Records the latency of the request that answered and of the call.
+
+        The per-request latency drives the hedge delay; the latency seen by
+        the caller, including any hedge wait, goes into a separate histogram.
+
+        Args:
+            key (str): The request kind.
+            request_start (float): When the answering request was sent.
+            call_start (float): When the caller's attempt started.
+        """
+        now = time.monotonic()
+        self.histogram(key).record(now - request_start)
+        self.histogram(f"{key} seen").record(now - call_start)
+
+    def _backoff(self, attempt: int) -> float:
+        """Returns a full-jitter exponential backoff delay.
+
+        Args:
+            attempt (int): The number of attempts made so far.
+
+        Returns:
+            float: The delay in seconds.
+        """
+        return random.uniform(
+            0, min(self.max_backoff, self.base_backoff * 2 ** (attempt - 1))
+        )
+
+    def _with_retries(
+        self, kind: str, timeout: float, attempt: Callable[[float], T]
+    ) -> T:
+        """Runs blocking attempts until one succeeds or the budget is spent.
+
+        Args:
+            kind (str): The request kind, for the log.
+            timeout (float): The time allowed for each attempt.
+            attempt (Callable[[float], T]): Runs one attempt given its timeout.
+
+        Returns:
+            T: The result of the successful attempt.
+        """
+        give_up_at = time.monotonic() + self.deadline
+        for number in range(1, self.max_attempts + 1):
+            remaining = give_up_at - time.monotonic()
+            try:
+                return attempt(min(timeout, remaining))
+            except Exception as e:
+                delay = self._backoff(number)
+                if (
+                    not is_retryable(e)
+                    or number == self.max_attempts
+                    or time.monotonic() + delay >= give_up_at
+                ):
+                    raise
+                print(f"{kind} failed ({e}), retrying in {delay:.2f} s")
+                time.sleep(delay)
+        raise TimeoutError(f"{kind} gave up")
+
+    def _hedged(
+        self,
+        key: str,
+        timeout: float,
+        request: Callable[[], T],
+        discard: Optional[Callable[[T], None]] = None,
+    ) -> T:
+        """Runs a blocking request on the pool, hedging it if it is slow.
+
+        Requests that lose the race or time out are abandoned, since a
+        blocking HTTP call cannot be interrupted; their results are passed
+        to `discard` whenever they arrive.
+
+        Args:
+            key (str): The request kind, for the histogram.
+            timeout (float): How long to wait for an answer.
+            request (Callable[[], T]): The request to run.
+            discard (Optional[Callable[[T], None]]): Releases an unused result,
+                e.g. closes a stream.
+
+        Returns:
+            T: The first successful result.
+        """
+        start_time = time.monotonic()
+        give_up_at = start_time + timeout
+        hedge_delay = self._hedge_delay(key)
+        hedge_at = start_time + hedge_delay if hedge_delay is not None else None
+        first_request = self._executor.submit(request)
+        started = {first_request: start_time}
+        pending = {first_request}
+        winner: Optional["concurrent.futures.Future[T]"] = None
+        error: Optional[BaseException] = None
+
+        def release(future: "concurrent.futures.Future[T]") -> None:
+            if not future.cancelled() and future.exception() is None:
+                discard(future.result())
+
+        try:
+            while pending:
+                wake_at = give_up_at if hedge_at is None else min(give_up_at, hedge_at)
+                done, pending = concurrent.futures.wait(
+                    pending,
+                    timeout=max(0.0, wake_at - time.monotonic()),
+                    return_when=concurrent.futures.FIRST_COMPLETED,
+                )
+                for future in done:
+                    if future.exception() is None:
+                        winner = future
+                        break
+                    error = future.exception()
+                if winner is not None:
+                    self._record(key, started[winner], start_time)
+                    if winner is not first_request:
+                        self.hedges_won += 1
+                    return winner.result()
+                if hedge_at is not None and time.monotonic() >= hedge_at and pending:
+                    hedge_at = None
+                    self.hedges_sent += 1
+                    hedge = self._executor.submit(request)
+                    started[hedge] = time.monotonic()
+                    pending.add(hedge)
+                elif not done and time.monotonic() >= give_up_at:
+                    break
+        finally:
+            if discard is not None:
+                for future in started:
+                    if future is not winner:
+                        future.add_done_callback(release)
+
+        if error is not None and not pending:
+            raise error
+        raise TimeoutError(f"no response within {timeout:.1f} s")
+
+    def generate_content(
+        self,
+        model: str,
+        contents: List[types.Content],
+        config: types.GenerateContentConfig,
+    ) -> types.GenerateContentResponse:
+        key = f"{model} response"
+        return self._with_retries(
+            "Request",
+            self.response_timeout,
+            lambda timeout: self._hedged(
+                key,
+                timeout,
+                lambda: self.inner.generate_content(model, contents, config),
+            ),
+        )
+
+    def generate_content_stream(
+        self,
+        model: str,
+        contents: List[types.Content],
+        config: types.GenerateContentConfig,
+    ) -> Iterator[types.GenerateContentResponse]:
+        key = f"{model} first chunk"
+
+        def open_stream() -> Tuple[
+            Optional[types.GenerateContentResponse],
+            Iterator[types.GenerateContentResponse],
+        ]:
+            chunks = iter(self.inner.generate_content_stream(model, contents, config))
+            try:
+                return next(chunks, None), chunks
+            except BaseException:
+                close_stream(chunks)
+                raise
+
+        def discard(
+            opened: Tuple[
+                Optional[types.GenerateContentResponse],
+                Iterator[types.GenerateContentResponse],
+            ],
+        ) -> None:
+            close_stream(opened[1])
+
+        first, chunks = self._with_retries(
+            "Streamed request",
+            self.first_chunk_timeout,
+            lambda timeout: self._hedged(key, timeout, open_stream, discard),
+        )
+        try:
+            if first is not None:
+                yield first
+            yield from chunks
+        finally:
+            close_stream(chunks)
+
+    async def agenerate_content_stream(
+        self,
+        model: str,
+        contents: List[types.Content],
+        config: types.GenerateContentConfig,
+    ) -> AsyncIterator[types.GenerateContentResponse]:
+        give_up_at = time.monotonic() + self.deadline
+        for number in range(1, self.max_attempts + 1):
+            timeout = min(self.first_chunk_timeout, give_up_at - time.monotonic())
+            try:
+                first, chunks = await self._ahedged(model, contents, config, timeout)
+                return self._watch_stalls(prepend_chunk(first, chunks))
+            except Exception as e:
+                delay = self._backoff(number)
+                if (
+                    not is_retryable(e)
+                    or number == self.max_attempts
+                    or time.monotonic() + delay >= give_up_at
+                ):
+                    raise
+                print(f"Streamed request failed ({e}), retrying in {delay:.2f} s")
+                await asyncio.sleep(delay)
+        raise TimeoutError("Streamed request gave up")
+
+    async def _ahedged(
+        self,
+        model: str,
+        contents: List[types.Content],
+        config: types.GenerateContentConfig,
+        timeout: float,
+    ) -> Tuple[
+        Optional[types.GenerateContentResponse],
+        AsyncIterator[types.GenerateContentResponse],
+    ]:
+        """Opens a stream, hedging it if its first chunk is slow.
+
+        Args:
+            model (str): The model to query.
+            contents (List[types.Content]): The request contents.
+            config (types.GenerateContentConfig): The generation config.
+            timeout (float): How long to wait for the first chunk.
+
+        Returns:
+            The first chunk (None for an empty stream) and the rest of the stream.
+        """
+        key = f"{model} first chunk"
+
+        async def open_stream() -> Tuple[
+            Optional[types.GenerateContentResponse],
+            AsyncIterator[types.GenerateContentResponse],
+        ]:
+            chunks = await self.inner.agenerate_content_stream(model, contents, config)
+            try:
+                return await anext(chunks, None), chunks
+            except BaseException:
+                await chunks.aclose()
+                raise
+
+        start_time = time.monotonic()
+        give_up_at = start_time + timeout
+        hedge_delay = self._hedge_delay(key)
+        hedge_at = start_time + hedge_delay if hedge_delay is not None else None
+        requests = [asyncio.create_task(open_stream())]
+        started = {requests[0]: start_time}
+        pending = set(requests)
+        winner: Optional["asyncio.Task[Any]"] = None
+        error: Optional[BaseException] = None
+
+        try:
+            while pending:
+                wake_at = give_up_at if hedge_at is None else min(give_up_at, hedge_at)
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=max(0.0, wake_at - time.monotonic()),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    if task.exception() is None:
+                        winner = task
+                        break
+                    error = task.exception()
+                if winner is not None:
+                    self._record(key, started[winner], start_time)
+                    if winner is not requests[0]:
+                        self.hedges_won += 1
+                    return winner.result()
+                if hedge_at is not None and time.monotonic() >= hedge_at and pending:
+                    hedge_at = None
+                    self.hedges_sent += 1
+                    task = asyncio.create_task(open_stream())
+                    started[task] = time.monotonic()
+                    requests.append(task)
+                    pending.add(task)
+                elif not done and time.monotonic() >= give_up_at:
+                    break
+        finally:
+            for task in requests:
+                if task is winner:
+                    continue
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled() and task.exception() is None:
+                    await task.result()[1].aclose()
+
+        if error is not None and not pending:
+            raise error
+        raise TimeoutError(f"no first chunk within {timeout:.1f} s")
+
+    async def _watch_stalls(
+        self, chunks: AsyncIterator[types.GenerateContentResponse]
+    ) -> AsyncIterator[types.GenerateContentResponse]:
+        """Passes chunks through, aborting the stream if it stalls.
+
+        Args:
+            chunks (AsyncIterator[types.GenerateContentResponse]): The stream.
+
+        Yields:
+            types.GenerateContentResponse: Every chunk in order.
+        """
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(anext(chunks), self.stall_timeout)
+                except StopAsyncIteration:
+                    return
+                yield chunk
+        finally:
+            await chunks.aclose()
+
+    def warm_up(self) -> None:
+        self.inner.warm_up()
+
+    async def awarm_up(self) -> None:
+        await self.inner.awarm_up()
+
+    def is_warm(self, aio: bool) -> Optional[bool]:
+        return self.inner.is_warm(aio)
+
+    def close(self) -> None:
+        """
+        Reports the latency histograms and abandons outstanding requests.
+        """
+        self.report()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,255 @@
+import queue
+import re
+import time
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+from faster_whisper import WhisperModel
+
+from audio_engine.capture_engine import CaptureEngine
+from services.latency_tracer import LatencyTracer
+
+
+def _normalize_word(word: str) -> str:
+    """Normalizes a word for comparing hypotheses across passes.
+
+    Args:
+        word: A word as emitted by Whisper, with spacing and punctuation.
+
+    Returns:
+        The lowercase word without surrounding punctuation.
+    """
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+class StreamingTranscriber:
+    """
+    Transcribes an utterance incrementally while the user is still speaking.
+
+    With a `command_matcher`, short utterances also take a fast path: once
+    the speaker pauses briefly, a short capped Whisper pass decodes the
+    segment and, if it is a command, the segment is ended right away instead
+    of after the full end-of-speech silence.
+    """
+
+    def __init__(
+        self,
+        whisper_model: WhisperModel,
+        capture_engine: CaptureEngine,
+        sample_rate: int = 16000,
+        step_duration: float = 0.5,
+        min_tail_duration: float = 0.1,
+        language: Optional[str] = "en",
+        tracer: Optional[LatencyTracer] = None,
+        poll_duration: float = 0.1,
+        command_max_duration: float = 1.5,
+        command_pause: float = 0.25,
+        command_max_tokens: int = 12,
+    ) -> None:
+        self.whisper_model = whisper_model
+        self.capture_engine = capture_engine
+        self.sample_rate = sample_rate
+        self.step_samples = int(step_duration * sample_rate)
+        self.step_duration = step_duration
+        self.min_tail_samples = int(min_tail_duration * sample_rate)
+        self.language = language
+        self.tracer = tracer
+        self.poll_duration = poll_duration
+        self.command_max_samples = int(command_max_duration * sample_rate)
+        self.command_pause = command_pause
+        self.command_max_tokens = command_max_tokens
+        self.command_matcher: Optional[Callable[[str], bool]] = None
+
+        self._committed: List[str] = []
+        self._committed_samples: int = 0
+        self._hypothesis: List[Tuple[str, int]] = []
+        self._last_pass_samples: int = 0
+        self._command_text: Optional[str] = None
+        self._command_checked_samples: int = 0
+        self._cut_short_before: int = 0
+
+    def _reset(self) -> None:
+        """
+        Clears the stable prefix and hypothesis for a new utterance.
+        """
+        self._committed = []
+        self._committed_samples = 0
+        self._hypothesis = []
+        self._last_pass_samples = 0
+        self._command_text = None
+        self._command_checked_samples = 0
+
+    def _transcribe_words(
+        self, audio: np.ndarray, final: bool = False
+    ) -> List[Tuple[str, int]]:
+        """Runs Whisper on the uncommitted part of the utterance.
+
+        Args:
+            audio: The full utterance recorded so far.
+            final: Whether this is the pass over the finished utterance.
+
+        Returns:
+            Words paired with their absolute end position in samples.
+        """
+        start_time = time.perf_counter()
+        window = audio[self._committed_samples :]
+        segments, _ = self.whisper_model.transcribe(
+            window,
+            language=self.language,
+            beam_size=1,
+            word_timestamps=True,
+            condition_on_previous_text=False,
+            initial_prompt=" ".join(self._committed) or None,
+        )
+        words = []
+        for segment in segments:
+            for word in segment.words or []:
+                end = self._committed_samples + int(word.end * self.sample_rate)
+                words.append((word.word.strip(), end))
+        if self.tracer is not None:
+            self.tracer.record(
+                "whisper_final" if final else "whisper_partial",
+                start_time,
+                time.perf_counter(),
+                audio_ms=round(window.shape[0] / self.sample_rate * 1000),
+            )
+        return [(text, end) for text, end in words if text]
+
+    def _partial_pass(self, audio: np.ndarray) -> None:
+        """Commits the words that two consecutive passes agree on.
+
+        Args:
+            audio: The full utterance recorded so far.
+        """
+        words = self._transcribe_words(audio)
+
+        agreed = 0
+        for (previous, _), (current, _) in zip(self._hypothesis, words):
+            if _normalize_word(previous) != _normalize_word(current):
+                break
+            agreed += 1
+
+        if agreed:
+            self._committed.extend(text for text, _ in words[:agreed])
+            self._committed_samples = min(words[agreed - 1][1], audio.shape[0])
+        self._hypothesis = words[agreed:]
+
+    def _command_pass(self, audio: np.ndarray) -> None:
+        """Decodes a short, paused utterance and ends it if it is a command.
+
+        Args:
+            audio: The utterance recorded so far.
+        """
+        self._command_checked_samples = audio.shape[0]
+        start_time = time.perf_counter()
+        segments, _ = self.whisper_model.transcribe(
+            audio,
+            language=self.language,
+            beam_size=1,
+            without_timestamps=True,
+            condition_on_previous_text=False,
+            max_new_tokens=self.command_max_tokens,
+        )
+        text = " ".join(segment.text.strip() for segment in segments).strip()
+        matched = bool(text) and self.command_matcher(text)
+        if self.tracer is not None:
+            self.tracer.record(
+                "command_fast_path",
+                start_time,
+                time.perf_counter(),
+                audio_ms=round(audio.shape[0] / self.sample_rate * 1000),
+                matched=matched,
+            )
+        if matched:
+            self._command_text = text
+            self._cut_short_before = self.capture_engine.segments_cut_short
+            self.capture_engine.finish_segment()
+
+    def _wants_command_pass(self, audio: np.ndarray) -> bool:
+        """Checks whether the utterance could be a command worth decoding now.
+
+        Args:
+            audio: The utterance recorded so far.
+
+        Returns:
+            True if the utterance is short, paused and not decoded at this length.
+        """
+        return (
+            self.command_matcher is not None
+            and self._command_text is None
+            and audio.shape[0] <= self.command_max_samples
+            and audio.shape[0] > self._command_checked_samples
+            and self.capture_engine.trailing_silence() >= self.command_pause
+        )
+
+    def _cut_short_by_command(self) -> bool:
+        """Checks whether the fast path ended the utterance as a command.
+
+        Returns:
+            True if a command was matched and its segment was ended early.
+        """
+        return (
+            self._command_text is not None
+            and self.capture_engine.segments_cut_short > self._cut_short_before
+        )
+
+    def transcribe_next(self) -> Optional[str]:
+        """Waits for the next utterance, transcribing it while it is spoken.
+
+        Returns:
+            The transcript, or None if detection was interrupted.
+        """
+        self._reset()
+
+        while True:
+            try:
+                ref = self.capture_engine.utterances.get(timeout=self.poll_duration)
+                break
+            except queue.Empty:
+                pass
+
+            audio = self.capture_engine.current_segment()
+            if audio is None and self._cut_short_by_command():
+                continue
+            if audio is None or audio.shape[0] < max(
+                self._last_pass_samples, self._command_checked_samples
+            ):
+                self._reset()
+            if audio is None:
+                continue
+            if self._wants_command_pass(audio):
+                self._command_pass(audio)
+                continue
+            if audio.shape[0] - self._last_pass_samples < self.step_samples:
+                continue
+
+            self._last_pass_samples = audio.shape[0]
+            self._partial_pass(audio)
+            if self._committed:
+                print(f"Partial transcript: {' '.join(self._committed)}")
+
+        utterance = self.capture_engine.read_utterance(ref)
+        if utterance is None:
+            return None
+        if self._cut_short_by_command():
+            return self._command_text
+
+        finish_start = time.perf_counter()
+        if self._committed_samples > utterance.shape[0]:
+            self._reset()
+
+        tail_words: List[str] = []
+        if utterance.shape[0] - self._committed_samples >= self.min_tail_samples:
+            tail_words = [
+                text for text, _ in self._transcribe_words(utterance, final=True)
+            ]
+
+        if self.tracer is not None:
+            self.tracer.record(
+                "transcription",
+                finish_start,
+                time.perf_counter(),
+                committed_words=len(self._committed),
+                tail_words=len(tail_words),
+            )
+        return " ".join(self._committed + tail_words).strip()
@@ -0,0 +1,160 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Collection, Dict, List, Optional, Set, Union
+
+from google.genai import types
+
+from managers.tool_register import ToolRegister
+from services.latency_tracer import LatencyTracer
+
+CLIP_PRODUCERS = {
+    "play_environmental_sound",
+    "play_speaker_sound",
+    "play_noise_sound",
+    "play_alert_sound",
+}
+AUDIO_WIDE = {"stop_audio", "stop_all_audio", "get_status"}
+PROGRESS_WRITERS = {"add_session_observation"}
+PROGRESS_READERS = {"read_progress_log", "see_full_progress"}
+
+ToolResult = Union[str, Dict[str, Union[str, int]]]
+
+
+def plan_dependencies(
+    tool_calls: List[types.FunctionCall], existing_clips: Collection[int]
+) -> List[Set[int]]:
+    """Works out which earlier calls in a batch each call has to wait for.
+
+    Plays of different clips and reads of progress run independently. A call
+    that references a clip ID not yet playing waits for the plays earlier in
+    the batch that may produce it, calls touching the same clip keep their
+    order, whole-mixer calls (stop, status) act as barriers, and progress
+    reads wait for earlier progress writes.
+
+    Args:
+        tool_calls: The calls in the order the model made them.
+        existing_clips: The clip IDs playing before the batch starts.
+
+    Returns:
+        List[Set[int]]: For each call, the indices of the calls it depends on.
+    """
+    dependencies: List[Set[int]] = []
+    producers: List[int] = []
+    audio_calls: List[int] = []
+    last_barrier: Optional[int] = None
+    clip_users: Dict[Any, List[int]] = {}
+    progress_writes: List[int] = []
+
+    for index, tool_call in enumerate(tool_calls):
+        name = tool_call.name
+        args = tool_call.args or {}
+        depends: Set[int] = set()
+
+        if name in PROGRESS_WRITERS:
+            depends.update(progress_writes)
+            progress_writes.append(index)
+        elif name in PROGRESS_READERS:
+            depends.update(progress_writes)
+        elif name in AUDIO_WIDE:
+            depends.update(audio_calls)
+            last_barrier = index
+            audio_calls.append(index)
+        else:
+            if last_barrier is not None:
+                depends.add(last_barrier)
+            clip_id = args.get("clip_id")
+            if clip_id is not None:
+                if clip_id not in existing_clips:
+                    depends.update(producers)
+                depends.update(clip_users.get(clip_id, []))
+                clip_users.setdefault(clip_id, []).append(index)
+            if name in CLIP_PRODUCERS:
+                producers.append(index)
+            audio_calls.append(index)
+
+        dependencies.append(depends)
+    return dependencies
+
+
+class ToolExecutor:
+    """
+    Runs a batch of tool calls concurrently on a bounded pool, respecting
+    the order between calls that depend on each other.
+    """
+
+    def __init__(
+        self,
+        tool_registry: ToolRegister,
+        max_workers: int = 4,
+        tracer: Optional[LatencyTracer] = None,
+    ) -> None:
+        self.tool_registry = tool_registry
+        self.tracer = tracer
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="tools"
+        )
+
+    def run(self, function: Any, *args: Any) -> "asyncio.Future[Any]":
+        """Runs a blocking function on the tool pool.
+
+        Args:
+            function: The function to call.
+            *args: Arguments for the function.
+
+        Returns:
+            asyncio.Future[Any]: The function's result.
+        """
+        return asyncio.get_running_loop().run_in_executor(
+            self._executor, function, *args
+        )
+
+    async def execute(self, tool_calls: List[types.FunctionCall]) -> List[ToolResult]:
+        """Executes a batch of tool calls, each as soon as its dependencies are done.
+
+        Args:
+            tool_calls: The calls to execute.
+
+        Returns:
+            List[ToolResult]: The result of each call, in call order.
+        """
+        start_time = time.perf_counter()
+        dependencies = plan_dependencies(
+            tool_calls, set(self.tool_registry.audio_controller.clips)
+        )
+        tasks: List["asyncio.Task[ToolResult]"] = []
+
+        async def execute_one(index: int) -> ToolResult:
+            for dependency in dependencies[index]:
+                await asyncio.wait([tasks[dependency]])
+            tool_call = tool_calls[index]
+            call_start = time.perf_counter()
+            try:
+                result = await self.run(self.tool_registry.execute_function, tool_call)
+            except Exception as e:
+                result = f"Error running {tool_call.name}: {e}"
+            call_end = time.perf_counter()
+            print(
+                f"Tool executed: {tool_call.name} -> {result} "
+                f"({(call_end - call_start) * 1000:.0f} ms)"
+            )
+            if self.tracer is not None:
+                self.tracer.record("tool", call_start, call_end, tool=tool_call.name)
+            return result
+
+        async with asyncio.TaskGroup() as tg:
+            for index in range(len(tool_calls)):
+                tasks.append(tg.create_task(execute_one(index)))
+
+        if len(tool_calls) > 1:
+            print(
+                f"Ran {len(tool_calls)} tools in "
+                f"{(time.perf_counter() - start_time) * 1000:.0f} ms"
+            )
+        return [task.result() for task in tasks]
+
+    def close(self) -> None:
+        """
+        Stops the pool, abandoning calls that have not started.
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
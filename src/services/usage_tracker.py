@@ -0,0 +1,256 @@
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from google.genai import types
+
+
+class UsageTracker:
+    """
+    Accounts tokens and latency per request from the reported usage metadata.
+
+    Every request is logged with its prompt, cached, output and total token
+    counts, including requests interrupted mid-stream, which still consumed
+    the tokens reported before they were cancelled. Every `report_every`
+    requests a rolling view of the last `window` requests is logged, showing
+    how prompt size grows per turn and what it does to latency. `report`
+    logs the session totals.
+    """
+
+    def __init__(self, window: int = 10, report_every: int = 5) -> None:
+        self.window = window
+        self.report_every = report_every
+        self.records: List[Dict[str, Any]] = []
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        model: str,
+        request_type: str,
+        usage: Optional[types.GenerateContentResponseUsageMetadata],
+        duration: float,
+        time_to_first_chunk: Optional[float] = None,
+        turn: Optional[int] = None,
+        history_tokens: Optional[int] = None,
+        connection: Optional[str] = None,
+        interrupted: bool = False,
+    ) -> Dict[str, Any]:
+        """Records one request and logs its usage.
+
+        Args:
+            model (str): The model the request went to.
+            request_type (str): The kind of request.
+            usage (Optional[types.GenerateContentResponseUsageMetadata]): The
+                reported usage, None if the request failed or was interrupted
+                before any was reported.
+            duration (float): Seconds until the reply was complete.
+            time_to_first_chunk (Optional[float]): Seconds to the first chunk,
+                None for blocking requests.
+            turn (Optional[int]): The conversation turn the request belongs to.
+            history_tokens (Optional[int]): The estimated history size sent.
+            connection (Optional[str]): "cold" if the request had to open a
+                connection, "warm" if it reused one, None if unknown.
+            interrupted (bool): Whether the request was cancelled before it
+                completed.
+
+        Returns:
+            Dict[str, Any]: The stored record.
+        """
+        prompt = (usage.prompt_token_count or 0) if usage else 0
+        output = (usage.candidates_token_count or 0) if usage else 0
+        record = {
+            "turn": turn,
+            "model": model,
+            "request_type": request_type,
+            "ok": usage is not None and not interrupted,
+            "interrupted": interrupted,
+            "prompt_tokens": prompt,
+            "cached_tokens": (usage.cached_content_token_count or 0) if usage else 0,
+            "output_tokens": output,
+            "total_tokens": ((usage.total_token_count or 0) if usage else 0)
+            or prompt + output,
+            "history_tokens": history_tokens,
+            "connection": connection,
+            "latency_ms": round(duration * 1000),
+            "ttft_ms": (
+                None
+                if time_to_first_chunk is None
+                else round(time_to_first_chunk * 1000)
+            ),
+        }
+        with self._lock:
+            self.records.append(record)
+            self._recent.append(record)
+            count = len(self.records)
+            recent = list(self._recent)
+
+        turn_label = f"turn {turn}, " if turn is not None else ""
+        if connection is not None:
+            turn_label += f"{connection}, "
+        if interrupted:
+            tokens = (
+                f", {prompt} prompt, {output} output tokens"
+                if usage is not None
+                else ", before any usage was reported"
+            )
+            print(
+                f"Request {count} ({turn_label}{model} {request_type}) interrupted "
+                f"after {record['latency_ms']} ms{tokens}"
+            )
+        elif not record["ok"]:
+            print(
+                f"Request {count} ({turn_label}{model} {request_type}) failed "
+                f"after {record['latency_ms']} ms"
+            )
+        else:
+            ttft = (
+                f", first token {record['ttft_ms']} ms"
+                if record["ttft_ms"] is not None
+                else ""
+            )
+            print(
+                f"Request {count} ({turn_label}{model} {request_type}): "
+                f"{prompt} prompt ({record['cached_tokens']} cached), "
+                f"{output} output, {record['total_tokens']} total tokens "
+                f"in {record['latency_ms']} ms{ttft}"
+            )
+        if count % self.report_every == 0:
+            print(self._describe(recent, f"Last {len(recent)} requests"))
+        return record
+
+    def totals(self) -> Dict[str, Any]:
+        """Aggregates the session's requests.
+
+        Returns:
+            Dict[str, Any]: Request and token totals, the share of prompt
+            tokens served from cache, mean latency, and breakdowns per model
+            and by cold or warm connection.
+        """
+        with self._lock:
+            records = list(self.records)
+        totals = self._aggregate(records)
+        totals["models"] = {
+            model: self._aggregate([r for r in records if r["model"] == model])
+            for model in sorted({r["model"] for r in records})
+        }
+        totals["connections"] = {
+            connection: self._aggregate(
+                [r for r in records if r["connection"] == connection]
+            )
+            for connection in ("cold", "warm")
+            if any(r["connection"] == connection for r in records)
+        }
+        return totals
+
+    def report(self) -> None:
+        """
+        Logs the session totals.
+        """
+        with self._lock:
+            records = list(self.records)
+        if not records:
+            return
+        print(self._describe(records, "Session usage"))
+        session = self.totals()
+        for model, totals in session["models"].items():
+            print(
+                f"  {model}: {totals['requests']} requests, "
+                f"{totals['prompt_tokens']} prompt ({totals['cached_tokens']} "
+                f"cached), {totals['output_tokens']} output tokens, "
+                f"mean {totals['mean_latency_ms']:.0f} ms"
+            )
+        for connection, totals in session["connections"].items():
+            ttft = (
+                f", mean first token {totals['mean_ttft_ms']:.0f} ms"
+                if totals["mean_ttft_ms"] is not None
+                else ""
+            )
+            print(
+                f"  {connection} connection: {totals['requests']} requests, "
+                f"mean {totals['mean_latency_ms']:.0f} ms{ttft}"
+            )
+
+    def _aggregate(self, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Sums token counts and averages latency over some requests.
+
+        Args:
+            records (List[Dict[str, Any]]): The requests.
+
+        Returns:
+            Dict[str, Any]: The aggregate.
+        """
+        completed = [r for r in records if r["ok"]]
+        interrupted = [r for r in records if r["interrupted"]]
+        billed = completed + interrupted
+        streamed = [r for r in completed if r["ttft_ms"] is not None]
+        prompt = sum(r["prompt_tokens"] for r in billed)
+        cached = sum(r["cached_tokens"] for r in billed)
+        return {
+            "requests": len(records),
+            "failed": len(records) - len(billed),
+            "interrupted": len(interrupted),
+            "prompt_tokens": prompt,
+            "cached_tokens": cached,
+            "output_tokens": sum(r["output_tokens"] for r in billed),
+            "total_tokens": sum(r["total_tokens"] for r in billed),
+            "cached_share": cached / prompt if prompt else 0.0,
+            "mean_latency_ms": (
+                sum(r["latency_ms"] for r in completed) / len(completed)
+                if completed
+                else 0.0
+            ),
+            "mean_ttft_ms": (
+                sum(r["ttft_ms"] for r in streamed) / len(streamed)
+                if streamed
+                else None
+            ),
+        }
+
+    def _describe(self, records: List[Dict[str, Any]], label: str) -> str:
+        """Summarises some requests in one log line.
+
+        Args:
+            records (List[Dict[str, Any]]): The requests, oldest first.
+            label (str): What the requests are.
+
+        Returns:
+            str: The summary.
+        """
+        totals = self._aggregate(records)
+        completed = [r for r in records if r["ok"]]
+        mean_prompt = sum(r["prompt_tokens"] for r in completed) / max(
+            1, len(completed)
+        )
+        line = (
+            f"{label}: {totals['requests']} requests, mean {mean_prompt:.0f} "
+            f"prompt tokens ({totals['cached_share']:.0%} cached), "
+            f"{totals['output_tokens']} output tokens, "
+            f"mean {totals['mean_latency_ms']:.0f} ms"
+        )
+        if totals["failed"]:
+            line += f", {totals['failed']} failed"
+        if totals["interrupted"]:
+            line += f", {totals['interrupted']} interrupted"
+
+        turns = [r for r in completed if r["turn"] is not None]
+        if len(turns) > 1 and turns[-1]["turn"] != turns[0]["turn"]:
+            growth = (turns[-1]["prompt_tokens"] - turns[0]["prompt_tokens"]) / (
+                turns[-1]["turn"] - turns[0]["turn"]
+            )
+            line += f", prompt {growth:+.0f} tokens per turn"
+
+        if len(completed) > 2:
+            prompts = [r["prompt_tokens"] for r in completed]
+            mean_latency = totals["mean_latency_ms"]
+            spread = sum((p - mean_prompt) ** 2 for p in prompts)
+            if spread:
+                slope = (
+                    sum(
+                        (p - mean_prompt) * (r["latency_ms"] - mean_latency)
+                        for p, r in zip(prompts, completed)
+                    )
+                    / spread
+                )
+                line += f", {slope * 1000:+.0f} ms per 1k prompt tokens"
+        return line
@@ -1,4 +1,6 @@
-from typing import Any, Optional
+import os
+import threading
+from typing import TYPE_CHECKING, Any, Optional
 
 from kivy.animation import Animation
 from kivy.app import App
@@ -13,19 +15,38 @@ from ui.control_overlay import ControlOverlay
 from ui.orb import Orb
 from ui.startup_routine import StartupRoutine
 
+if TYPE_CHECKING:
+    from audio_engine.audio_controller import AudioController
+    from services.model_loader import ModelLoader
+
 Window.minimum_width, Window.minimum_height = 202, 300
 Window.size = (405, 550)
 Window.resizable = False
 
 
+def live_engine_selected() -> bool:
+    """Checks whether `TESSERA_CONVERSATION_ENGINE` selects the Gemini Live engine.
+
+    Returns:
+        bool: True for the Live engine, False for the local pipeline.
+    """
+    return os.environ.get("TESSERA_CONVERSATION_ENGINE", "classic").lower() == "live"
+
+
 class MainLayout(FloatLayout):
     """
     A Kivy FloatLayout that serves as the main container for the application's UI.
     """
 
-    def __init__(self, conversation_manager: Optional[Any] = None, **kwargs) -> None:
+    def __init__(
+        self,
+        conversation_manager: Optional[Any] = None,
+        model_loader: Optional["ModelLoader"] = None,
+        **kwargs,
+    ) -> None:
         super(MainLayout, self).__init__(**kwargs)
         self.conversation_manager = conversation_manager
+        self.model_loader = model_loader
         self.state_manager = StateManager()
 
         with self.canvas.before:
@@ -71,15 +92,38 @@ class MainLayout(FloatLayout):
         if hasattr(self, "startup_routine"):
             self.remove_widget(self.startup_routine)
 
-        if not self.conversation_manager:
-            from audio_engine.audio_controller import AudioController
-            from services.conversation_service import ConversationService
+        if self.conversation_manager:
+            Clock.schedule_once(lambda dt: self.start_conversation(), 0.5)
+            return
 
-            audio_controller = AudioController()
-            self.conversation_manager = ConversationService(
+        from audio_engine.audio_controller import AudioController
+
+        # SDL audio must be initialised on the main thread, notably on macOS.
+        audio_controller = AudioController()
+        threading.Thread(
+            target=self._build_conversation_manager,
+            args=(audio_controller,),
+            daemon=True,
+        ).start()
+
+    def _build_conversation_manager(self, audio_controller: "AudioController") -> None:
+        """Builds the conversation manager off the UI thread once models are loaded.
+
+        Args:
+            audio_controller: The audio controller, created on the UI thread.
+        """
+        if live_engine_selected():
+            from services.live_engine import LiveConversationEngine
+
+            self.conversation_manager = LiveConversationEngine(
                 audio_controller, self.state_manager
             )
+        else:
+            from services.conversation_service import ConversationService
 
+            self.conversation_manager = ConversationService(
+                audio_controller, self.state_manager, model_loader=self.model_loader
+            )
         Clock.schedule_once(lambda dt: self.start_conversation(), 0.5)
 
     def _update_bg(self, instance: Any, value: Any) -> None:
@@ -102,8 +146,6 @@ class MainLayout(FloatLayout):
         Starts the conversation manager in a separate thread.
         """
         if self.conversation_manager:
-            import threading
-
             conversation_thread = threading.Thread(
                 target=self.conversation_manager.start, daemon=True
             )
@@ -115,6 +157,8 @@ class MainLayout(FloatLayout):
         Args:
             is_paused (bool): A boolean indicating if the application is paused.
         """
+        if self.conversation_manager:
+            self.conversation_manager.set_paused(is_paused)
         if is_paused:
             Animation.cancel_all(self.orb)
         else:
@@ -132,8 +176,14 @@ class TesseraApp(App):
     The main Kivy application class for Tessera.
     """
 
-    def __init__(self, conversation_manager: Optional[Any] = None, **kwargs) -> None:
+    def __init__(
+        self,
+        conversation_manager: Optional[Any] = None,
+        model_loader: Optional["ModelLoader"] = None,
+        **kwargs,
+    ) -> None:
         self.conversation_manager = conversation_manager
+        self.model_loader = model_loader
         super(TesseraApp, self).__init__(**kwargs)
         self.title = "Tessera"
 
@@ -143,9 +193,13 @@ class TesseraApp(App):
         Returns:
             MainLayout: The main layout widget.
         """
-        return MainLayout(conversation_manager=self.conversation_manager)
+        return MainLayout(
+            conversation_manager=self.conversation_manager,
+            model_loader=self.model_loader,
+        )
 
     def on_stop(self) -> None:
         """Cleans up resources when the application is closed."""
-        if self.conversation_manager:
-            self.conversation_manager.stop()
+        conversation_manager = getattr(self.root, "conversation_manager", None)
+        if conversation_manager:
+            conversation_manager.stop()
@@ -0,0 +1,74 @@
+import numpy as np
+
+from audio_engine.capture_buffer import CaptureBuffer
+
+
+def _ramp(start, length):
+    return np.arange(start, start + length, dtype=np.float32)
+
+
+def test_segment_is_a_view_until_the_ring_wraps():
+    buffer = CaptureBuffer(capacity_seconds=1.0, sample_rate=10)
+    buffer.write(_ramp(0, 3))
+    buffer.begin_segment()
+    buffer.write(_ramp(3, 4))
+    segment = buffer.segment()
+    assert np.array_equal(segment, _ramp(3, 4))
+    assert np.shares_memory(segment, buffer._data)
+
+
+def test_preroll_includes_recent_samples():
+    buffer = CaptureBuffer(capacity_seconds=1.0, sample_rate=10)
+    buffer.write(_ramp(0, 5))
+    buffer.begin_segment(preroll_samples=2)
+    buffer.write(_ramp(5, 2))
+    assert np.array_equal(buffer.copy_segment(buffer.end_segment()), _ramp(3, 4))
+
+
+def test_segment_wrapping_the_ring_is_read_in_order():
+    buffer = CaptureBuffer(capacity_seconds=1.0, sample_rate=10)
+    buffer.write(_ramp(0, 8))
+    buffer.begin_segment()
+    buffer.write(_ramp(8, 6))
+    assert np.array_equal(buffer.segment(), _ramp(8, 6))
+    assert np.array_equal(buffer.latest(3), _ramp(11, 3))
+
+
+def test_segment_longer_than_the_ring_spills_without_losing_samples():
+    buffer = CaptureBuffer(capacity_seconds=1.0, sample_rate=10)
+    buffer.begin_segment()
+    for start in range(0, 25, 5):
+        buffer.write(_ramp(start, 5))
+    assert buffer.segment_length == 25
+    assert np.array_equal(buffer.copy_segment(buffer.end_segment()), _ramp(0, 25))
+    assert buffer.segment().shape == (0,)
+
+
+def test_new_segment_after_a_spill_uses_the_ring_again():
+    buffer = CaptureBuffer(capacity_seconds=1.0, sample_rate=10)
+    buffer.begin_segment()
+    buffer.write(_ramp(0, 15))
+    buffer.end_segment()
+    buffer.begin_segment()
+    buffer.write(_ramp(15, 3))
+    assert np.array_equal(buffer.segment(), _ramp(15, 3))
+
+
+def test_finished_segment_is_copied_out_of_the_ring():
+    buffer = CaptureBuffer(capacity_seconds=1.0, sample_rate=10)
+    buffer.begin_segment()
+    buffer.write(_ramp(0, 4))
+    ref = buffer.end_segment()
+    buffer.write(_ramp(4, 5))
+    samples = buffer.copy_segment(ref)
+    assert np.array_equal(samples, _ramp(0, 4))
+    assert not np.shares_memory(samples, buffer._data)
+
+
+def test_finished_segment_overwritten_by_the_ring_is_not_returned():
+    buffer = CaptureBuffer(capacity_seconds=1.0, sample_rate=10)
+    buffer.begin_segment()
+    buffer.write(_ramp(0, 4))
+    ref = buffer.end_segment()
+    buffer.write(_ramp(4, 8))
+    assert buffer.copy_segment(ref) is None
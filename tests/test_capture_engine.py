@@ -0,0 +1,54 @@
+import numpy as np
+
+from audio_engine.capture_engine import CaptureEngine
+
+
+def _speak(engine, rng, speech_blocks=12, silence_blocks=40):
+    block = engine.block_size
+    for _ in range(20):
+        engine._audio_callback(
+            (rng.standard_normal((block, 1)) * 1e-4).astype(np.float32),
+            block,
+            None,
+            None,
+        )
+    t = np.arange(block) / engine.sample_rate
+    for _ in range(speech_blocks):
+        tone = 0.3 * np.sin(2 * np.pi * 220 * t) * rng.uniform(0.8, 1.2)
+        engine._audio_callback(tone.astype(np.float32)[:, None], block, None, None)
+    for _ in range(silence_blocks):
+        engine._audio_callback(
+            (rng.standard_normal((block, 1)) * 1e-4).astype(np.float32),
+            block,
+            None,
+            None,
+        )
+
+
+def test_callback_queues_the_utterance_and_defers_reporting(capsys):
+    engine = CaptureEngine()
+    _speak(engine, np.random.default_rng(0))
+    assert capsys.readouterr().out == ""
+
+    utterance = engine.get_utterance(timeout=1)
+    assert utterance is not None and utterance.shape[0] > 0
+    assert not np.shares_memory(utterance, engine.capture_buffer._data)
+
+    engine._report_events()
+    out = capsys.readouterr().out
+    assert "Voice detected" in out
+    assert "Silence detected" in out
+
+
+def test_finish_segment_ends_a_paused_utterance_early():
+    engine = CaptureEngine()
+    rng = np.random.default_rng(0)
+    _speak(engine, rng, silence_blocks=3)
+    assert engine.is_recording
+    assert engine.trailing_silence() > 0
+
+    engine.finish_segment()
+    _speak(engine, rng, speech_blocks=0, silence_blocks=1)
+    assert not engine.is_recording
+    assert engine.segments_cut_short == 1
+    assert engine.get_utterance(timeout=1).shape[0] > 0
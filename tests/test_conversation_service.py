@@ -0,0 +1,117 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from managers.state_manager import StateManager
+from services.conversation_service import ConversationService
+from services.gemini_service import GeminiService
+from services.latency_tracer import LatencyTracer
+from services.llm_backend import FakeBackend
+from services.tool_executor import ToolExecutor
+
+
+class BrokenStreamBackend(FakeBackend):
+    """Sends the scripted chunks, then drops the connection."""
+
+    async def agenerate_content_stream(self, model, contents, config):
+        chunks = await super().agenerate_content_stream(model, contents, config)
+
+        async def stream():
+            async for chunk in chunks:
+                yield chunk
+            raise ConnectionError("connection reset")
+
+        return stream()
+
+
+class Registry:
+    class audio_controller:
+        clips = {}
+
+    def __init__(self):
+        self.calls = []
+
+    def execute_function(self, tool_call):
+        self.calls.append(tool_call.name)
+        return {"clip_id": 1}
+
+
+def _service(tmp_path, backend, registry):
+    service = ConversationService.__new__(ConversationService)
+    service.gemini_service = GeminiService(
+        StateManager(str(tmp_path / "progress.json")), [], backend=backend
+    )
+    service.tool_executor = ToolExecutor(registry)
+    return service
+
+
+def test_tool_calls_of_a_failed_reply_are_skipped(tmp_path):
+    backend = BrokenStreamBackend(
+        [{"function_calls": [{"name": "play_speaker_sound", "args": {}}]}],
+        time_to_first_token=0,
+        token_latency=0,
+    )
+    registry = Registry()
+    service = _service(tmp_path, backend, registry)
+
+    async def turn():
+        sentences = asyncio.Queue()
+        async with asyncio.TaskGroup() as tg:
+            await asyncio.wait_for(
+                service._generate_stage("Play a sound.", sentences, [], tg), 5
+            )
+
+    try:
+        asyncio.run(turn())
+    finally:
+        service.tool_executor.close()
+        service.gemini_service.close()
+
+    assert registry.calls == []
+    assert len(backend.requests) == 1
+    assert [c.role for c in service.gemini_service.history.contents()] == ["user"]
+
+
+class SlowRouter:
+    def __init__(self):
+        self.finished = False
+
+    def match(self, text):
+        return {"name": "stop", "forward": False, "action": "stop_all_audio"}
+
+    def execute(self, command):
+        time.sleep(0.3)
+        self.finished = True
+        return "Okay."
+
+
+def test_command_action_runs_inside_the_cancellable_turn(tmp_path):
+    service = _service(tmp_path, FakeBackend([]), Registry())
+    service.command_router = SlowRouter()
+    service.tracer = LatencyTracer(enabled=False)
+    service.audio_service = SimpleNamespace(
+        capture_engine=SimpleNamespace(last_speech_end=None),
+        set_kai_is_speaking=lambda speaking: None,
+    )
+    service.audio_controller = SimpleNamespace(stop_tts_audio=lambda: None)
+    service._turn_task = None
+    local_turns = []
+
+    async def local_turn(*args):
+        local_turns.append(args)
+
+    service._local_turn = local_turn
+
+    async def main():
+        handled = asyncio.create_task(service._handle_transcript("stop"))
+        await asyncio.sleep(0.05)
+        service._interrupt_turn("pause")
+        await handled
+
+    try:
+        asyncio.run(main())
+    finally:
+        service.tool_executor.close()
+        service.gemini_service.close()
+
+    assert local_turns == []
@@ -0,0 +1,35 @@
+import os
+
+import numpy as np
+import soundfile as sf
+
+from audio_engine.echo_canceller import EchoCanceller
+from benchmarks.echo_canceller_benchmark import BLOCK_SIZE, load_fixtures, run_fixture
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "echo")
+
+
+def test_room_fixture_cancels_the_echo_and_keeps_the_near_end():
+    [(name, mic, reference, near_range)] = load_fixtures(FIXTURE_DIR)
+    result = run_fixture(name, mic, reference, near_range)
+
+    assert result["erle_db"] > 12
+    assert result["false_barge_ins"] == 0
+    assert result["near_end_detected"] == 1
+
+
+def test_double_talk_freezes_adaptation_and_preserves_the_near_end():
+    [(name, mic, reference, (start, end))] = load_fixtures(FIXTURE_DIR)
+    near, _ = sf.read(os.path.join(FIXTURE_DIR, f"{name}_near.wav"), dtype="float32")
+    canceller = EchoCanceller(block_size=BLOCK_SIZE)
+    residual = np.zeros_like(mic)
+    double_talk_blocks = 0
+    for block in range(0, len(mic) - BLOCK_SIZE + 1, BLOCK_SIZE):
+        span = slice(block, block + BLOCK_SIZE)
+        residual[span] = canceller.process(mic[span], reference[span])
+        double_talk_blocks += start <= block < end and canceller.double_talk
+
+    assert double_talk_blocks > (end - start) // BLOCK_SIZE // 2
+    error = residual[start:end] - near[start:end]
+    near_to_error_db = 10 * np.log10(np.sum(near[start:end] ** 2) / np.sum(error**2))
+    assert near_to_error_db > 10
@@ -0,0 +1,103 @@
+import asyncio
+
+from google.genai import types
+
+from managers.state_manager import StateManager
+from services.gemini_service import GeminiService
+from services.llm_backend import FakeBackend
+from services.model_router import ModelRouter
+
+REPLIES = [
+    {
+        "text": "Here comes the first speaker.",
+        "function_calls": [{"name": "play_speaker_sound", "args": {}}],
+    },
+    {"text": "Did you hear it?"},
+]
+
+
+def _parts(content):
+    return [
+        (
+            "call"
+            if part.function_call
+            else "response" if part.function_response else "text"
+        )
+        for part in content.parts
+    ]
+
+
+async def _turn(service):
+    deltas, calls = [], []
+    async for item in service.astream_with_gemini("Play me something."):
+        if isinstance(item, types.FunctionCall):
+            calls.append(item)
+        else:
+            deltas.append(item)
+    service.add_tool_results(calls, [{"clip_id": 1}])
+    follow_up = [item async for item in service.astream_tool_follow_up()]
+    return "".join(deltas), calls, "".join(follow_up)
+
+
+def test_tool_turn_is_recorded_in_order(tmp_path):
+    backend = FakeBackend(REPLIES, time_to_first_token=0, token_latency=0)
+    service = GeminiService(
+        StateManager(str(tmp_path / "progress.json")), [], backend=backend
+    )
+    try:
+        text, calls, follow_up = asyncio.run(_turn(service))
+    finally:
+        service.close()
+
+    assert text == "Here comes the first speaker."
+    assert [call.name for call in calls] == ["play_speaker_sound"]
+    assert follow_up == "Did you hear it?"
+
+    contents = service.history.contents()
+    assert [content.role for content in contents] == ["user", "model", "user", "model"]
+    assert _parts(contents[1]) == ["text", "call"]
+    assert _parts(contents[2]) == ["response"]
+
+    follow_up_request = backend.requests[1]["contents"]
+    assert _parts(follow_up_request[-1]) == ["response"]
+    assert _parts(follow_up_request[-2]) == ["text", "call"]
+
+
+def test_cancelled_stream_releases_the_probe(tmp_path):
+    backend = FakeBackend([{"text": "A long reply " * 20}], time_to_first_token=5)
+    router = ModelRouter(
+        {"chat": {"primary": "fast", "fallback": "faster", "total_slo": 1.0}},
+        min_samples=1,
+        probe_interval=0.0,
+    )
+    router.record("fast", None, 5.0, "chat")
+    assert router.choose("chat") == "faster"
+    service = GeminiService(
+        StateManager(str(tmp_path / "progress.json")),
+        [],
+        backend=backend,
+        router=router,
+    )
+
+    async def cancel_turn():
+        async def consume():
+            async for _ in service.astream_with_gemini("Hello?"):
+                pass
+
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    try:
+        asyncio.run(cancel_turn())
+    finally:
+        service.close()
+
+    assert backend.requests[0]["model"] == "fast"
+    assert router.choose("chat") == "fast"
+    assert service.history.contents()[-1].role == "user"
+    assert service.usage.records[0]["interrupted"]
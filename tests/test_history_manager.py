@@ -0,0 +1,93 @@
+import time
+
+from google.genai import types
+
+from services.history_manager import HistoryManager
+from services.llm_backend import FakeBackend
+
+
+def _user(text):
+    return types.UserContent(parts=[types.Part.from_text(text=text)])
+
+
+def _model(text):
+    return types.ModelContent(parts=[types.Part.from_text(text=text)])
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_remove_drops_the_reply_and_its_function_responses():
+    history = HistoryManager(FakeBackend())
+    history.start_turn(_user("play a sound"))
+    call = types.ModelContent(
+        parts=[types.Part.from_function_call(name="play_speaker_sound", args={})]
+    )
+    response = types.Content(
+        role="user",
+        parts=[
+            types.Part.from_function_response(
+                name="play_speaker_sound", response={"result": "ok"}
+            )
+        ],
+    )
+    follow_up = _model("Did you hear it?")
+    history.append(call)
+    history.append(response)
+    history.append(follow_up)
+
+    history.remove(call)
+
+    contents = history.contents()
+    assert contents[1] is follow_up
+    assert len(contents) == 2
+
+
+def test_old_turns_are_folded_into_the_summary():
+    backend = FakeBackend(
+        [{"text": "The user practised with one speaker."}], time_to_first_token=0
+    )
+    history = HistoryManager(backend, max_tokens=200, keep_turns=2)
+    for index in range(5):
+        history.start_turn(_user(f"turn {index} " + "word " * 20))
+        history.append(_model("reply " * 10))
+
+    _wait_for(lambda: history.summary)
+    _wait_for(lambda: history.turn_count() <= 2)
+    contents = history.contents()
+    assert "one speaker" in contents[0].parts[0].text
+    assert contents[-1].parts[0].text.startswith("reply")
+    assert "turn 0" in backend.requests[0]["contents"][0].parts[0].text
+
+
+def test_hard_limit_sets_turns_aside_and_still_summarises_them():
+    backend = FakeBackend([{"text": "The user asked for more noise."}])
+    history = HistoryManager(backend, max_tokens=10, keep_turns=1)
+    history.start_turn(_user("turn 0 " + "word " * 40))
+    history.start_turn(_user("turn 1 " + "word " * 40))
+    assert history.turn_count() == 1
+    assert len(history.contents()) == 1
+
+    _wait_for(lambda: history.summary)
+    assert history.summary == "The user asked for more noise."
+    assert "turn 0" in backend.requests[0]["contents"][0].parts[0].text
+    assert history.contents()[-1].parts[0].text.startswith("turn 1")
+
+
+class FailingBackend(FakeBackend):
+    def generate_content(self, model, contents, config):
+        raise ConnectionError("offline")
+
+
+def test_turns_dropped_without_a_summary_leave_a_note():
+    history = HistoryManager(FailingBackend(), max_tokens=10, keep_turns=1)
+    history.start_turn(_user("word " * 40))
+    history.start_turn(_user("word " * 40))
+
+    _wait_for(lambda: history.summary)
+    assert history.summary == "(1 earlier turn was dropped without a summary.)"
+    assert history.turn_count() == 1
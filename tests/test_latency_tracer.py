@@ -0,0 +1,20 @@
+from services.latency_tracer import LatencyTracer, read_spans
+
+
+def test_tracing_is_off_by_default(monkeypatch):
+    monkeypatch.delenv("TESSERA_TRACE", raising=False)
+    tracer = LatencyTracer()
+    tracer.mark("speech_end")
+    tracer.end_turn()
+    assert tracer.path is None
+
+
+def test_enabled_tracer_writes_the_turn_spans(monkeypatch, tmp_path):
+    monkeypatch.setenv("TESSERA_TRACE", "1")
+    tracer = LatencyTracer(path=tmp_path / "session.jsonl")
+    tracer.start_turn()
+    tracer.mark("speech_end")
+    tracer.end_turn(outcome="completed")
+    spans = read_spans(tracer.path)
+    assert [span["name"] for span in spans] == ["speech_end", "turn"]
+    assert spans[1]["args"] == {"outcome": "completed"}
@@ -0,0 +1,109 @@
+import asyncio
+import time
+
+import numpy as np
+from google.genai import types
+
+from services.latency_tracer import LatencyTracer
+from services.live_engine import (
+    INPUT_SAMPLE_RATE,
+    LiveConversationEngine,
+    LiveSession,
+    to_pcm16,
+)
+from services.live_stand_in import LiveStandIn
+from services.tool_executor import ToolExecutor
+
+SETUP = types.LiveClientSetup(
+    model="models/stand-in",
+    generation_config=types.GenerationConfig(
+        response_modalities=[types.Modality.AUDIO]
+    ),
+)
+REPLIES = [
+    {"function_calls": [{"name": "play_speaker_sound", "args": {}}]},
+    {"text": "Did you hear it?"},
+]
+
+
+class SlowRegistry:
+    class audio_controller:
+        clips = {}
+
+    def __init__(self):
+        self.finished = []
+
+    def execute_function(self, tool_call):
+        time.sleep(0.3)
+        self.finished.append(tool_call.name)
+        return {"clip_id": 1}
+
+
+def _engine(registry):
+    engine = LiveConversationEngine.__new__(LiveConversationEngine)
+    engine.tool_executor = ToolExecutor(registry)
+    engine.tracer = LatencyTracer(enabled=False)
+    engine.kai_is_speaking = False
+    engine._turn_id = 0
+    engine._turn_started = False
+    engine._first_audio_sent = False
+    engine._input_text = ""
+    engine._output_text = ""
+    engine._tool_tasks = {}
+    return engine
+
+
+async def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def _run(conversation):
+    registry = SlowRegistry()
+    engine = _engine(registry)
+    stand_in = LiveStandIn(REPLIES, time_to_first_token=0, token_latency=0)
+    url = stand_in.start()
+
+    async def run():
+        session = await LiveSession.connect(url, SETUP)
+        receiver = asyncio.create_task(engine._receive_stage(session))
+        try:
+            await asyncio.wait_for(conversation(session, engine, stand_in), 10)
+        finally:
+            receiver.cancel()
+            await session.close()
+
+    try:
+        asyncio.run(run())
+    finally:
+        stand_in.stop()
+        engine.tool_executor.close()
+    return stand_in
+
+
+def test_tool_results_are_sent_while_messages_keep_arriving():
+    async def conversation(session, engine, stand_in):
+        await session.send_text("Play a sound.")
+        await _wait_for(lambda: engine._tool_tasks)
+        await _wait_for(lambda: any("tool_response" in r for r in stand_in.requests))
+        await _wait_for(lambda: not engine._tool_tasks)
+
+    stand_in = _run(conversation)
+    responses = [r for r in stand_in.requests if "tool_response" in r]
+    assert len(responses) == 1
+
+
+def test_cancelled_tool_calls_get_no_response():
+    block = 0.3 * np.sin(np.arange(INPUT_SAMPLE_RATE // 10) / 5.0)
+
+    async def conversation(session, engine, stand_in):
+        await session.send_text("Play a sound.")
+        await _wait_for(lambda: engine._tool_tasks)
+        await session.send_audio(to_pcm16(block.astype(np.float32)))
+        await _wait_for(lambda: not engine._tool_tasks)
+        await asyncio.sleep(0.5)
+
+    stand_in = _run(conversation)
+    assert not [r for r in stand_in.requests if "tool_response" in r]
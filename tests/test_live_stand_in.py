@@ -0,0 +1,114 @@
+import asyncio
+
+import numpy as np
+from google.genai import types
+
+from services.live_engine import INPUT_SAMPLE_RATE, LiveSession, to_pcm16
+from services.live_stand_in import LiveStandIn
+
+SETUP = types.LiveClientSetup(
+    model="models/stand-in",
+    generation_config=types.GenerationConfig(
+        response_modalities=[types.Modality.AUDIO]
+    ),
+)
+
+
+async def _until_turn_complete(session):
+    audio, transcript, tool_calls = b"", "", []
+    async for message in session.receive():
+        if message.tool_call is not None:
+            tool_calls.extend(message.tool_call.function_calls)
+            return audio, transcript, tool_calls
+        content = message.server_content
+        if content is None:
+            continue
+        for part in content.model_turn.parts if content.model_turn else []:
+            audio += part.inline_data.data
+        if content.output_transcription is not None:
+            transcript += content.output_transcription.text
+        if content.turn_complete:
+            return audio, transcript, tool_calls
+
+
+def _run(stand_in, conversation):
+    url = stand_in.start()
+
+    async def run():
+        session = await LiveSession.connect(url, SETUP)
+        try:
+            return await asyncio.wait_for(conversation(session), timeout=10)
+        finally:
+            await session.close()
+
+    try:
+        return asyncio.run(run())
+    finally:
+        stand_in.stop()
+
+
+def test_text_turn_streams_audio_and_transcript():
+    stand_in = LiveStandIn(
+        [{"text": "Well done, that was right."}], time_to_first_token=0, token_latency=0
+    )
+
+    async def conversation(session):
+        await session.send_text("Was it the left one?")
+        return await _until_turn_complete(session)
+
+    audio, transcript, tool_calls = _run(stand_in, conversation)
+    assert transcript == "Well done, that was right."
+    assert audio and not tool_calls
+    assert stand_in.requests[0]["setup"].model == "models/stand-in"
+    assert stand_in.requests[1]["client_content"]["turnComplete"]
+
+
+def test_tool_call_round_trip():
+    stand_in = LiveStandIn(
+        [
+            {"function_calls": [{"name": "play_speaker_sound", "args": {}}]},
+            {"text": "Did you hear it?"},
+        ],
+        time_to_first_token=0,
+        token_latency=0,
+    )
+
+    async def conversation(session):
+        await session.send_text("Play a sound.")
+        _, _, tool_calls = await _until_turn_complete(session)
+        await session.send_tool_response(
+            [
+                types.FunctionResponse(
+                    id=call.id, name=call.name, response={"clip_id": 1}
+                )
+                for call in tool_calls
+            ]
+        )
+        _, transcript, _ = await _until_turn_complete(session)
+        return tool_calls, transcript
+
+    tool_calls, transcript = _run(stand_in, conversation)
+    assert [call.name for call in tool_calls] == ["play_speaker_sound"]
+    assert transcript == "Did you hear it?"
+    response = stand_in.requests[-1]["tool_response"]["functionResponses"][0]
+    assert response["id"] == tool_calls[0].id
+
+
+def test_reply_follows_speech_and_silence():
+    stand_in = LiveStandIn(
+        [{"text": "Okay."}],
+        time_to_first_token=0,
+        token_latency=0,
+        silence_duration=0.2,
+    )
+    block = INPUT_SAMPLE_RATE // 10
+    speech = 0.3 * np.sin(np.arange(block) / 5.0).astype(np.float32)
+    silence = np.zeros(block, dtype=np.float32)
+
+    async def conversation(session):
+        for samples in [speech] * 3 + [silence] * 3:
+            await session.send_audio(to_pcm16(samples))
+        return await _until_turn_complete(session)
+
+    _, transcript, _ = _run(stand_in, conversation)
+    assert transcript == "Okay."
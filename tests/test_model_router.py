@@ -0,0 +1,73 @@
+from services.model_router import ModelRouter
+
+ROUTES = {
+    "chat": {
+        "primary": "fast",
+        "fallback": "faster",
+        "ttft_slo": 1.0,
+        "total_slo": 3.0,
+    }
+}
+
+
+def _router(probe_interval=60.0):
+    return ModelRouter(
+        dict(ROUTES), window=5, min_samples=3, probe_interval=probe_interval
+    )
+
+
+def test_stays_on_primary_within_slo():
+    router = _router()
+    for _ in range(3):
+        router.record("fast", 0.5, 1.0, "chat")
+    assert router.choose("chat") == "fast"
+
+
+def test_falls_back_after_enough_slow_requests():
+    router = _router()
+    router.record("fast", 2.0, 5.0, "chat")
+    router.record("fast", 2.0, 5.0, "chat")
+    assert router.choose("chat") == "fast"
+    router.record("fast", 2.0, 5.0, "chat")
+    assert router.choose("chat") == "faster"
+    assert router.choose("chat") == "faster"
+
+
+def test_probe_that_meets_the_slo_restores_the_primary():
+    router = _router(probe_interval=0.0)
+    for _ in range(3):
+        router.record("fast", 2.0, 5.0, "chat")
+    assert router.choose("chat") == "faster"
+
+    assert router.choose("chat") == "fast"
+    assert router.choose("chat") == "faster"
+    router.record("fast", 0.4, 1.0, "chat")
+
+    assert router.choose("chat") == "fast"
+    assert router.stats("fast") == (0.4, 1.0)
+
+
+def test_slow_probe_keeps_the_fallback():
+    router = _router(probe_interval=60.0)
+    for _ in range(3):
+        router.record("fast", 2.0, 5.0, "chat")
+    assert router.choose("chat") == "faster"
+
+    router.probe_interval = 0.0
+    assert router.choose("chat") == "fast"
+    router.probe_interval = 60.0
+    router.record("fast", 2.0, 5.0, "chat")
+    assert router.choose("chat") == "faster"
+
+
+def test_cancelled_probe_is_retried():
+    router = _router(probe_interval=0.0)
+    for _ in range(3):
+        router.record("fast", 2.0, 5.0, "chat")
+    assert router.choose("chat") == "faster"
+    assert router.choose("chat") == "fast"
+
+    router.record_interrupted("fast", None, "chat")
+
+    assert router.choose("chat") == "fast"
+    assert router.stats("fast") == (2.0, 5.0)
@@ -0,0 +1,73 @@
+import threading
+import time
+
+from google.genai import types
+
+from services.llm_backend import FakeBackend
+from services.resilient_backend import ResilientBackend
+
+
+class SlowFirstBackend(FakeBackend):
+    """Makes the first streamed request slow and notes which streams close.
+
+    The streams are kept so that only an explicit close, not garbage
+    collection, ends them.
+    """
+
+    def __init__(self):
+        super().__init__(
+            [{"text": "One two three four five six."}],
+            time_to_first_token=0,
+            token_latency=0,
+            chunk_tokens=2,
+        )
+        self.streams = []
+        self.closed = []
+        self.all_closed = threading.Event()
+
+    def generate_content_stream(self, model, contents, config):
+        stream = self._stream(len(self.streams) + 1, model, contents, config)
+        self.streams.append(stream)
+        return stream
+
+    def _stream(self, number, model, contents, config):
+        chunks = super().generate_content_stream(model, contents, config)
+        try:
+            if number == 1:
+                time.sleep(0.3)
+            yield from chunks
+        finally:
+            self.closed.append(number)
+            if len(self.closed) == 2:
+                self.all_closed.set()
+
+
+def _stream(backend):
+    return backend.generate_content_stream(
+        "model",
+        [types.UserContent(parts=[types.Part.from_text(text="hi")])],
+        types.GenerateContentConfig(),
+    )
+
+
+def test_hedging_is_off_by_default(monkeypatch):
+    monkeypatch.delenv("TESSERA_LLM_HEDGE", raising=False)
+    assert not ResilientBackend(FakeBackend()).hedge
+    monkeypatch.setenv("TESSERA_LLM_HEDGE", "1")
+    assert ResilientBackend(FakeBackend()).hedge
+
+
+def test_losing_hedged_stream_is_closed():
+    inner = SlowFirstBackend()
+    backend = ResilientBackend(inner, hedge=True, initial_hedge_delay=0.05)
+    try:
+        chunks = _stream(backend)
+        first = next(chunks)
+        assert first.text == "One two "
+        assert backend.hedges_won == 1
+        assert inner.closed == []
+        chunks.close()
+        assert inner.all_closed.wait(2)
+    finally:
+        backend.close()
+    assert sorted(inner.closed) == [1, 2]
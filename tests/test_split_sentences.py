@@ -0,0 +1,25 @@
+from services.conversation_service import split_sentences
+
+
+def test_splits_complete_sentences_and_keeps_remainder():
+    sentences, rest = split_sentences("That was exactly right. Now listen again")
+    assert sentences == ["That was exactly right."]
+    assert rest == "Now listen again"
+
+
+def test_waits_for_whitespace_after_the_punctuation():
+    sentences, rest = split_sentences("That was exactly right.")
+    assert sentences == []
+    assert rest == "That was exactly right."
+
+
+def test_merges_short_sentences_into_the_next():
+    sentences, rest = split_sentences("Okay. Now I will add a second speaker. ")
+    assert sentences == ["Okay. Now I will add a second speaker."]
+    assert rest == ""
+
+
+def test_keeps_closing_quotes_with_their_sentence():
+    sentences, rest = split_sentences('He said "turn it up please." Then')
+    assert sentences == ['He said "turn it up please."']
+    assert rest == "Then"
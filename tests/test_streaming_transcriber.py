@@ -0,0 +1,63 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from audio_engine.capture_engine import CaptureEngine
+from services.streaming_transcriber import StreamingTranscriber
+
+
+class Whisper:
+    def __init__(self, text):
+        self.text = text
+        self.calls = []
+
+    def transcribe(self, audio, **options):
+        self.calls.append(options)
+        if options.get("initial_prompt"):
+            return [], None
+        words = [SimpleNamespace(word=self.text, end=len(audio) / 16000)]
+        return [SimpleNamespace(text=self.text, words=words)], None
+
+
+def _feed(engine, speech_blocks, silence_blocks):
+    rng = np.random.default_rng(0)
+    block = engine.block_size
+    t = np.arange(block) / engine.sample_rate
+    blocks = [rng.standard_normal(block) * 1e-4 for _ in range(20)]
+    blocks += [0.3 * np.sin(2 * np.pi * 220 * t) for _ in range(speech_blocks)]
+    blocks += [rng.standard_normal(block) * 1e-4 for _ in range(silence_blocks)]
+    for samples in blocks:
+        engine._audio_callback(samples.astype(np.float32)[:, None], block, None, None)
+        time.sleep(0.03)
+
+
+def _transcribe(text, matcher, speech_blocks):
+    engine = CaptureEngine()
+    whisper = Whisper(text)
+    transcriber = StreamingTranscriber(whisper, engine)
+    transcriber.command_matcher = matcher
+    feeder = threading.Thread(target=_feed, args=(engine, speech_blocks, 40))
+    feeder.start()
+    try:
+        return transcriber.transcribe_next(), engine, whisper
+    finally:
+        feeder.join()
+
+
+def test_short_command_ends_the_utterance_before_the_full_silence():
+    transcript, engine, whisper = _transcribe(
+        " Stop.", lambda text: text.strip(" .").lower() == "stop", speech_blocks=12
+    )
+    assert transcript == "Stop."
+    assert engine.segments_cut_short == 1
+    assert whisper.calls[-1]["max_new_tokens"] == 12
+
+
+def test_utterance_that_is_no_command_waits_for_the_silence():
+    transcript, engine, _ = _transcribe(
+        " Tell me a story.", lambda text: False, speech_blocks=12
+    )
+    assert transcript == "Tell me a story."
+    assert engine.segments_cut_short == 0
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+
+from google.genai import types
+
+from services.tool_executor import ToolExecutor, plan_dependencies
+
+
+def _call(name, **args):
+    return types.FunctionCall(name=name, args=args)
+
+
+def test_independent_plays_do_not_wait_for_each_other():
+    calls = [_call("play_speaker_sound"), _call("play_noise_sound")]
+    assert plan_dependencies(calls, set()) == [set(), set()]
+
+
+def test_unknown_clip_waits_for_earlier_plays():
+    calls = [
+        _call("play_speaker_sound"),
+        _call("play_noise_sound"),
+        _call("pan_audio", clip_id=7, pan=-1.0),
+    ]
+    assert plan_dependencies(calls, set())[2] == {0, 1}
+
+
+def test_existing_clip_only_keeps_order_with_its_own_calls():
+    calls = [
+        _call("play_speaker_sound"),
+        _call("adjust_volume", clip_id=3, volume=0.5),
+        _call("pan_audio", clip_id=3, pan=1.0),
+    ]
+    assert plan_dependencies(calls, {3}) == [set(), set(), {1}]
+
+
+def test_mixer_wide_calls_are_barriers():
+    calls = [
+        _call("play_speaker_sound"),
+        _call("adjust_volume", clip_id=3, volume=0.5),
+        _call("stop_all_audio"),
+        _call("play_noise_sound"),
+    ]
+    assert plan_dependencies(calls, {3}) == [set(), set(), {0, 1}, {2}]
+
+
+def test_progress_reads_wait_for_writes():
+    calls = [
+        _call("read_progress_log"),
+        _call("add_session_observation", observation="ok"),
+        _call("see_full_progress"),
+    ]
+    assert plan_dependencies(calls, set()) == [set(), set(), {1}]
+
+
+class _Registry:
+    class audio_controller:
+        clips = {}
+
+    def __init__(self):
+        self.order = []
+        self._lock = threading.Lock()
+
+    def execute_function(self, tool_call):
+        if tool_call.name == "play_speaker_sound":
+            time.sleep(0.05)
+        with self._lock:
+            self.order.append(tool_call.name)
+        if tool_call.name == "stop_all_audio":
+            raise RuntimeError("mixer busy")
+        return {"clip_id": 1, "type": tool_call.name}
+
+
+def test_execute_respects_dependencies_and_reports_errors():
+    registry = _Registry()
+    executor = ToolExecutor(registry)
+    calls = [
+        _call("play_speaker_sound"),
+        _call("pan_audio", clip_id=1, pan=1.0),
+        _call("stop_all_audio"),
+    ]
+    try:
+        results = asyncio.run(executor.execute(calls))
+    finally:
+        executor.close()
+    assert registry.order == ["play_speaker_sound", "pan_audio", "stop_all_audio"]
+    assert results[0] == {"clip_id": 1, "type": "play_speaker_sound"}
+    assert results[2] == "Error running stop_all_audio: mixer busy"
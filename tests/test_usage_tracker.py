@@ -0,0 +1,27 @@
+from google.genai import types
+
+from services.usage_tracker import UsageTracker
+
+
+def _usage(prompt, output):
+    return types.GenerateContentResponseUsageMetadata(
+        prompt_token_count=prompt,
+        candidates_token_count=output,
+        total_token_count=prompt + output,
+    )
+
+
+def test_interrupted_requests_count_their_reported_tokens():
+    tracker = UsageTracker()
+    tracker.record("fast", "chat", _usage(100, 20), 1.0, 0.3, turn=1)
+    tracker.record("fast", "chat", _usage(120, 4), 0.4, 0.3, turn=2, interrupted=True)
+    tracker.record("fast", "chat", None, 0.1, turn=3, interrupted=True)
+    tracker.record("fast", "chat", None, 8.0, turn=4)
+
+    totals = tracker.totals()
+    assert totals["requests"] == 4
+    assert totals["interrupted"] == 2
+    assert totals["failed"] == 1
+    assert totals["prompt_tokens"] == 220
+    assert totals["output_tokens"] == 24
+    assert totals["mean_latency_ms"] == 1000